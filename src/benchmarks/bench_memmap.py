@@ -0,0 +1,84 @@
+"""
+Resident memory of an uncompressed NIfTI volume: SimpleITK read vs. memmap.
+
+Writes a synthetic int16 volume (default 512x512x400, ~200 MB), then in a
+fresh process per reader reports RSS before opening, after opening, and after
+extracting the centre axial, coronal and sagittal slices.
+
+    python src/benchmarks/bench_memmap.py --shape 400 512 512
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+import numpy as np
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, falling back to peak RSS)."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def write_volume(path, shape):
+    import nibabel as nib
+    rng = np.random.default_rng(0)
+    volume = rng.integers(-1000, 3000, shape[::-1], dtype=np.int16)  # NIfTI order (x, y, z)
+    nib.save(nib.Nifti1Image(volume, np.eye(4)), path)
+
+
+def measure(reader, path):
+    """Run inside a child process and print one line per step."""
+    from nifti import NiftiHeader
+
+    steps = [("start", rss_mb())]
+    if reader == "sitk":
+        import SimpleITK as sitk
+        volume = sitk.GetArrayFromImage(sitk.ReadImage(path))
+    else:
+        volume = NiftiHeader(path).memmap()
+    steps.append(("open", rss_mb()))
+
+    nz, ny, nx = volume.shape
+    np.asarray(volume[nz // 2, :, :]).sum()
+    steps.append(("+axial", rss_mb()))
+    np.asarray(volume[:, ny // 2, :]).sum()
+    steps.append(("+coronal", rss_mb()))
+    np.asarray(volume[:, :, nx // 2]).sum()
+    steps.append(("+sagittal", rss_mb()))
+
+    print(f"{reader:>7}: " + "  ".join(f"{name} {value:7.1f} MB" for name, value in steps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[400, 512, 512], metavar=("Z", "Y", "X"))
+    parser.add_argument("--measure", choices=["sitk", "memmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "volume.nii")
+        write_volume(path, tuple(args.shape))
+        print(f"volume {tuple(args.shape)} int16, {os.path.getsize(path) / 2 ** 20:.0f} MB on disk")
+        for reader in ("sitk", "memmap"):
+            subprocess.run([sys.executable, __file__, "--measure", reader, "--path", path], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Frame-time comparison for a single MPR viewport.
+
+"before" reproduces the old per-frame path (ax.clear(), imshow, new crosshair
+artists, blocking canvas.draw()); "after" uses SliceViewport, which keeps the
+artists alive and blits the axes region; "raster" uses RasterViewport, which
+paints the frame with QPainter without matplotlib.
+
+    python src/benchmarks/bench_redraw.py --size 512 --frames 200
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+import numpy as np
+import matplotlib.pyplot as plt
+from PyQt5.QtWidgets import QApplication
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+
+from raster_viewport import RasterViewport
+from viewport import SliceViewport
+from window_level import colormap_table
+
+GRAY = colormap_table('gray')
+
+
+def make_frames(size, count):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (size, size), dtype=np.uint8) for _ in range(count)]
+
+
+def legacy_frame(ax, canvas, frame, x, y):
+    ax.clear()
+    ax.imshow(frame, cmap='gray')
+    ax.set_title("Axial View")
+    ax.axis('on')
+    ax.axvline(x, color='r', linestyle='--')
+    ax.axhline(y, color='r', linestyle='--')
+    ax.plot(x, y, 'ro', markersize=5)
+    canvas.draw()
+
+
+def persistent_frame(view, frame, x, y):
+    view.set_image(np.take(GRAY, frame, axis=0, out=view.pixel_buffer(*frame.shape)))
+    view.set_crosshair(x, y)
+    view.blit()
+
+
+def time_frames(render, frames):
+    times = []
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        render(frame, i % frame.shape[1], i % frame.shape[0])
+        times.append(time.perf_counter() - start)
+    return np.array(times[1:]) * 1000.0  # drop the warm-up frame
+
+
+def report(name, times):
+    print(f"{name:>7}: mean {times.mean():7.2f} ms  p50 {np.percentile(times, 50):7.2f} ms  "
+          f"p95 {np.percentile(times, 95):7.2f} ms  ({1000.0 / times.mean():6.1f} fps)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=512, help="slice matrix size")
+    parser.add_argument("--frames", type=int, default=100, help="frames per mode")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    frames = make_frames(args.size, args.frames)
+
+    fig, ax = plt.subplots()
+    canvas = FigureCanvas(fig)
+    canvas.resize(600, 600)
+    before = time_frames(lambda f, x, y: legacy_frame(ax, canvas, f, x, y), frames)
+
+    fig, ax = plt.subplots()
+    canvas = FigureCanvas(fig)
+    canvas.resize(600, 600)
+    view = SliceViewport(ax, canvas, "Axial View")
+    after = time_frames(lambda f, x, y: persistent_frame(view, f, x, y), frames)
+
+    raster_view = RasterViewport("Axial View")
+    raster_view.canvas.resize(600, 600)
+    raster_view.canvas.show()
+    raster = time_frames(lambda f, x, y: persistent_frame(raster_view, f, x, y), frames)
+
+    print(f"{args.size}x{args.size} slice, {args.frames} frames")
+    report("before", before)
+    report("after", after)
+    report("raster", raster)
+    print(f"speedup: {before.mean() / after.mean():.1f}x (matplotlib), "
+          f"{before.mean() / raster.mean():.1f}x (raster)")
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Per-orientation slice extraction time, direct strided reads vs. SliceStore shadows.
+
+Each sample extracts a slice in display orientation and maps it through the
+window/level LUT, which is what a viewport does per frame.
+
+    python src/benchmarks/bench_slice_extraction.py --shape 512 512 512
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+import numpy as np
+
+from slice_store import SliceStore
+from window_level import VolumeStats, WindowLevelLUT
+
+VIEWS = ("axial", "coronal", "sagittal")
+
+
+def time_view(store, lut, view, repeats):
+    count = store.volume.shape[(0, 1, 2)[view]]
+    indices = np.random.default_rng(view).integers(0, count, repeats)
+    times = []
+    for index in indices:
+        start = time.perf_counter()
+        lut.apply(store.slice(view, index))
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shape", type=int, nargs=3, default=[512, 512, 512], metavar=("Z", "Y", "X"))
+    parser.add_argument("--dtype", default="int16")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    volume = np.random.default_rng(0).integers(0, 3000, args.shape).astype(args.dtype)
+    lut = WindowLevelLUT(VolumeStats(volume))
+
+    direct = SliceStore(volume, memory_cap=0)
+    shadowed = SliceStore(volume)
+    start = time.perf_counter()
+    shadowed.start()
+    shadowed._thread.join()
+    build_time = time.perf_counter() - start
+
+    print(f"volume {tuple(args.shape)} {args.dtype}, strategy {shadowed.strategy}, "
+          f"shadows {shadowed.shadow_bytes / 2 ** 20:.0f} MB built in {build_time:.2f} s")
+    print(f"{'view':>9} {'direct ms':>10} {'store ms':>10}")
+    for view, name in enumerate(VIEWS):
+        print(f"{name:>9} {time_view(direct, lut, view, args.repeats):10.3f} "
+              f"{time_view(shadowed, lut, view, args.repeats):10.3f}")
+
+
+if __name__ == "__main__":
+    main()
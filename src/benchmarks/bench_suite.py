@@ -0,0 +1,342 @@
+"""
+Reproducible benchmark suite for the MPR viewer.
+
+For each synthetic volume (a seeded phantom: nested ellipsoids plus noise) it
+times:
+
+    load_nii / load_nii_gz       reading through VolumeReader (memmap / streaming)
+    load_nii_gz_cached           re-opening the .nii.gz from the decoded-volume cache
+    extract_<view>               display-oriented slice from the SliceStore
+    display_slice_<view>         MRIViewer.display_slice (LUT + image update)
+    render_<view>                MRIViewer.render_view (display_slice + blit)
+    update_all_slices            a full three-view redraw through the scheduler
+    oblique_<view>               MRIViewer.render_view with the planes rotated (trilinear reslicing)
+    slab_<mode>_step             stepping a 40-slice axial slab by one slice (MIP, MinIP, Average)
+    grow_region                  region growing from the centre voxel (fresh grower each time)
+    regrow_region                re-growing at a slightly larger tolerance from the last result
+    cine_step                    one update_slices call presenting prefetched frames
+    cine_frame                   1000 / achieved fps while playing at 60 fps
+
+and, once per run, the viewer's cold start in fresh interpreters:
+
+    startup/imports              importing MPR_Viewer (numpy, PyQt5, viewer modules)
+    startup/first_paint          process start to the first painted window
+
+Every metric is in milliseconds (lower is better). Results are written as
+JSON; --compare fails the run when a metric regresses past --threshold.
+
+    python src/benchmarks/bench_suite.py --preset quick --output run.json
+    python src/benchmarks/bench_suite.py --preset quick --compare run.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+import numpy as np
+
+PRESETS = {
+    "quick": [(128, "int16"), (256, "int16")],
+    "standard": [(128, "int16"), (256, "int16"), (512, "uint16")],
+    "full": [(128, "int16"), (256, "int16"), (512, "uint16"), (768, "uint16")],
+}
+VIEWS = ("axial", "coronal", "sagittal")
+# Mirrors MPR_Viewer's __main__, then prints the startup timings as JSON
+STARTUP_SCRIPT = """
+import json, sys
+from MPR_Viewer import STARTUP, MRIViewer, QApplication
+from PyQt5.QtCore import QTimer
+app = QApplication(sys.argv)
+STARTUP.mark('create QApplication')
+viewer = MRIViewer()
+STARTUP.mark('create main window')
+STARTUP.watch_first_paint(viewer, lambda timer: QTimer.singleShot(0, app.quit))
+viewer.show()
+app.exec_()
+print(json.dumps(STARTUP.as_dict()))
+"""
+
+
+def phantom(size, dtype, seed=0):
+    """Nested ellipsoids with noise, built plane by plane to bound temporaries."""
+    rng = np.random.default_rng(seed)
+    info = np.iinfo(dtype)
+    top = min(info.max, 4000)
+    volume = np.empty((size, size, size), dtype)
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size - 0.5
+    for z in range(size):
+        zz = z / size - 0.5
+        r = np.sqrt((x / 0.45) ** 2 + (y / 0.40) ** 2 + (zz / 0.42) ** 2)
+        plane = np.where(r < 1.0, top * 0.3, 0.0) + np.where(r < 0.7, top * 0.3, 0.0)
+        plane += rng.normal(0, top * 0.02, plane.shape)
+        volume[z] = np.clip(plane, max(info.min, 0), top)
+    return volume
+
+
+def timed(function, repeats):
+    """Median wall time of function() in ms."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000.0)
+
+
+def bench_loading(volume, tmp, repeats):
+    import nibabel as nib
+    from shared_volumes import SharedVolumeStore, fcntl
+    from volume_cache import VolumeCache
+    from volume_io import VolumeReader, read_volume
+
+    for name in ("volume.nii", "volume.nii.gz"):
+        nib.save(nib.Nifti1Image(volume.T, np.eye(4)), os.path.join(tmp, name))
+
+    results = {}
+    cache = VolumeCache(os.path.join(tmp, f"cache_{volume.shape[0]}"))
+    for key, name, cache_used in (("load_nii", "volume.nii", None), ("load_nii_gz", "volume.nii.gz", None),
+                                  ("load_nii_gz_cached", "volume.nii.gz", cache)):
+        path = os.path.join(tmp, name)
+        if cache_used is not None:
+            read_volume(path, cache_used)
+        results[key] = timed(lambda: np.asarray(read_volume(path, cache_used)[volume.shape[0] // 2]).sum(),
+                             repeats)
+
+    if fcntl is not None:
+        # What a second viewer process pays for a study the first one decoded into shared memory
+        store = SharedVolumeStore()
+        path = os.path.join(tmp, "volume.nii.gz")
+        first = VolumeReader(path, shared=store)
+        first.read()
+
+        def attach():
+            reader = VolumeReader(path, shared=store)
+            np.asarray(reader.read()[volume.shape[0] // 2]).sum()
+            reader.shared_volume.release()
+        results["attach_shared"] = timed(attach, repeats)
+        first.shared_volume.release()
+    return results
+
+
+def bench_viewer(app, volume, repeats):
+    from MPR_Viewer import MRIViewer
+
+    viewer = MRIViewer()
+    viewer.resize(1400, 800)
+    viewer.show()
+    viewer.set_volume(volume, "synthetic")
+    viewer.render_scheduler.flush()
+    viewer.slice_store._thread and viewer.slice_store._thread.join()
+    app.processEvents()
+
+    results = {}
+    for idx, name in enumerate(VIEWS):
+        index = volume.shape[idx] // 2
+        results[f"extract_{name}"] = timed(lambda: viewer.slice_store.slice(idx, index), repeats * 10)
+        slice_data = viewer.slice_store.slice(idx, index)
+        results[f"display_slice_{name}"] = timed(
+            lambda: viewer.display_slice(viewer.viewports[idx], slice_data, idx), repeats)
+        results[f"render_{name}"] = timed(lambda: viewer.render_view(idx), repeats)
+
+    def redraw():
+        viewer.update_all_slices()
+        viewer.render_scheduler.flush()
+    results["update_all_slices"] = timed(redraw, repeats)
+
+    viewer.rotation_sliders[0].setValue(30)
+    viewer.rotation_sliders[1].setValue(-20)
+    for idx, name in enumerate(VIEWS):
+        results[f"oblique_{name}"] = timed(lambda: viewer.render_view(idx), repeats)
+    viewer.reset_rotation()
+
+    viewer.slab_thickness_spins[0].setValue(40)
+    for mode in ("MIP", "MinIP", "Average"):
+        viewer.slab_mode_combos[0].setCurrentText(mode)
+        positions = iter(range(1 << 20))
+
+        def step_slab():
+            viewer.axial_slider.setValue(next(positions) % volume.shape[0])
+            viewer.render_scheduler.flush()
+        results[f"slab_{mode.lower()}_step"] = timed(step_slab, repeats * 10)
+    viewer.slab_mode_combos[0].setCurrentText("Slice")
+
+    from segmentation import RegionGrower
+    seed = tuple(size // 2 for size in volume.shape)
+    tolerance = 0.3 * float(viewer.volume_stats.high - viewer.volume_stats.low)
+    results["grow_region"] = timed(lambda: RegionGrower(volume, seed).grow(tolerance), repeats)
+    grower = RegionGrower(volume, seed)
+    steps = iter(range(1, 1 << 20))
+
+    def regrow():
+        grower.grow(tolerance * (1 + 0.02 * next(steps)))
+    grower.grow(tolerance)
+    results["regrow_region"] = timed(regrow, repeats)
+
+    viewer.cine_fps_spin.setValue(60)
+    viewer.start_playback()
+    steps = []
+    end = time.perf_counter() + 2.0
+    while time.perf_counter() < end:
+        app.processEvents()
+        start = time.perf_counter()
+        viewer.update_slices()
+        steps.append(time.perf_counter() - start)
+    results["cine_step"] = float(np.median(steps) * 1000.0)
+    results["cine_frame"] = 1000.0 / max(viewer.cine.achieved_fps(), 1e-3)
+    viewer.stop_playback()
+    viewer.close()
+    return results
+
+
+def bench_time_series(app, tmp, repeats, size=128, timepoints=30):
+    """Opening a 4D NIfTI and stepping through its timepoints, uncompressed and gzipped."""
+    import nibabel as nib
+    from MPR_Viewer import MRIViewer
+
+    frame = phantom(size, "int16")
+    series = np.empty((timepoints,) + frame.shape, frame.dtype)
+    for t in range(timepoints):
+        series[t] = np.roll(frame, t, axis=2)
+    results = {}
+    for key, name in (("nii", "series.nii"), ("nii_gz", "series.nii.gz")):
+        path = os.path.join(tmp, name)
+        nib.save(nib.Nifti1Image(series.T, np.eye(4)), path)
+        viewer = MRIViewer()
+        viewer.resize(1400, 800)
+        viewer.show()
+        start = time.perf_counter()
+        viewer.start_loading(path)
+        while viewer.is_loading():
+            app.processEvents()
+        viewer.render_scheduler.flush()
+        results[f"open_{key}"] = (time.perf_counter() - start) * 1000.0
+        while viewer.time_series.decoding:
+            app.processEvents()
+            time.sleep(0.001)
+        viewer.update_time_range()
+        positions = iter(range(1, 1 << 20))
+
+        def step():
+            viewer.time_slider.setValue(next(positions) % timepoints)
+            viewer.render_scheduler.flush()
+            # Leave the prefetcher the time a cine frame would
+            time.sleep(0.01)
+        results[f"timepoint_step_{key}"] = timed(step, repeats * 10) - 10.0
+        viewer.clear_volume()
+        viewer.close()
+    return results
+
+
+def bench_startup(repeats):
+    """Median cold-start timings over fresh interpreter processes."""
+    import subprocess
+
+    main_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main")
+    imports, totals = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=main_dir, check=True,
+                                capture_output=True, text=True).stdout
+        report = json.loads(output.strip().splitlines()[-1])
+        phases = report["phases_ms"]
+        imports.append(sum(ms for name, ms in phases.items() if name.startswith("import ")))
+        totals.append(report["total_ms"])
+    return {"imports": float(np.median(imports)), "first_paint": float(np.median(totals))}
+
+
+def run(cases, repeats):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    results = {}
+    print("startup ...", flush=True)
+    for metric, value in bench_startup(repeats).items():
+        results[f"startup/{metric}"] = round(value, 4)
+        print(f"  {metric:<24} {value:10.3f} ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        # The gzipped series is decoded into a scratch file rather than the user's volume cache
+        cache_setting = os.environ.get("MPR_VOLUME_CACHE_MB")
+        os.environ["MPR_VOLUME_CACHE_MB"] = "0"
+        print("time_series ...", flush=True)
+        for metric, value in bench_time_series(app, tmp, repeats).items():
+            results[f"time_series/{metric}"] = round(value, 4)
+            print(f"  {metric:<24} {value:10.3f} ms")
+        if cache_setting is None:
+            del os.environ["MPR_VOLUME_CACHE_MB"]
+        else:
+            os.environ["MPR_VOLUME_CACHE_MB"] = cache_setting
+        for size, dtype in cases:
+            case = f"{size}^3_{dtype}"
+            print(f"{case} ...", flush=True)
+            volume = phantom(size, dtype)
+            metrics = bench_loading(volume, tmp, repeats)
+            metrics.update(bench_viewer(app, volume, repeats))
+            for metric, value in metrics.items():
+                results[f"{case}/{metric}"] = round(value, 4)
+                print(f"  {metric:<24} {value:10.3f} ms")
+            del volume
+    return results
+
+
+def compare(results, baseline, threshold, min_ms=0.05):
+    """
+    Metrics slower than baseline * (1 + threshold), as printable lines.
+
+    Slowdowns smaller than min_ms are ignored; sub-microsecond metrics are
+    dominated by timer noise.
+    """
+    regressions = []
+    for key, value in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous and value > previous * (1 + threshold) and value - previous >= min_ms:
+            regressions.append(f"{key}: {previous:.3f} -> {value:.3f} ms (+{(value / previous - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="standard")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--min-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    results = run(PRESETS[args.preset], args.repeats)
+    report = {
+        "meta": {
+            "preset": args.preset,
+            "repeats": args.repeats,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) past {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions past {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
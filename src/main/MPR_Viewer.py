@@ -1,22 +1,58 @@
+# Imported first so the other imports are timed; SimpleITK, pydicom, matplotlib
+# and vtk are imported by the features that use them, not at startup
+from startup import STARTUP, report_requested
 import sys
-import SimpleITK as sitk
+import time
+import os
 import numpy as np
+STARTUP.mark('import numpy')
 from PyQt5.QtWidgets import QApplication, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QWidget, QFileDialog, \
-    QSlider, QStatusBar, QGroupBox, QLabel, QComboBox
+    QSlider, QStatusBar, QGroupBox, QLabel, QComboBox, QProgressBar, QSpinBox, QCheckBox
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QCursor  # Add this import
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-import pydicom
-import os
-import vtk
-from matplotlib import cm #for providing color maps
-from vtkmodules.util import numpy_support
-import pydicom  # Reading DICOM files
+STARTUP.mark('import PyQt5')
+from viewport import SliceViewport
+from raster_viewport import RasterViewport
+from render_scheduler import RenderScheduler
+from window_level import VolumeStats, WindowLevelLUT, colormap_table, slider_adjustments
+from volume_loader import VolumeLoader, VolumeResampler
+from volume_geometry import VolumeGeometry
+from slice_store import SliceStore, DEFAULT_MEMORY_CAP
+from cine import CinePlayer
+from pyramid import VolumePyramid
+from profiler import PROFILER, traced
+from performance_hud import PerformanceHud
+from study_session import CachedStudy, StudySession, session_budget
+from slab import SLAB_MODES, SlabProjector
+from reslice import Reslicer, rotation_matrix, view_plane, voxel_rotation
+from segmentation import OVERLAY_ALPHA, OVERLAY_COLOR, RegionGrower, changed_bounds
+STARTUP.mark('import viewer modules')
+
+# Per-view render time allowed while dragging the crosshair; coarser pyramid levels are used to meet it
+DRAG_LATENCY_BUDGET = 0.015
+# Mouse-still time after which dragged views are refined to full resolution
+DRAG_IDLE_MS = 150
+# Names of the three views in traces and the performance overlay
+VIEW_NAMES = ('axial', 'coronal', 'sagittal')
+# Refresh interval of the performance overlay while instrumentation is on
+HUD_REFRESH_MS = 500
+# Default slab thickness in slices when a projection mode is picked
+DEFAULT_SLAB_THICKNESS = 20
+MAX_SLAB_THICKNESS = 200
+# Default region growing tolerance, in percent of the display window
+SEGMENTATION_TOLERANCE = 10
+# How often the timepoints decoded so far and the prefetch statistics are refreshed
+TIME_POLL_MS = 250
+COLORMAPS = ['gray', 'viridis', 'plasma', 'inferno', 'magma', 'cividis', 'jet']
+# Viewport backend: "raster" (QImage/QPainter) or "matplotlib"
+VIEWPORT_BACKEND_ENV_VAR = 'MPR_VIEWPORT_BACKEND'
+DEFAULT_VIEWPORT_BACKEND = 'raster'
 
 class MRIViewer(QWidget):
-    def __init__(self):
+    def __init__(self, viewport_backend=None):
         super().__init__()
+        self.viewport_backend = viewport_backend or os.environ.get(VIEWPORT_BACKEND_ENV_VAR,
+                                                                   DEFAULT_VIEWPORT_BACKEND)
         self.data = None
         self.slices = [0, 0, 0]
         self.marked_points = [[], [], []]
@@ -26,7 +62,45 @@ class MRIViewer(QWidget):
         self.panning = False
         self.pan_start = None
         self.current_colormap = 'gray'
+        # 256-entry RGBA tables, composed with each view's window/level table
+        # (built on first use; only gray is needed to open the window)
+        self.colormap_tables = {}
         self.cine_running = False
+        self.volume_stats = None
+        self.luts = [None, None, None]
+        self.volume_loader = None
+        self.loading_path = None
+        self.partial_volume = False
+        self.decoded_planes = 0
+        self.slice_store = None
+        self.slice_store_memory_cap = DEFAULT_MEMORY_CAP
+        self.pyramid = None
+        self.volume_renderer = None
+        # Seeded region growing from the crosshair; segmentation is the packed label mask
+        self.region_grower = None
+        self.segmentation = None
+        # Thick-slab projector per view, None for single slices
+        self.slabs = [None, None, None]
+        # Oblique MPR: rotation of the volume about its centre (None when orthogonal)
+        self.rotation = None
+        self.reslicer = None
+        # Voxel spacing and orientation, applied when drawing; resampling to cubic voxels is explicit
+        self.geometry = VolumeGeometry()
+        self.resampler = None
+        # Timepoints of a 4D series, read lazily; scan_array is the one on screen
+        self.time_series = None
+        self.time_index = 0
+        # Whether a damaged series' decoding error has been shown
+        self.time_error_reported = False
+        self.time_playing = False
+        self.time_frames = 0
+        self.time_play_started = None
+        self.dragging = False
+        self.view_levels = [0, 0, 0]
+        self.load_started = None
+        # Opened studies stay cached (with their derived data) up to a memory budget
+        self.session = StudySession(session_budget())
+        self.current_study = None
 
         self.initUI()
 
@@ -46,19 +120,46 @@ class MRIViewer(QWidget):
         
         # Load button
         self.load_button = QPushButton('Load MRI Scan', self)
-        self.load_button.clicked.connect(self.load_mri)
+        # Traced slots are connected through lambdas: the wrapper would pass clicked's checked argument on
+        self.load_button.clicked.connect(lambda: self.load_mri())
         self.control_layout.addWidget(self.load_button)
+
+        # DICOM series button
+        self.load_dicom_button = QPushButton('Load DICOM Folder', self)
+        self.load_dicom_button.clicked.connect(self.load_dicom_folder)
+        self.control_layout.addWidget(self.load_dicom_button)
+
+        # Studies opened in this session; cached ones switch instantly
+        self.control_layout.addWidget(QLabel("Studies"))
+        self.study_combo = QComboBox()
+        self.study_combo.activated.connect(self.on_study_selected)
+        self.control_layout.addWidget(self.study_combo)
+
+        # Loading progress and cancel, shown while a volume is being read
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        self.control_layout.addWidget(self.load_progress)
+        self.cancel_load_button = QPushButton("Cancel Loading", self)
+        self.cancel_load_button.clicked.connect(self.cancel_loading)
+        self.cancel_load_button.hide()
+        self.control_layout.addWidget(self.cancel_load_button)
         
         # Play/Pause button
         self.play_pause_button = QPushButton("Play/Pause", self)
         self.play_pause_button.clicked.connect(self.toggle_playback)
         self.control_layout.addWidget(self.play_pause_button)
+        self.create_cine_controls()
+        self.create_time_controls()
+        self.create_slab_controls()
+        self.create_oblique_controls()
+        self.create_geometry_controls()
 
         # Add Colormap selection dropdown
         colormap_layout = QVBoxLayout()
         colormap_layout.addWidget(QLabel("Colormap"))
         self.colormap_combo = QComboBox()
-        self.colormap_combo.addItems(['gray', 'viridis', 'plasma', 'inferno', 'magma', 'cividis', 'jet'])
+        self.colormap_combo.addItems(COLORMAPS)
         self.colormap_combo.currentTextChanged.connect(self.update_colormap)
         colormap_layout.addWidget(self.colormap_combo)
         self.control_layout.addLayout(colormap_layout)
@@ -70,12 +171,18 @@ class MRIViewer(QWidget):
         
         # Create groups for brightness and contrast controls
         self.create_adjustment_controls()
+        self.create_segmentation_controls()
+        self.create_performance_controls()
         
         # Add stretch to push controls to top
         self.control_layout.addStretch()
         
         # Status bar at bottom of control panel
         self.status_bar = QStatusBar()
+        self.frame_stats_label = QLabel()
+        self.status_bar.addPermanentWidget(self.frame_stats_label)
+        self.session_stats_label = QLabel()
+        self.status_bar.addPermanentWidget(self.session_stats_label)
         self.control_layout.addWidget(self.status_bar)
         
         # Add control panel to main layout
@@ -86,19 +193,24 @@ class MRIViewer(QWidget):
         self.viewport_layout = QVBoxLayout()
         self.viewport_panel.setLayout(self.viewport_layout)
         
-        # Initialize canvases for viewports
-        self.axial_fig, self.axial_ax = plt.subplots()
-        self.coronal_fig, self.coronal_ax = plt.subplots()
-        self.sagittal_fig, self.sagittal_ax = plt.subplots()
-
-        # Create canvas for each figure
-        self.axial_canvas = FigureCanvas(self.axial_fig)
-        self.coronal_canvas = FigureCanvas(self.coronal_fig)
-        self.sagittal_canvas = FigureCanvas(self.sagittal_fig)
+        # Persistent image and crosshair for each view, drawn by the selected backend
+        self.axial_view = self.create_viewport("Axial View")
+        self.coronal_view = self.create_viewport("Coronal View")
+        self.sagittal_view = self.create_viewport("Sagittal View")
+        self.viewports = [self.axial_view, self.coronal_view, self.sagittal_view]
+
+        # Both backends provide matplotlib-style axes limits and mouse events
+        self.axial_ax, self.axial_canvas = self.axial_view.ax, self.axial_view.canvas
+        self.coronal_ax, self.coronal_canvas = self.coronal_view.ax, self.coronal_view.canvas
+        self.sagittal_ax, self.sagittal_canvas = self.sagittal_view.ax, self.sagittal_view.canvas
+
         # Connect zoom events
         self.axial_canvas.mpl_connect('scroll_event', lambda event: self.wheel_zoom(event, 0))
         self.coronal_canvas.mpl_connect('scroll_event', lambda event: self.wheel_zoom(event, 1))
         self.sagittal_canvas.mpl_connect('scroll_event', lambda event: self.wheel_zoom(event, 2))
+        # A resized view may need its visible region rendered again at the new resolution
+        for idx, view in enumerate(self.viewports):
+            view.canvas.mpl_connect('resize_event', lambda event, idx=idx: self.refresh_view_limits(idx))
        
         # Initialize crosshair positions
         self.crosshair_x = 0
@@ -110,13 +222,22 @@ class MRIViewer(QWidget):
         self.coronal_canvas.mpl_connect('motion_notify_event', self.update_crosshairs)
         self.sagittal_canvas.mpl_connect('motion_notify_event', self.update_crosshairs)
 
-        # Initialize crosshair lines
-        self.axial_vline = self.axial_ax.axvline(0, color='r', linestyle='--')
-        self.axial_hline = self.axial_ax.axhline(0, color='r', linestyle='--')
-        self.coronal_vline = self.coronal_ax.axvline(0, color='r', linestyle='--')
-        self.coronal_hline = self.coronal_ax.axhline(0, color='r', linestyle='--')
-        self.sagittal_vline = self.sagittal_ax.axvline(0, color='r', linestyle='--')
-        self.sagittal_hline = self.sagittal_ax.axhline(0, color='r', linestyle='--')
+        # Full canvas draws are traced too; the overlays are refreshed on a timer, not per frame
+        self.performance_huds = []
+        for idx, view in enumerate(self.viewports):
+            PROFILER.instrument(view.canvas, 'draw', f"{VIEW_NAMES[idx]} canvas.draw")
+            self.performance_huds.append(PerformanceHud(view.canvas, PROFILER, VIEW_NAMES[idx], view.title))
+        self.hud_timer = QTimer()
+        self.hud_timer.timeout.connect(self.refresh_performance_hud)
+        self.set_instrumentation(PROFILER.enabled)
+
+        # All redraws go through the scheduler so one user action renders each view once
+        self.render_scheduler = RenderScheduler(self.render_view, on_flush=self.update_frame_stats)
+
+        # Refines dragged views to full resolution once the mouse rests
+        self.drag_idle_timer = QTimer()
+        self.drag_idle_timer.setSingleShot(True)
+        self.drag_idle_timer.timeout.connect(self.end_drag)
 
         # Initialize sliders for each view as horizontal
         self.axial_slider = QSlider(Qt.Horizontal)
@@ -151,10 +272,13 @@ class MRIViewer(QWidget):
         self.coronal_canvas.mpl_connect('button_press_event', self.update_crosshairs_on_click)
         self.sagittal_canvas.mpl_connect('button_press_event', self.update_crosshairs_on_click)
 
-        # Playback timer
+        # Playback timer; frames are prepared ahead by the cine player's worker thread
         self.playback_timer = QTimer()
+        self.playback_timer.setTimerType(Qt.PreciseTimer)
         self.playback_timer.timeout.connect(self.update_slices)
         self.is_playing = False
+        self.cine = CinePlayer(self.prepare_cine_frame)
+        self.cine_regions = None
 
         self.scan_array = None  # Initialize scan_array
         
@@ -162,12 +286,21 @@ class MRIViewer(QWidget):
 
         # Show Volume Rendering button
         render_button = QPushButton("Show Volume Rendering")
-        render_button.clicked.connect(self.show_volume_rendering)
+        render_button.clicked.connect(lambda: self.show_volume_rendering())
         self.control_layout.addWidget(render_button)
 
         # Set focus policy to handle key events
         self.setFocusPolicy(Qt.StrongFocus)
 
+    def create_viewport(self, title):
+        """A viewport of the selected backend; matplotlib remains available as a fallback."""
+        if self.viewport_backend == 'matplotlib':
+            import matplotlib.pyplot as plt
+            from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+            fig, ax = plt.subplots()
+            return SliceViewport(ax, FigureCanvas(fig), title)
+        return RasterViewport(title)
+
     def create_adjustment_controls(self):
         """Create brightness and contrast control groups."""
         # Initialize sliders
@@ -202,16 +335,219 @@ class MRIViewer(QWidget):
             group.setLayout(layout)
             self.control_layout.addWidget(group)
 
+    def create_cine_controls(self):
+        """Frame rate and per-view selection for cine playback."""
+        group = QGroupBox("Cine")
+        layout = QVBoxLayout()
+
+        fps_layout = QHBoxLayout()
+        fps_layout.addWidget(QLabel("Frame rate (fps)"))
+        self.cine_fps_spin = QSpinBox()
+        self.cine_fps_spin.setRange(1, 60)
+        self.cine_fps_spin.setValue(30)
+        self.cine_fps_spin.valueChanged.connect(self.update_cine_fps)
+        fps_layout.addWidget(self.cine_fps_spin)
+        layout.addLayout(fps_layout)
+
+        views_layout = QHBoxLayout()
+        self.cine_view_checks = []
+        for view in ["Axial", "Coronal", "Sagittal"]:
+            check = QCheckBox(view)
+            check.setChecked(True)
+            check.toggled.connect(self.restart_playback)
+            views_layout.addWidget(check)
+            self.cine_view_checks.append(check)
+        layout.addLayout(views_layout)
+
+        self.cine_stats_label = QLabel("")
+        layout.addWidget(self.cine_stats_label)
+
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+    def create_time_controls(self):
+        """Timepoint slider and temporal cine of a 4D series."""
+        group = QGroupBox("Time Series")
+        layout = QVBoxLayout()
+        slider_layout = QHBoxLayout()
+        self.time_slider = QSlider(Qt.Horizontal)
+        self.time_slider.setRange(0, 0)
+        self.time_slider.setEnabled(False)
+        self.time_slider.valueChanged.connect(self.show_timepoint)
+        slider_layout.addWidget(self.time_slider)
+        self.time_label = QLabel("3D")
+        slider_layout.addWidget(self.time_label)
+        layout.addLayout(slider_layout)
+        self.play_time_button = QPushButton("Play Time")
+        self.play_time_button.setEnabled(False)
+        self.play_time_button.clicked.connect(self.toggle_time_playback)
+        layout.addWidget(self.play_time_button)
+        self.time_stats_label = QLabel("")
+        layout.addWidget(self.time_stats_label)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+        # Temporal cine steps at the cine frame rate; decoding progress of compressed series is polled
+        self.time_playback_timer = QTimer()
+        self.time_playback_timer.timeout.connect(self.advance_timepoint)
+        self.time_poll_timer = QTimer()
+        self.time_poll_timer.setInterval(TIME_POLL_MS)
+        self.time_poll_timer.timeout.connect(self.update_time_range)
+
+    def create_slab_controls(self):
+        """Per-view thick-slab projection mode and thickness."""
+        group = QGroupBox("Slab Projection")
+        layout = QGridLayout()
+        self.slab_mode_combos = []
+        self.slab_thickness_spins = []
+        for idx, view in enumerate(["Axial", "Coronal", "Sagittal"]):
+            layout.addWidget(QLabel(view), idx, 0)
+            combo = QComboBox()
+            combo.addItems(('Slice',) + SLAB_MODES)
+            combo.currentTextChanged.connect(lambda _, idx=idx: self.update_slab(idx))
+            layout.addWidget(combo, idx, 1)
+            spin = QSpinBox()
+            spin.setRange(1, MAX_SLAB_THICKNESS)
+            spin.setValue(DEFAULT_SLAB_THICKNESS)
+            spin.setSuffix(" slices")
+            spin.valueChanged.connect(lambda _, idx=idx: self.update_slab(idx))
+            layout.addWidget(spin, idx, 2)
+            self.slab_mode_combos.append(combo)
+            self.slab_thickness_spins.append(spin)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+    def create_oblique_controls(self):
+        """Rotation of the MPR planes, each about one view's normal."""
+        group = QGroupBox("Oblique Planes")
+        layout = QGridLayout()
+        self.rotation_sliders = []
+        self.rotation_labels = []
+        for idx, view in enumerate(["Axial", "Coronal", "Sagittal"]):
+            layout.addWidget(QLabel(view), idx, 0)
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(-90, 90)
+            slider.valueChanged.connect(self.update_rotation)
+            layout.addWidget(slider, idx, 1)
+            label = QLabel("0\u00b0")
+            layout.addWidget(label, idx, 2)
+            self.rotation_sliders.append(slider)
+            self.rotation_labels.append(label)
+        reset_button = QPushButton("Reset Rotation")
+        reset_button.clicked.connect(self.reset_rotation)
+        layout.addWidget(reset_button, 3, 0, 1, 3)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+    def create_geometry_controls(self):
+        """Voxel spacing of the volume and the explicit resampling to cubic voxels."""
+        group = QGroupBox("Voxel Spacing")
+        layout = QVBoxLayout()
+        self.spacing_label = QLabel("No volume")
+        layout.addWidget(self.spacing_label)
+        self.resample_button = QPushButton("Resample to Isotropic")
+        self.resample_button.setToolTip("Build a copy with cubic voxels in the background; "
+                                        "views already display the native voxels to scale")
+        self.resample_button.clicked.connect(self.resample_isotropic)
+        self.resample_button.setEnabled(False)
+        layout.addWidget(self.resample_button)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+    def create_segmentation_controls(self):
+        """Region growing from the crosshair voxel, with an intensity tolerance."""
+        group = QGroupBox("Segmentation")
+        layout = QVBoxLayout()
+        grow_button = QPushButton("Grow Region from Crosshair")
+        # Traced, so connected through a lambda (see load_button)
+        grow_button.clicked.connect(lambda: self.grow_region_from_crosshair())
+        layout.addWidget(grow_button)
+
+        tolerance_layout = QHBoxLayout()
+        tolerance_layout.addWidget(QLabel("Tolerance"))
+        # Percent of the default display window, so the range suits any intensity scale
+        self.tolerance_slider = QSlider(Qt.Horizontal)
+        self.tolerance_slider.setRange(0, 100)
+        self.tolerance_slider.setValue(SEGMENTATION_TOLERANCE)
+        self.tolerance_slider.valueChanged.connect(self.on_tolerance_changed)
+        tolerance_layout.addWidget(self.tolerance_slider)
+        self.tolerance_label = QLabel(f"{SEGMENTATION_TOLERANCE}%")
+        tolerance_layout.addWidget(self.tolerance_label)
+        layout.addLayout(tolerance_layout)
+
+        clear_button = QPushButton("Clear Segmentation")
+        clear_button.clicked.connect(self.clear_segmentation)
+        layout.addWidget(clear_button)
+        self.segmentation_stats_label = QLabel("")
+        layout.addWidget(self.segmentation_stats_label)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+        # Slider moves are coalesced into one re-grow per event loop pass
+        self.regrow_timer = QTimer()
+        self.regrow_timer.setSingleShot(True)
+        self.regrow_timer.timeout.connect(self.regrow_region)
+
+    def create_performance_controls(self):
+        """Instrumentation toggle and trace export."""
+        group = QGroupBox("Performance")
+        layout = QVBoxLayout()
+        self.instrumentation_check = QCheckBox("Show latency overlay")
+        self.instrumentation_check.setChecked(PROFILER.enabled)
+        self.instrumentation_check.toggled.connect(self.set_instrumentation)
+        layout.addWidget(self.instrumentation_check)
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        layout.addWidget(export_button)
+        group.setLayout(layout)
+        self.control_layout.addWidget(group)
+
+    def set_instrumentation(self, enabled):
+        """Turn timing, latency tracking and the overlay on or off."""
+        PROFILER.set_enabled(enabled)
+        for hud in self.performance_huds:
+            hud.setVisible(enabled)
+        if enabled:
+            self.refresh_performance_hud()
+            self.hud_timer.start(HUD_REFRESH_MS)
+        else:
+            self.hud_timer.stop()
+
+    def refresh_performance_hud(self):
+        for hud in self.performance_huds:
+            hud.refresh()
+
+    def export_trace(self):
+        """Save the recorded session as a Chrome trace-event file."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Trace", "mpr_trace.json", "Trace files (*.json)")
+        if path:
+            count = PROFILER.export_chrome_trace(path)
+            self.status_bar.showMessage(f"Wrote {count} trace events to {path}")
+
     def update_brightness(self, value, idx, label):
         """Update brightness value and label."""
         label.setText(f"Brightness: {value}")
+        PROFILER.input_event((VIEW_NAMES[idx],))
+        self.rebuild_lut(idx)
         self.update_display(idx)
 
     def update_contrast(self, value, idx, label):
         """Update contrast value and label."""
         label.setText(f"Contrast: {value}%")
+        PROFILER.input_event((VIEW_NAMES[idx],))
+        self.rebuild_lut(idx)
         self.update_display(idx)
 
+    def rebuild_lut(self, idx):
+        """Recompute a view's lookup table from its brightness/contrast sliders."""
+        if self.luts[idx] is None:
+            return
+        brightness, contrast = slider_adjustments(self.brightness_sliders[idx].value(),
+                                                  self.contrast_sliders[idx].value())
+        self.luts[idx].rebuild(brightness, contrast, colormap=self.colormap_table(self.current_colormap))
+        if self.is_playing:
+            self.cine.invalidate()
+
 
     def create_viewport_group(self, title, canvas, slider):
         """Create a group box containing the viewport and horizontal slider."""
@@ -238,14 +574,7 @@ class MRIViewer(QWidget):
         """Update crosshairs based on mouse click in the viewports."""
         if event.inaxes is None or self.scan_array is None:
             return
-
-        # Preserve current view limits
-        if event.inaxes == self.axial_ax:
-            xlim, ylim = self.axial_ax.get_xlim(), self.axial_ax.get_ylim()
-        elif event.inaxes == self.coronal_ax:
-            xlim, ylim = self.coronal_ax.get_xlim(), self.coronal_ax.get_ylim()
-        elif event.inaxes == self.sagittal_ax:
-            xlim, ylim = self.sagittal_ax.get_xlim(), self.sagittal_ax.get_ylim()
+        PROFILER.input_event(VIEW_NAMES)
 
         if event.inaxes == self.axial_ax:  # Axial view clicked
             self.crosshair_x = int(event.xdata)
@@ -266,23 +595,9 @@ class MRIViewer(QWidget):
             self.coronal_slider.setValue(self.crosshair_y)
             self.axial_slider.setValue(self.crosshair_z)
 
-        # Update the slices in all views
-        self.update_all_slices()
-
-        # Restore view limits
-        if event.inaxes == self.axial_ax:
-            self.axial_ax.set_xlim(xlim)
-            self.axial_ax.set_ylim(ylim)
-            self.axial_canvas.draw_idle()
-        elif event.inaxes == self.coronal_ax:
-            self.coronal_ax.set_xlim(xlim)
-            self.coronal_ax.set_ylim(ylim)
-            self.coronal_canvas.draw_idle()
-        elif event.inaxes == self.sagittal_ax:
-            self.sagittal_ax.set_xlim(xlim)
-            self.sagittal_ax.set_ylim(ylim)
-            self.sagittal_canvas.draw_idle()
-
+        # Sliders that moved already queued their images; refresh every crosshair
+        self.render_scheduler.request_all(image=False)
+        self.show_crosshair_position()
 
     def zoom(self, event):
         # Zoom factor
@@ -326,40 +641,463 @@ class MRIViewer(QWidget):
         # Redraw the figure
         current_axis.figure.canvas.draw()
 
+    @traced('load_mri')
     def load_mri(self):
         """Load MRI data from a file."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Open MRI File", "", "NIfTI files (*.nii *.nii.gz);;All files (*)")
         if file_path:
-            self.data = sitk.GetArrayFromImage(sitk.ReadImage(file_path))
-            self.scan_array = self.data  # Ensure scan_array is also set
-            print(f"Loaded MRI data with shape: {self.data.shape}")
-            
-            # Set slider maximum values based on the scan shape
-            self.axial_slider.setMaximum(self.scan_array.shape[0] - 1)  # Axial axis
-            self.coronal_slider.setMaximum(self.scan_array.shape[1] - 1)  # Coronal axis
-            self.sagittal_slider.setMaximum(self.scan_array.shape[2] - 1)
+            self.start_loading(file_path)
+
+    def load_dicom_folder(self):
+        """Load the largest DICOM series in a folder."""
+        folder = QFileDialog.getExistingDirectory(self, "Open DICOM Folder")
+        if folder:
+            self.start_loading(folder)
+
+    def start_loading(self, file_path):
+        """Read a volume on a worker thread; slices appear as soon as they are decoded."""
+        study = self.session.get(file_path)
+        self.update_session_stats()
+        if study is not None:
+            self.show_study(study)
+            return
+        self.cancel_loading()
+
+        self.loading_path = file_path
+        self.load_started = time.perf_counter()
+        self.volume_loader = VolumeLoader(file_path, self)
+        self.volume_loader.volume_allocated.connect(self.on_volume_allocated)
+        self.volume_loader.slab_loaded.connect(self.on_slab_loaded)
+        self.volume_loader.progress.connect(self.load_progress.setValue)
+        self.volume_loader.loaded.connect(self.on_volume_loaded)
+        self.volume_loader.failed.connect(self.on_load_failed)
+        self.volume_loader.cancelled.connect(self.on_load_cancelled)
+        self.volume_loader.info.connect(self.on_load_info)
+
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_button.show()
+        self.status_bar.showMessage(f"Loading {file_path}...")
+        self.volume_loader.start()
+
+    def cancel_loading(self):
+        """Stop an in-progress load; the partially read volume is discarded."""
+        if self.volume_loader is None:
+            return
+        loader, self.volume_loader = self.volume_loader, None
+        loader.cancel()
+        loader.wait()
+        self.finish_loading()
+        if self.partial_volume:
+            self.clear_volume()
+        self.status_bar.showMessage("Loading cancelled")
+
+    def is_loading(self):
+        return self.volume_loader is not None
+
+    def finish_loading(self):
+        self.load_progress.hide()
+        self.cancel_load_button.hide()
+
+    def clear_volume(self):
+        if self.is_playing:
+            self.stop_playback()
+        self.remember_study_state()
+        self.current_study = None
+        self.set_time_series(None)
+        self.set_slice_store(None)
+        self.set_pyramid(None)
+        self.set_reslicer(None)
+        self.release_volume_rendering()
+        self.partial_volume = False
+        self.data = None
+        self.scan_array = None
+        self.volume_stats = None
+        self.luts = [None, None, None]
+        for view in self.viewports:
+            view.reset()
+            view.canvas.draw_idle()
+
+    def set_slider_ranges(self, axial_max, coronal_max, sagittal_max):
+        """Set slider ranges and positions from the crosshair without triggering redraws."""
+        for slider, maximum, value in ((self.axial_slider, axial_max, self.crosshair_z),
+                                       (self.coronal_slider, coronal_max, self.crosshair_y),
+                                       (self.sagittal_slider, sagittal_max, self.crosshair_x)):
+            slider.blockSignals(True)
+            slider.setMaximum(max(0, maximum))
+            slider.setValue(int(value))
+            slider.blockSignals(False)
+
+    def on_volume_allocated(self, volume, geometry):
+        if self.sender() is not self.volume_loader:
+            return
+        self.begin_volume(volume, geometry)
 
-            # Set initial crosshair positions
-            self.crosshair_x = self.scan_array.shape[2] // 2
-            self.crosshair_y = self.scan_array.shape[1] // 2
-            self.crosshair_z = self.scan_array.shape[0] // 2
+    def begin_volume(self, volume, geometry=None):
+        """Switch to a volume whose planes may still be arriving."""
+        self.cancel_resampling()
+        if self.is_playing:
+            self.stop_playback()
+        PROFILER.discard_input()
+        self.remember_study_state()
+        self.current_study = None
+        self.set_time_series(None)
+        self.data = volume
+        self.scan_array = self.data  # Ensure scan_array is also set
+        self.partial_volume = True
+        self.decoded_planes = 0
+        # Direct reads while planes are still arriving
+        self.set_slice_store(SliceStore(volume, memory_cap=0))
+        self.slabs = [None, None, None]
+        self.set_reslicer(None)
+        self.set_pyramid(None)
+        self.release_volume_rendering()
+        self.region_grower = None
+        self.set_segmentation(None, render=False)
+        self.volume_stats = None
+        self.luts = [None, None, None]
+
+        # Rebuild the image artists for the new volume
+        for view in self.viewports:
+            view.reset()
+        self.set_geometry(geometry or VolumeGeometry())
+        self.render_scheduler.reset_counters()
+
+        # Set initial crosshair positions
+        self.crosshair_x = self.scan_array.shape[2] // 2
+        self.crosshair_y = self.scan_array.shape[1] // 2
+        self.crosshair_z = self.scan_array.shape[0] // 2
+
+        # Coronal and sagittal slices span every plane; they stay locked until the load completes
+        self.set_slider_ranges(0, self.scan_array.shape[1] - 1, self.scan_array.shape[2] - 1)
+        for slider in (self.axial_slider, self.coronal_slider, self.sagittal_slider):
+            slider.setEnabled(False)
+
+    def on_slab_loaded(self, z_end):
+        """Planes [0, z_end) are decoded: widen the axial range and refresh the views."""
+        if self.sender() is not self.volume_loader:
+            return
+        self.decoded_planes = z_end
+        if self.volume_stats is None:
+            if z_end <= self.crosshair_z:
+                return
+            # First display: window from the planes decoded so far, refined once loading completes
+            self.set_volume_stats(self.compute_volume_stats(self.scan_array[:z_end]))
+            self.axial_slider.setEnabled(True)
+            self.update_all_slices()
+        else:
+            # The centre axial slice is final; coronal and sagittal fill in from the top
+            self.render_scheduler.request(1)
+            self.render_scheduler.request(2)
+
+        self.axial_slider.blockSignals(True)
+        self.axial_slider.setMaximum(z_end - 1)
+        self.axial_slider.blockSignals(False)
+
+    def on_volume_loaded(self, volume, time_series, shared_volume):
+        if self.sender() is not self.volume_loader:
+            if time_series is not None:
+                time_series.close()
+            if shared_volume is not None:
+                shared_volume.release()
+            return
+        self.volume_loader = None
+        self.finish_loading()
+        self.complete_volume(volume, self.loading_path, time_series=time_series, shared_volume=shared_volume)
+        if PROFILER.enabled:
+            # The read itself runs on the loader thread; this spans request to first full display
+            PROFILER.complete('load_volume', self.load_started, time.perf_counter(),
+                              args={'path': self.loading_path, 'shape': list(volume.shape)})
+
+    def set_volume(self, volume, source="", geometry=None, derived_from=None):
+        """Display an already loaded (z, y, x) volume, with its VolumeGeometry if known."""
+        self.cancel_loading()
+        self.begin_volume(volume, geometry)
+        self.complete_volume(volume, source, derived_from)
+
+    @traced('complete_volume')
+    def complete_volume(self, volume, source, derived_from=None, time_series=None, shared_volume=None):
+        """
+        Finish switching to a fully available volume (the first timepoint of
+        time_series, if given); its study holds shared_volume, if any.
+        """
+        self.data = volume
+        self.scan_array = self.data
+        self.partial_volume = False
+        self.decoded_planes = self.scan_array.shape[0]
+        print(f"Loaded MRI data with shape: {self.data.shape}")
+
+        # Volume-wide statistics and per-view lookup tables, computed once
+        self.set_volume_stats(self.compute_volume_stats(self.scan_array))
+        self.update_reslicer()
+
+        # Contiguous coronal/sagittal copies are built in the background within the memory cap
+        self.set_time_series(time_series)
+        if time_series is None and shared_volume is None and not isinstance(volume, np.memmap):
+            self.set_slice_store(SliceStore(self.scan_array, self.slice_store_memory_cap))
+            self.slice_store.start()
+
+            # Downsampled levels for crosshair dragging, built in the background
+            self.set_pyramid(VolumePyramid(self.scan_array))
+            self.pyramid.start()
+        else:
+            # Slices are read directly: copies of one timepoint would be rebuilt on every step
+            # through time, private copies of a shared volume would undo the point of sharing it,
+            # and building them from a memmap would page the whole file into private memory
+            self.set_slice_store(SliceStore(self.scan_array, memory_cap=0))
+            self.set_pyramid(None)
+        for idx in range(3):
+            self.update_slab(idx, render=False)
+
+        if source:
+            self.current_study = self.session.add(CachedStudy(source, volume, self.volume_stats, self.luts,
+                                                              self.slice_store, self.pyramid, self.geometry,
+                                                              derived_from, time_series, shared_volume))
+            self.update_study_list()
+        self.update_session_stats()
+
+        # Set slider maximum values based on the scan shape
+        self.set_slider_ranges(self.scan_array.shape[0] - 1, self.scan_array.shape[1] - 1,
+                               self.scan_array.shape[2] - 1)
+        for slider in (self.axial_slider, self.coronal_slider, self.sagittal_slider):
+            slider.setEnabled(True)
+        self.update_all_slices()
 
-            # Update sliders and displays
-            self.axial_slider.setValue(self.crosshair_z)
-            self.coronal_slider.setValue(self.crosshair_y)
-            self.sagittal_slider.setValue(self.crosshair_x)
+        # Update status bar
+        self.status_bar.showMessage(f"Loaded {source} ({self.spacing_text()})")
 
-            self.update_all_slices()
+    def show_study(self, study):
+        """Switch to a cached study; nothing is read or recomputed."""
+        self.cancel_loading()
+        self.cancel_resampling()
+        if self.is_playing:
+            self.stop_playback()
+        PROFILER.discard_input()
+        self.remember_study_state()
+        self.current_study = study
+        self.set_time_series(study.time_series)
+        self.data = study.volume
+        self.scan_array = self.data
+        self.partial_volume = False
+        self.decoded_planes = self.scan_array.shape[0]
+        self.set_slice_store(study.slice_store)
+        self.set_pyramid(study.pyramid)
+        for idx in range(3):
+            self.update_slab(idx, render=False)
+        self.release_volume_rendering()
+        self.region_grower = study.region_grower
+        self.set_segmentation(study.segmentation, render=False)
+
+        # Cached LUTs are only re-windowed to the current brightness/contrast sliders
+        self.volume_stats = study.stats
+        self.luts = study.luts
+        for idx in range(3):
+            self.rebuild_lut(idx)
+        self.update_reslicer()
+
+        for view in self.viewports:
+            view.reset()
+        self.set_geometry(study.geometry or VolumeGeometry())
+        self.render_scheduler.reset_counters()
+        self.crosshair_z, self.crosshair_y, self.crosshair_x = study.crosshair
+        self.set_slider_ranges(self.scan_array.shape[0] - 1, self.scan_array.shape[1] - 1,
+                               self.scan_array.shape[2] - 1)
+        for slider in (self.axial_slider, self.coronal_slider, self.sagittal_slider):
+            slider.setEnabled(True)
+        if study.time_series is not None and study.time_index:
+            self.time_slider.setValue(study.time_index)  # Shows that timepoint
+        self.update_all_slices()
+        self.update_study_list()
+        self.update_session_stats()
+        self.status_bar.showMessage(f"Showing {study.path} (cached)")
+
+    def remember_study_state(self):
+        """Keep the crosshair of the study being left, to restore it on return."""
+        if self.current_study is not None and self.scan_array is not None:
+            self.current_study.crosshair = (int(self.crosshair_z), int(self.crosshair_y), int(self.crosshair_x))
+            self.current_study.time_index = self.time_index
+
+    def on_study_selected(self, index):
+        path = self.study_combo.itemData(index)
+        if path is None or (self.current_study is not None and self.current_study.path == path):
+            return
+        # Evicted studies are read again in the background like a regular load
+        self.start_loading(path)
+
+    def update_study_list(self):
+        """List the session's studies, marking those that would have to be read again."""
+        self.study_combo.blockSignals(True)
+        self.study_combo.clear()
+        for path in self.session.paths:
+            name = os.path.basename(os.path.normpath(path))
+            if not self.session.is_cached(path):
+                name += " (on disk)"
+            self.study_combo.addItem(name, path)
+            self.study_combo.setItemData(self.study_combo.count() - 1, path, Qt.ToolTipRole)
+        if self.current_study is not None:
+            self.study_combo.setCurrentIndex(self.session.paths.index(self.current_study.path))
+        self.study_combo.blockSignals(False)
+
+    def update_session_stats(self):
+        # Slice stores and pyramids finish building after the study was added, so re-check the budget
+        if self.session.enforce_budget():
+            self.update_study_list()
+        self.session_stats_label.setText(self.session.summary())
+
+    def on_load_failed(self, message):
+        if self.sender() is not self.volume_loader:
+            return
+        self.volume_loader = None
+        self.finish_loading()
+        self.clear_volume()
+        print(message)
+        self.status_bar.showMessage(message)
+
+    def on_load_info(self, message):
+        if self.sender() is not self.volume_loader:
+            return
+        print(message)
+        self.status_bar.showMessage(message)
 
-            # Display initial slices in 2D views
-            self.update_axial_slice(self.axial_slider.value())
-            self.update_coronal_slice(self.coronal_slider.value())
-            self.update_sagittal_slice(self.sagittal_slider.value())
+    def on_load_cancelled(self):
+        if self.sender() is not self.volume_loader:
+            return
+        self.volume_loader = None
+        self.finish_loading()
+        self.clear_volume()
+        self.status_bar.showMessage("Loading cancelled")
+
+    def release_volume_rendering(self):
+        if self.volume_renderer is not None:
+            self.volume_renderer.release()
+
+    def set_pyramid(self, pyramid):
+        # Pyramids and slice stores of cached studies are kept for when the study is shown again
+        if self.pyramid is not None and self.pyramid is not pyramid and not self.session.holds(self.pyramid):
+            self.pyramid.close()
+        self.pyramid = pyramid
+
+    def set_time_series(self, series):
+        """Use a 4D series (or None), resetting the time slider to its first timepoint."""
+        self.stop_time_playback()
+        if self.time_series is not None and self.time_series is not series and \
+                not self.session.holds(self.time_series):
+            self.time_series.close()
+        self.time_series = series
+        self.time_index = 0
+        self.time_error_reported = False
+        self.time_slider.blockSignals(True)
+        self.time_slider.setValue(0)
+        self.time_slider.blockSignals(False)
+        self.time_slider.setEnabled(series is not None)
+        self.play_time_button.setEnabled(series is not None)
+        if series is None:
+            self.time_slider.setMaximum(0)
+            self.time_poll_timer.stop()
+            self.time_label.setText("3D")
+            self.time_stats_label.setText("")
+            return
+        series.start()
+        self.update_time_range()
+        self.time_poll_timer.start()
+
+    def update_time_range(self):
+        """Follow the decoder of a compressed series and refresh the cache statistics."""
+        series = self.time_series
+        if series is None:
+            self.time_poll_timer.stop()
+            return
+        self.time_slider.blockSignals(True)
+        self.time_slider.setMaximum(series.available - 1)
+        self.time_slider.blockSignals(False)
+        self.time_label.setText(f"{self.time_index + 1}/{series.count}")
+        if series.error is not None and not self.time_error_reported:
+            self.time_error_reported = True
+            message = f"Time series {series.error}"
+            print(message)
+            self.status_bar.showMessage(message)
+        stats = series.summary()
+        if self.time_playing and self.time_frames:
+            stats = f"{self.time_frames / (time.perf_counter() - self.time_play_started):.1f} tp/s, " + stats
+        self.time_stats_label.setText(stats)
+
+    @traced('show_timepoint')
+    def show_timepoint(self, t):
+        """Show another timepoint of the series; window, crosshair and view state carry over."""
+        if self.time_series is None or self.partial_volume:
+            return
+        PROFILER.input_event(VIEW_NAMES)
+        volume = self.time_series.timepoint(t)
+        self.time_index = t
+        self.data = volume
+        self.scan_array = volume
+        self.set_slice_store(SliceStore(volume, memory_cap=0))
+        self.update_reslicer()
+        # A region grown on another timepoint cannot be regrown here; its mask stays on screen
+        self.region_grower = None
+        for idx in range(3):
+            self.update_slab(idx, render=False)
+        if self.is_playing:
+            self.cine.invalidate()
+        self.time_label.setText(f"{t + 1}/{self.time_series.count}")
+        self.update_all_slices()
 
-            # Update status bar
-            self.status_bar.showMessage(f"Loaded {file_path}")
+    def toggle_time_playback(self):
+        if self.time_playing:
+            self.stop_time_playback()
+        elif self.time_series is not None:
+            if self.is_playing:
+                self.stop_playback()
+            self.time_playing = True
+            self.time_frames = 0
+            self.time_play_started = time.perf_counter()
+            self.play_time_button.setText("Stop Time")
+            self.time_playback_timer.start(max(1, int(1000 / self.cine_fps_spin.value())))
+
+    def stop_time_playback(self):
+        self.time_playback_timer.stop()
+        self.time_playing = False
+        self.play_time_button.setText("Play Time")
+
+    def advance_timepoint(self):
+        """Temporal cine: step to the next timepoint, wrapping at the last one decoded so far."""
+        if self.time_series is None:
+            self.stop_time_playback()
+            return
+        self.time_slider.setValue((self.time_index + 1) % self.time_series.available)
+        self.time_frames += 1
+
+    def set_slice_store(self, store):
+        if self.slice_store is not None and self.slice_store is not store and \
+                not self.session.holds(self.slice_store):
+            self.slice_store.close()
+        self.slice_store = store
+
+    def update_slab(self, idx, render=True):
+        """Create the view's slab projector for its current mode and thickness (None for single slices)."""
+        mode = self.slab_mode_combos[idx].currentText()
+        if mode == 'Slice' or self.scan_array is None or self.partial_volume:
+            self.slabs[idx] = None
+        else:
+            self.slabs[idx] = SlabProjector(self.slice_source(idx), self.scan_array.shape[idx],
+                                            mode, self.slab_thickness_spins[idx].value(), self.scan_array.dtype)
+        if render and self.volume_stats is not None:
+            if self.is_playing:
+                self.cine.invalidate()
+            self.render_scheduler.request(idx)
+
+    def compute_volume_stats(self, volume):
+        # A memory-mapped volume is only sampled so the whole file is not paged in
+        return VolumeStats(volume, exact=not isinstance(volume, np.memmap))
+
+    def set_volume_stats(self, stats):
+        self.volume_stats = stats
+        self.luts = [WindowLevelLUT(self.volume_stats) for _ in range(3)]
+        for idx in range(3):
+            self.rebuild_lut(idx)
     
     def load_dicom(self, file_path):
+        import pydicom
         dicom_data = pydicom.dcmread(file_path)
         if 'PixelData' in dicom_data:
             return dicom_data.pixel_array
@@ -368,7 +1106,10 @@ class MRIViewer(QWidget):
             return None
 
     def update_crosshairs(self, event):
+        if self.scan_array is None:
+            return
         if event.button == 1:  # Only update on left-click
+            PROFILER.input_event(VIEW_NAMES)
             if event.inaxes == self.axial_ax:
                 self.crosshair_x = event.xdata
                 self.crosshair_y = event.ydata
@@ -387,137 +1128,491 @@ class MRIViewer(QWidget):
             else:
                 return
 
-            self.update_all_slices()
+            # Render from a coarser pyramid level until the mouse rests
+            self.dragging = True
+            self.drag_idle_timer.start(DRAG_IDLE_MS)
+
+            # Coalesced with the slider updates; stale drag positions are never drawn
+            self.render_scheduler.request_all(image=False)
+            self.show_crosshair_position()
 
     def update_axial_slice(self, value):
         self.crosshair_z = value
-        if self.scan_array is not None:
-            self.show_axial_slice(self.scan_array, value)
+        PROFILER.input_event(VIEW_NAMES)
+        self.render_scheduler.request(0)
+        self.render_scheduler.request(1, image=False)
+        self.render_scheduler.request(2, image=False)
 
     def update_coronal_slice(self, value):
         self.crosshair_y = value
-        if self.scan_array is not None:
-            self.show_coronal_slice(self.scan_array, value)
+        PROFILER.input_event(VIEW_NAMES)
+        self.render_scheduler.request(1)
+        self.render_scheduler.request(0, image=False)
+        self.render_scheduler.request(2, image=False)
 
     def update_sagittal_slice(self, value):
         self.crosshair_x = value
-        if self.scan_array is not None:
-            self.show_sagittal_slice(self.scan_array, value)
+        PROFILER.input_event(VIEW_NAMES)
+        self.render_scheduler.request(2)
+        self.render_scheduler.request(0, image=False)
+        self.render_scheduler.request(1, image=False)
 
     def update_all_slices(self):
-        self.update_axial_slice(self.crosshair_z)
-        self.update_coronal_slice(self.crosshair_y)
-        self.update_sagittal_slice(self.crosshair_x)
-
-    def show_axial_slice(self, scan, slice_index):
-        self.axial_ax.clear()
-        slice_data = scan[slice_index, :, :]
-        self.display_slice(self.axial_ax, slice_data, "Axial View", 0)
-        self.axial_ax.set_xlim(self.axial_ax.get_xlim())
-        self.axial_ax.set_ylim(self.axial_ax.get_ylim())
-        self.axial_vline = self.axial_ax.axvline(self.crosshair_x, color='r', linestyle='--')
-        self.axial_hline = self.axial_ax.axhline(self.crosshair_y, color='r', linestyle='--')
-        # Add point at crosshair intersection
-        self.axial_ax.plot(self.crosshair_x, self.crosshair_y, 'ro', markersize=5)
-        self.axial_canvas.draw()
-
-    def show_coronal_slice(self, scan, slice_index):
-        if scan is None:
-            return
-        self.coronal_ax.clear()
-        slice_data = scan[:, slice_index, :]
-        slice_data_flipped = np.flipud(slice_data)
-        self.display_slice(self.coronal_ax, slice_data_flipped, "Coronal View", 1)
-        self.coronal_ax.set_xlim(self.coronal_ax.get_xlim())
-        self.coronal_ax.set_ylim(self.coronal_ax.get_ylim())
-        self.coronal_vline = self.coronal_ax.axvline(self.crosshair_x, color='r', linestyle='--')
-        self.coronal_hline = self.coronal_ax.axhline(self.scan_array.shape[0] - 1 - self.crosshair_z, color='r',
-                                                     linestyle='--')
-        # Add point at crosshair intersection
-        self.coronal_ax.plot(self.crosshair_x, self.scan_array.shape[0] - 1 - self.crosshair_z, 'ro', markersize=5)
-        self.coronal_canvas.draw()
-
-    def show_sagittal_slice(self, scan, slice_index):
-        if scan is None:
-            return
-        self.sagittal_ax.clear()
-        slice_data = scan[:, :, slice_index]
-        slice_data_flipped = np.flipud(slice_data)
-        self.display_slice(self.sagittal_ax, slice_data_flipped, "Sagittal View", 2)
-        self.sagittal_ax.set_xlim(self.sagittal_ax.get_xlim())
-        self.sagittal_ax.set_ylim(self.sagittal_ax.get_ylim())
-        self.sagittal_vline = self.sagittal_ax.axvline(self.crosshair_y, color='r', linestyle='--')
-        self.sagittal_hline = self.sagittal_ax.axhline(self.scan_array.shape[0] - 1 - self.crosshair_z, color='r',
-                                                       linestyle='--')
-        # Add point at crosshair intersection
-        self.sagittal_ax.plot(self.crosshair_y, self.scan_array.shape[0] - 1 - self.crosshair_z, 'ro', markersize=5)
-        self.sagittal_canvas.draw()
-
-    def display_slice(self, ax, slice_data, title, idx):
+        self.render_scheduler.request_all()
+
+    @traced('render_view')
+    def render_view(self, idx, image=True):
+        """Render one viewport; called by the render scheduler once per flush."""
+        if self.scan_array is None or self.volume_stats is None:
+            return
+        view = self.viewports[idx]
+        if image or view.image is None:
+            # Slabs and oblique planes are built at full resolution; pyramid levels only serve orthogonal slices
+            level = self.interaction_level() if self.slabs[idx] is None and self.rotation is None else 0
+            start = time.perf_counter()
+            if idx == 0:
+                self.show_axial_slice(self.axial_slider.value(), level)
+            elif idx == 1:
+                self.show_coronal_slice(self.coronal_slider.value(), level)
+            elif idx == 2:
+                self.show_sagittal_slice(self.sagittal_slider.value(), level)
+            self.view_levels[idx] = level
+            if self.pyramid is not None:
+                self.pyramid.record(level, time.perf_counter() - start)
+        else:
+            view.set_crosshair(*self.crosshair_position(idx))
+            view.blit()
+        PROFILER.frame_presented(VIEW_NAMES[idx], idx)
+
+    def interaction_level(self):
+        """Pyramid level to render from: full resolution unless the crosshair is being dragged."""
+        if not self.dragging or self.pyramid is None:
+            return 0
+        return self.pyramid.pick_level(DRAG_LATENCY_BUDGET)
+
+    def end_drag(self):
+        """Mouse went idle: re-render views that were shown at a coarse level."""
+        self.dragging = False
+        for idx, level in enumerate(self.view_levels):
+            if level > 0:
+                self.render_scheduler.request(idx)
+
+    def get_slice(self, idx, slice_index, level=0):
+        """Display-oriented slice of a view, from the full volume, a pyramid level or a slab projector."""
+        slab = self.slabs[idx]
+        if slab is not None:
+            return slab.slab(slice_index)
+        if self.rotation is not None:
+            return self.oblique_slice(idx, slice_index)
+        if level > 0:
+            return self.pyramid.slice(level, idx, slice_index)
+        return self.slice_store.slice(idx, slice_index)
+
+    def slice_source(self, idx):
+        """Full-resolution slice reader of a view for the current volume and orientation."""
+        if self.rotation is None:
+            store = self.slice_store
+            return lambda index: store.slice(idx, index)
+        rotation = self.rotation
+        return lambda index: self.oblique_slice(idx, index, rotation)
+
+    def oblique_slice(self, idx, slice_index, rotation=None):
+        """A view's slice through the rotated volume, resampled with trilinear interpolation."""
+        # Read once: the GUI thread may replace it while the cine worker samples
+        reslicer = self.reslicer
+        rotation = self.rotation if rotation is None else rotation
+        origin, row_step, col_step = view_plane(idx, slice_index, rotation, reslicer.shape,
+                                                self.geometry.spacing)
+        return reslicer.plane(origin, row_step, col_step, self.view_shape(idx))
+
+    def update_reslicer(self):
+        """
+        Create the Reslicer of the current volume while it is shown rotated, or
+        drop it. Only called on the GUI thread, so slice readers on other
+        threads never create or close one.
+        """
+        if self.rotation is None or self.scan_array is None or self.volume_stats is None:
+            self.set_reslicer(None)
+        elif self.reslicer is None or self.reslicer.volume is not self.scan_array:
+            self.set_reslicer(Reslicer(self.scan_array, fill=self.volume_stats.min))
+
+    def set_reslicer(self, reslicer):
+        if self.reslicer is not None and self.reslicer is not reslicer:
+            self.reslicer.close()
+        self.reslicer = reslicer
+
+    def crosshair_voxel(self):
+        """Crosshair as (z, y, x) coordinates of the volume itself, undoing any rotation."""
+        point = np.array([self.crosshair_z, self.crosshair_y, self.crosshair_x], np.float64)
+        if self.rotation is None:
+            return point
+        center = (np.asarray(self.scan_array.shape, np.float64) - 1) / 2
+        return center + voxel_rotation(self.rotation, self.geometry.spacing) @ (point - center)
+
+    def update_rotation(self):
+        """Apply the rotation sliders, keeping the crosshair on the same voxel."""
+        angles = [slider.value() for slider in self.rotation_sliders]
+        for label, angle in zip(self.rotation_labels, angles):
+            label.setText(f"{angle}\u00b0")
+        point = self.crosshair_voxel() if self.scan_array is not None else None
+        if any(angles):
+            self.rotation = rotation_matrix(0, angles[0]) @ rotation_matrix(1, angles[1]) @ \
+                rotation_matrix(2, angles[2])
+        else:
+            self.rotation = None
+        self.update_reslicer()
+        if self.scan_array is None or self.volume_stats is None:
+            return
+
+        # Crosshair coordinates are in the rotated frame the views show
+        shape = np.asarray(self.scan_array.shape)
+        center = (shape - 1) / 2.0
+        rotation = self.rotation if self.rotation is not None else np.eye(3)
+        inverse = voxel_rotation(rotation.T, self.geometry.spacing)
+        z, y, x = np.clip(np.rint(center + inverse @ (point - center)), 0, shape - 1).astype(int)
+        self.crosshair_z, self.crosshair_y, self.crosshair_x = z, y, x
+        for slider, value in zip((self.axial_slider, self.coronal_slider, self.sagittal_slider), (z, y, x)):
+            slider.blockSignals(True)
+            slider.setValue(int(value))
+            slider.blockSignals(False)
+
+        for idx in range(3):
+            self.update_slab(idx, render=False)
+        if self.is_playing:
+            self.cine.invalidate()
+        self.update_all_slices()
+
+    def reset_rotation(self):
+        for slider in self.rotation_sliders:
+            slider.blockSignals(True)
+            slider.setValue(0)
+            slider.blockSignals(False)
+        self.update_rotation()
+
+    def set_geometry(self, geometry):
+        """Use a volume's spacing: views draw voxels to scale and oblique planes rotate in mm."""
+        self.geometry = geometry
+        for idx, view in enumerate(self.viewports):
+            view.set_aspect(geometry.aspect(idx))
+        self.spacing_label.setText(self.spacing_text())
+        self.resample_button.setEnabled(not geometry.isotropic)
+
+    def spacing_text(self):
+        sz, sy, sx = self.geometry.spacing
+        return f"Voxels {sx:.3g} x {sy:.3g} x {sz:.3g} mm"
+
+    def show_crosshair_position(self):
+        """Report the crosshair voxel and its patient position in mm."""
+        point = self.crosshair_voxel()
+        position = self.geometry.to_physical(point)
+        z, y, x = np.rint(point).astype(int)
+        self.status_bar.showMessage(f"Voxel ({x}, {y}, {z}) at "
+                                    f"({position[0]:.1f}, {position[1]:.1f}, {position[2]:.1f}) mm")
+
+    def resample_isotropic(self):
+        """Resample the current volume to cubic voxels in the background, as a new study."""
+        if self.scan_array is None or self.partial_volume or self.resampler is not None:
+            return
+        size = min(self.geometry.spacing)
+        source = self.current_study.path if self.current_study is not None else "volume"
+        timepoint = f" t{self.time_index + 1}" if self.time_series is not None else ""
+        path = f"{source}{timepoint} [isotropic {size:.3g} mm]"
+        cached = self.session.get(path)
+        if cached is not None:
+            self.show_study(cached)
+            return
+        self.resampler = VolumeResampler(self.scan_array, self.geometry, self)
+        self.resampler.progress.connect(lambda percent: self.resample_button.setText(f"Resampling... {percent}%"))
+        self.resampler.resampled.connect(lambda volume, geometry: self.on_resampled(volume, geometry, path, source))
+        self.resampler.failed.connect(self.on_resample_failed)
+        self.resampler.cancelled.connect(self.on_resample_failed)
+        shape = self.geometry.isotropic_shape(self.scan_array.shape)
+        self.status_bar.showMessage(f"Resampling to {shape[2]} x {shape[1]} x {shape[0]} voxels of {size:.3g} mm...")
+        self.resampler.start()
+
+    def on_resampled(self, volume, geometry, path, source):
+        if self.sender() is not self.resampler:
+            return
+        self.resampler = None
+        self.resample_button.setText("Resample to Isotropic")
+        # Shown and cached like any other study, so switching back and forth is instant
+        self.set_volume(volume, path, geometry, derived_from=source)
+
+    def on_resample_failed(self, message=""):
+        if self.sender() is not self.resampler:
+            return
+        self.resampler = None
+        self.resample_button.setText("Resample to Isotropic")
+        self.status_bar.showMessage(message or "Resampling cancelled")
+
+    def cancel_resampling(self):
+        if self.resampler is None:
+            return
+        resampler, self.resampler = self.resampler, None
+        resampler.cancel()
+        resampler.wait()
+        self.resample_button.setText("Resample to Isotropic")
+
+    def view_shape(self, idx):
+        """Full-resolution (rows, cols) of a view's slices."""
+        nz, ny, nx = self.scan_array.shape
+        return ((ny, nx), (nz, nx), (nz, ny))[idx]
+
+    def crosshair_position(self, idx):
+        """Crosshair intersection in the display coordinates of a view."""
+        flipped_z = self.scan_array.shape[0] - 1 - self.crosshair_z
+        if idx == 0:
+            return self.crosshair_x, self.crosshair_y
+        elif idx == 1:
+            return self.crosshair_x, flipped_z
+        return self.crosshair_y, flipped_z
+
+    def update_frame_stats(self):
+        self.frame_stats_label.setText(self.render_scheduler.summary())
+        self.update_session_stats()
+
+    @traced('show_axial_slice')
+    def show_axial_slice(self, slice_index, level=0):
+        slice_data = self.get_slice(0, slice_index, level)
+        self.display_slice(self.axial_view, slice_data, 0, slice_index, level)
+        self.axial_view.set_crosshair(*self.crosshair_position(0))
+        self.axial_view.blit()
+
+    @traced('show_coronal_slice')
+    def show_coronal_slice(self, slice_index, level=0):
+        # Already flipped so superior is at the top
+        slice_data_flipped = self.get_slice(1, slice_index, level)
+        self.display_slice(self.coronal_view, slice_data_flipped, 1, slice_index, level)
+        self.coronal_view.set_crosshair(*self.crosshair_position(1))
+        self.coronal_view.blit()
+
+    @traced('show_sagittal_slice')
+    def show_sagittal_slice(self, slice_index, level=0):
+        slice_data_flipped = self.get_slice(2, slice_index, level)
+        self.display_slice(self.sagittal_view, slice_data_flipped, 2, slice_index, level)
+        self.sagittal_view.set_crosshair(*self.crosshair_position(2))
+        self.sagittal_view.blit()
+
+    def adjust_slice(self, slice_data, idx, out=None):
+        """Apply the view's brightness, contrast and colormap, giving RGBA pixels."""
+        # A single lookup from native voxel values; no per-slice normalization
+        return self.luts[idx].apply_rgba(slice_data, out=out)
+
+    @traced('display_slice')
+    def display_slice(self, view, slice_data, idx, slice_index=None, level=0):
         """Display slice data with remapped brightness and contrast adjustments."""
         if slice_data is None:
             return
 
-        # Normalize the data to 0-1 range
-        normalized_data = (slice_data - np.min(slice_data)) / (np.max(slice_data) - np.min(slice_data))
-        
-        # Get brightness and contrast values
-        brightness = self.brightness_sliders[idx].value() / 150.0  # Normalize to [-1, 1]
-        contrast = self.contrast_sliders[idx].value() / 100.0  # Convert percentage to multiplier
-        
-        # Apply contrast first
-        contrasted = np.clip((normalized_data - 0.5) * contrast + 0.5, 0, 1)
-        
-        # Then apply brightness
-        adjusted = np.clip(contrasted + brightness, 0, 1)
-        
-        # Convert to 0-255 range for display
-        display_data = (adjusted * 255).astype(np.uint8)
-        
-        # Show adjusted image with the selected colormap
-        ax.imshow(display_data, cmap=self.current_colormap)
-        ax.set_title(title)
-        ax.axis('on')
+        # Only the visible part (plus a margin) is mapped, decimated to about screen resolution
+        view_shape = self.view_shape(idx)
+        (rows, cols), extent, steps = view.display_region(view_shape, slice_data.shape)
+        region = slice_data[rows, cols]
+        # Built in the viewport's reusable buffer and swapped into the persistent image
+        pixels = self.adjust_slice(region, idx, view.pixel_buffer(*region.shape))
+        if slice_index is not None:
+            self.overlay_segmentation(pixels, region, idx, slice_index, (rows, cols), 1 << level)
+        view.set_image(pixels, view_shape, extent, slice_data.shape, steps)
+
+    def overlay_segmentation(self, pixels, slice_data, idx, slice_index, region, step=1):
+        """
+        Tint the segmented voxels of a rendered slice region; safe on the cine worker thread.
+
+        slice_data is the (cropped) slice the pixels were mapped from and region
+        the crop, applied to the full mask slice (subsampled by step for a pyramid level).
+        """
+        segmentation = self.segmentation
+        # The label mask is drawn on orthogonal slices only
+        if segmentation is not None and self.rotation is None:
+            rows, cols = region
+            mask = segmentation.view_slice(idx, slice_index, step)[rows, cols]
+            if mask.any():
+                self.luts[idx].apply_overlay(slice_data, mask, pixels, OVERLAY_COLOR, OVERLAY_ALPHA)
+        return pixels
+
+    def refresh_view_limits(self, idx):
+        """Repaint a view after a zoom, pan or resize; render again only if the frame no longer covers it."""
+        view = self.viewports[idx]
+        if self.scan_array is None or view.covers_view():
+            view.canvas.draw_idle()
+            return
+        if self.is_playing:
+            self.update_cine_regions()
+            self.cine.invalidate()
+        self.render_scheduler.request(idx)
+
+    def update_cine_regions(self):
+        """Snapshot each view's display region for the cine worker, which must not query widgets."""
+        self.cine_regions = [view.display_region(self.view_shape(idx), self.view_shape(idx))
+                             for idx, view in enumerate(self.viewports)]
 
     def update_display(self, idx):
         """Update display of the selected view."""
-        if idx == 0:
-            self.update_axial_slice(self.axial_slider.value())
-        elif idx == 1:
-            self.update_coronal_slice(self.coronal_slider.value())
-        elif idx == 2:
-            self.update_sagittal_slice(self.sagittal_slider.value())
+        self.render_scheduler.request(idx)
+
+    def colormap_table(self, name):
+        """256-entry RGBA table of a colormap, built on first use."""
+        if name not in self.colormap_tables:
+            self.colormap_tables[name] = colormap_table(name)
+        return self.colormap_tables[name]
 
     def update_colormap(self, colormap_name):
+        """Switch colormap: one table rebuild per view, then a redraw of the current slices."""
         self.current_colormap = colormap_name
+        for lut in self.luts:
+            if lut is not None:
+                lut.set_colormap(self.colormap_table(colormap_name))
+        if self.is_playing:
+            self.cine.invalidate()
+        PROFILER.input_event(VIEW_NAMES)
         self.update_all_slices()
 
+    def segmentation_tolerance(self):
+        """Tolerance in intensity units, from the slider's percent of the display window."""
+        window = float(self.volume_stats.high - self.volume_stats.low)
+        return self.tolerance_slider.value() / 100.0 * window
+
+    @traced('grow_region')
+    def grow_region_from_crosshair(self):
+        """Start a new region at the crosshair voxel."""
+        if self.scan_array is None or self.volume_stats is None or self.is_loading():
+            return
+        seed = self.crosshair_voxel()
+        self.region_grower = RegionGrower(self.scan_array, seed)
+        self.set_segmentation(self.region_grower.grow(self.segmentation_tolerance()))
+
+    def on_tolerance_changed(self, value):
+        self.tolerance_label.setText(f"{value}%")
+        if self.region_grower is not None:
+            self.regrow_timer.start(0)
+
+    @traced('regrow_region')
+    def regrow_region(self):
+        """Re-grow the current region at the new tolerance, starting from the nearest earlier result."""
+        if self.region_grower is not None and self.volume_stats is not None:
+            self.set_segmentation(self.region_grower.grow(self.segmentation_tolerance()))
+
+    def set_segmentation(self, mask, render=True):
+        """Show a new label mask; only views whose current slice changed are redrawn."""
+        changed = changed_bounds(self.segmentation, mask)
+        self.segmentation = mask
+        if self.current_study is not None:
+            # Kept with the study (and counted against the session budget)
+            self.current_study.region_grower = self.region_grower
+            self.current_study.segmentation = mask
+        self.update_segmentation_stats()
+        if not render or changed is None:
+            return
+        if self.is_playing:
+            self.cine.invalidate()
+        sliders = (self.axial_slider, self.coronal_slider, self.sagittal_slider)
+        for idx, (start, stop) in enumerate(changed):
+            if start <= sliders[idx].value() < stop:
+                self.render_scheduler.request(idx)
+
+    def clear_segmentation(self):
+        self.region_grower = None
+        self.set_segmentation(None)
+
+    def update_segmentation_stats(self):
+        grower = self.region_grower
+        if self.segmentation is None or grower is None:
+            self.segmentation_stats_label.setText("")
+            return
+        self.segmentation_stats_label.setText(
+            f"{self.segmentation.count():,} voxels from seed {grower.seed[::-1]} "
+            f"(value {grower.seed_value:g})\n"
+            f"{grower.last_seconds * 1000:.0f} ms, {grower.last_sweeps} sweeps, "
+            f"{grower.nbytes / (1 << 20):.1f} MB of masks")
+
     def toggle_playback(self):
         """Toggle playback of the slices."""
         if self.is_playing:
-            self.playback_timer.stop()
-            self.play_pause_button.setText("Play")
-        else:
-            self.playback_timer.start(30)  # Update every 100ms
+            self.stop_playback()
+        elif self.start_playback():
             self.play_pause_button.setText("Pause")
-        self.is_playing = not self.is_playing
 
+    def start_playback(self):
+        if self.scan_array is None or self.volume_stats is None or self.is_loading():
+            return False
+        self.stop_time_playback()
+        sliders = (self.axial_slider, self.coronal_slider, self.sagittal_slider)
+        slice_counts = {idx: self.scan_array.shape[idx]
+                        for idx, check in enumerate(self.cine_view_checks) if check.isChecked()}
+        start_indices = {idx: sliders[idx].value() for idx in slice_counts}
+        fps = self.cine_fps_spin.value()
+        self.update_cine_regions()
+        self.cine.start(slice_counts, start_indices, fps)
+        # Tick at twice the frame rate so frame boundaries are not missed by timer jitter
+        self.playback_timer.start(max(1, int(500 / fps)))
+        self.is_playing = True
+        return True
+
+    def stop_playback(self):
+        self.playback_timer.stop()
+        self.cine.stop()
+        self.play_pause_button.setText("Play")
+        self.is_playing = False
+
+    def restart_playback(self):
+        """Apply a changed view selection to a running cine."""
+        if self.is_playing:
+            self.start_playback()
+
+    def update_cine_fps(self, fps):
+        self.cine.set_fps(fps)
+        if self.is_playing:
+            self.playback_timer.start(max(1, int(500 / fps)))
+
+    def prepare_cine_frame(self, idx, slice_index):
+        """Display-ready frame for a view; runs on the cine worker thread."""
+        region = self.cine_regions[idx]
+        (rows, cols), extent, steps = region
+        slice_data = self.get_slice(idx, slice_index)[rows, cols]
+        pixels = self.adjust_slice(slice_data, idx)
+        return self.overlay_segmentation(pixels, slice_data, idx, slice_index, (rows, cols)), region
+
+    @traced('update_slices')
     def update_slices(self):
         """Update the slices during playback."""
         if not self.is_playing:
             return
+        if self.cine.error is not None:
+            message = f"Cine playback stopped: {self.cine.error}"
+            self.stop_playback()
+            print(message)
+            self.status_bar.showMessage(message)
+            return
 
-        # Increment sliders and check if max value is reached
-        current_axial_value = self.axial_slider.value()
-        if current_axial_value < self.axial_slider.maximum():
-            self.axial_slider.setValue(current_axial_value + 1)
-            self.coronal_slider.setValue(self.coronal_slider.value() + 1)
-            self.sagittal_slider.setValue(self.sagittal_slider.value() + 1)
-        else:
-            # Reset to first slice if max is reached
-            self.axial_slider.setValue(0)
-            self.coronal_slider.setValue(0)
-            self.sagittal_slider.setValue(0)
+        frames = self.cine.next_frames()
+        if not frames:
+            return
+
+        # Move sliders and crosshair without triggering the regular render path
+        sliders = (self.axial_slider, self.coronal_slider, self.sagittal_slider)
+        for idx, (slice_index, _) in frames.items():
+            sliders[idx].blockSignals(True)
+            sliders[idx].setValue(slice_index)
+            sliders[idx].blockSignals(False)
+            if idx == 0:
+                self.crosshair_z = slice_index
+            elif idx == 1:
+                self.crosshair_y = slice_index
+            else:
+                self.crosshair_x = slice_index
+
+        for idx, view in enumerate(self.viewports):
+            if idx in frames:
+                pixels, (_, extent, steps) = frames[idx][1]
+                view_shape = self.view_shape(idx)
+                view.set_image(pixels, view_shape, extent, view_shape, steps)
+            view.set_crosshair(*self.crosshair_position(idx))
+            view.blit()
+            PROFILER.frame_presented(VIEW_NAMES[idx], idx)
+
+        if self.cine.shown % 10 == 0:
+            self.cine_stats_label.setText(f"{self.cine.achieved_fps():.1f} fps, "
+                                          f"{self.cine.dropped} dropped, {self.cine.misses} late")
 
     def reset_view(self):
         """Reset all controls to their default values."""
@@ -539,7 +1634,7 @@ class MRIViewer(QWidget):
             for contrast_slider in self.contrast_sliders:
                 contrast_slider.setValue(100)  # Reset to default contrast (100%)
             
-            self.current_colormap = 'gray'  # Reset to default colormap
+            self.colormap_combo.setCurrentText('gray')  # Reset to default colormap
 
             # Update all views
             self.update_all_slices()
@@ -600,72 +1695,28 @@ class MRIViewer(QWidget):
         ax.set_xlim(new_x_min, new_x_max)
         ax.set_ylim(new_y_min, new_y_max)
 
-        if view_index == 0:  # Axial view
-            self.axial_vline.set_xdata([self.crosshair_x, self.crosshair_x])
-            self.axial_hline.set_ydata([self.crosshair_y, self.crosshair_y])
-            self.axial_canvas.draw_idle()
-        elif view_index == 1:  # Coronal view
-            self.coronal_vline.set_xdata([self.crosshair_x, self.crosshair_x])
-            self.coronal_hline.set_ydata([self.scan_array.shape[0] - 1 - self.crosshair_z,
-                                          self.scan_array.shape[0] - 1 - self.crosshair_z])
-            self.coronal_canvas.draw_idle()
-        elif view_index == 2:  # Sagittal view
-            self.sagittal_vline.set_xdata([self.crosshair_y, self.crosshair_y])
-            self.sagittal_hline.set_ydata([self.scan_array.shape[0] - 1 - self.crosshair_z,
-                                           self.scan_array.shape[0] - 1 - self.crosshair_z])
-            self.sagittal_canvas.draw_idle()
+        # Crosshair artists persist, so only the limits need a redraw
+        self.refresh_view_limits(view_index)
     
 
+    @traced('show_volume_rendering')
     def show_volume_rendering(self):
         """Show volume rendering of the MRI scan."""
         if self.data is None:
             print("No data loaded!")
             return
+        if self.is_loading():
+            self.status_bar.showMessage("Volume is still loading")
+            return
 
-        # Create a VTK image data object
-        image_data = vtk.vtkImageData()
-        image_data.SetDimensions(self.data.shape[2], self.data.shape[1], self.data.shape[0])
-
-        # Convert the NumPy array to VTK format
-        vtk_data_array = numpy_support.numpy_to_vtk(self.data.ravel(), deep=True, array_type=vtk.VTK_FLOAT)
-        image_data.GetPointData().SetScalars(vtk_data_array)
-
-        # Set up volume rendering pipeline
-        volume_mapper = vtk.vtkGPUVolumeRayCastMapper()
-        volume_mapper.SetInputData(image_data)
-
-        volume_property = vtk.vtkVolumeProperty()
-        volume_property.ShadeOn()
-        volume_property.SetInterpolationTypeToLinear()
-
-        # Set color and opacity functions
-        color_function = vtk.vtkColorTransferFunction()
-        color_function.AddRGBPoint(np.min(self.data), 0.0, 0.0, 0.0)
-        color_function.AddRGBPoint(np.max(self.data), 1.0, 1.0, 1.0)
-        volume_property.SetColor(color_function)
-
-        opacity_function = vtk.vtkPiecewiseFunction()
-        opacity_function.AddPoint(np.min(self.data), 0.0)
-        opacity_function.AddPoint(np.max(self.data), 1.0)
-        volume_property.SetScalarOpacity(opacity_function)
-
-        volume = vtk.vtkVolume()
-        volume.SetMapper(volume_mapper)
-        volume.SetProperty(volume_property)
-
-        # Renderer and window
-        renderer = vtk.vtkRenderer()
-        renderer.AddVolume(volume)
-        renderer.SetBackground(0, 0, 0)
-
-        render_window = vtk.vtkRenderWindow()
-        render_window.AddRenderer(renderer)
-
-        render_interactor = vtk.vtkRenderWindowInteractor()
-        render_interactor.SetRenderWindow(render_window)
-
-        render_window.Render()
-        render_interactor.Start()
+        # The rendering window and its VTK pipeline are created once and reused
+        if self.volume_renderer is None:
+            # vtk is only imported the first time a rendering is requested
+            from volume_rendering import VolumeRenderingWindow
+            self.volume_renderer = VolumeRenderingWindow()
+        self.volume_renderer.set_volume(self.data, float(self.volume_stats.min), float(self.volume_stats.max),
+                                        self.pyramid, self.geometry.spacing[::-1])
+        self.status_bar.showMessage(f"Volume rendering: {self.volume_renderer.mapper_name}")
 
     def keyPressEvent(self, event):
         """Handle key press events for panning."""
@@ -699,11 +1750,21 @@ class MRIViewer(QWidget):
         new_ylim = (ylim[0] + dy, ylim[1] + dy)
         ax.set_xlim(new_xlim)
         ax.set_ylim(new_ylim)
-        ax.figure.canvas.draw_idle()
+        self.refresh_view_limits([view.ax for view in self.viewports].index(ax))
+
+def show_startup_report(timer):
+    if report_requested():
+        print(timer.report(), file=sys.stderr)
+    if PROFILER.enabled:
+        timer.export_to(PROFILER)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    STARTUP.mark('create QApplication')
     viewer = MRIViewer()
+    STARTUP.mark('create main window')
+    STARTUP.watch_first_paint(viewer, show_startup_report)
     viewer.show()
     sys.exit(app.exec_())
 
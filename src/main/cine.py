@@ -0,0 +1,182 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+# Display-ready frames kept ahead of playback, per viewport
+DEFAULT_BUFFER_FRAMES = 8
+
+
+class FrameRing:
+    """Bounded queue of upcoming (slice_index, frame) pairs for one viewport."""
+
+    def __init__(self, slice_count, start_index, capacity):
+        self.slice_count = slice_count
+        self.start_index = start_index
+        self.capacity = capacity
+        self.frames = deque()
+        self.next_index = (start_index + 1) % slice_count
+        self.last_shown = start_index
+
+    def behind(self, index, target):
+        """True when index comes before target in playback order (with wrap-around)."""
+        distance = (target - index) % self.slice_count
+        return 0 < distance < self.slice_count // 2 + 1
+
+    def resync(self, target):
+        self.frames.clear()
+        self.next_index = (target + 1) % self.slice_count
+
+
+class CinePlayer:
+    """
+    Cine playback with background frame preparation.
+
+    A worker thread keeps a ring of display-ready frames ahead of the playback
+    position for every playing viewport. Playback position follows the wall
+    clock (start + elapsed * fps), so when presenting falls behind, frames are
+    skipped rather than queued; skipped frames are counted as dropped.
+
+    prepare(view, slice_index) builds a frame and must be thread-safe; it is
+    also called on the GUI thread when the ring does not hold the frame due.
+    If it raises on the worker, the worker stops and keeps the exception in
+    error, and next_frames() returns nothing; the owner is expected to check
+    error and stop playback.
+    """
+
+    def __init__(self, prepare, buffer_frames=DEFAULT_BUFFER_FRAMES):
+        self.prepare = prepare
+        self.buffer_frames = buffer_frames
+        self.fps = 30
+        self.rings = {}
+        self.generation = 0
+        self.condition = threading.Condition()
+        self.worker = None
+        self.running = False
+        self.error = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.shown = 0
+        self.dropped = 0
+        self.misses = 0
+        self.present_times = deque(maxlen=120)
+
+    def start(self, slice_counts, start_indices, fps):
+        """Start playing the views in slice_counts ({view: number of slices})."""
+        self.stop()
+        self.fps = fps
+        self.reset_stats()
+        with self.condition:
+            self.generation += 1
+            self.rings = {view: FrameRing(count, start_indices[view], self.buffer_frames)
+                          for view, count in slice_counts.items() if count > 0}
+        self.clock_start = time.perf_counter()
+        self.error = None
+        self.running = True
+        self.worker = threading.Thread(target=self._fill, daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.generation += 1
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def set_fps(self, fps):
+        """Change speed without jumping: restart the clock from the current positions."""
+        if not self.running:
+            self.fps = fps
+            return
+        with self.condition:
+            for ring in self.rings.values():
+                ring.start_index = ring.last_shown
+                ring.resync(ring.last_shown)
+            self.fps = fps
+            self.clock_start = time.perf_counter()
+            self.generation += 1
+            self.condition.notify_all()
+
+    def invalidate(self):
+        """Drop prepared frames, e.g. after a window/level change."""
+        with self.condition:
+            self.generation += 1
+            for ring in self.rings.values():
+                ring.resync(ring.last_shown)
+            self.condition.notify_all()
+
+    def _fill(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    pending = [(view, ring) for view, ring in self.rings.items()
+                               if len(ring.frames) < ring.capacity]
+                    if pending:
+                        break
+                    self.condition.wait()
+                if not self.running:
+                    return
+                view, ring = min(pending, key=lambda item: len(item[1].frames))
+                index, generation = ring.next_index, self.generation
+                ring.next_index = (index + 1) % ring.slice_count
+
+            try:
+                frame = self.prepare(view, index)
+            except Exception as exc:
+                with self.condition:
+                    if generation != self.generation:
+                        continue  # Prepared for a state that has since changed; the frame was not wanted
+                    traceback.print_exc()
+                    self.error = exc
+                    self.running = False
+                    self.condition.notify_all()
+                return
+
+            with self.condition:
+                if generation == self.generation and ring is self.rings.get(view):
+                    ring.frames.append((index, frame))
+
+    def next_frames(self):
+        """
+        Frames due now, as {view: (slice_index, frame)}.
+
+        Views whose position has not advanced since the last call are left out.
+        """
+        if self.error is not None:
+            return {}
+        elapsed_frames = int((time.perf_counter() - self.clock_start) * self.fps)
+        due = {}
+        with self.condition:
+            for view, ring in self.rings.items():
+                target = (ring.start_index + elapsed_frames) % ring.slice_count
+                if target == ring.last_shown:
+                    continue
+                while ring.frames and ring.behind(ring.frames[0][0], target):
+                    ring.frames.popleft()
+                if ring.frames and ring.frames[0][0] == target:
+                    due[view] = (target, ring.frames.popleft()[1])
+                else:
+                    ring.resync(target)
+                    due[view] = (target, None)
+                self.dropped += (target - ring.last_shown) % ring.slice_count - 1
+                ring.last_shown = target
+            self.condition.notify_all()
+
+        for view, (target, frame) in due.items():
+            if frame is None:
+                self.misses += 1
+                due[view] = (target, self.prepare(view, target))
+        if due:
+            self.shown += 1
+            self.present_times.append(time.perf_counter())
+        return due
+
+    def achieved_fps(self):
+        """Presented frames per second over the recent window."""
+        if len(self.present_times) < 2:
+            return 0.0
+        span = self.present_times[-1] - self.present_times[0]
+        return (len(self.present_times) - 1) / span if span > 0 else 0.0
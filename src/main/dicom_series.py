@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pydicom
+from pydicom.errors import InvalidDicomError
+
+# Where folder header indexes are kept between sessions
+INDEX_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mpr_viewer', 'dicom_index')
+INDEX_VERSION = 1
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 4) * 2)
+
+HEADER_TAGS = ['SeriesInstanceUID', 'SeriesDescription', 'InstanceNumber', 'ImagePositionPatient',
+               'ImageOrientationPatient', 'PixelSpacing', 'SliceThickness', 'Rows', 'Columns',
+               'BitsStored', 'PixelRepresentation', 'RescaleSlope', 'RescaleIntercept']
+
+
+def read_header(file_path):
+    """The tags needed to group and sort a slice, or None if the file is not an image."""
+    try:
+        dataset = pydicom.dcmread(file_path, stop_before_pixels=True, specific_tags=HEADER_TAGS)
+    except (InvalidDicomError, OSError):
+        return None
+    if 'SeriesInstanceUID' not in dataset or 'Rows' not in dataset:
+        return None
+
+    def floats(name):
+        value = dataset.get(name)
+        return [float(v) for v in value] if value is not None else None
+
+    return {
+        'series_uid': str(dataset.SeriesInstanceUID),
+        'description': str(dataset.get('SeriesDescription', '')),
+        'instance': int(dataset.get('InstanceNumber') or 0),
+        'position': floats('ImagePositionPatient'),
+        'orientation': floats('ImageOrientationPatient'),
+        'pixel_spacing': floats('PixelSpacing'),
+        'slice_thickness': float(dataset.get('SliceThickness') or 0),
+        'rows': int(dataset.Rows),
+        'columns': int(dataset.Columns),
+        'bits_stored': int(dataset.get('BitsStored') or 16),
+        'signed': int(dataset.get('PixelRepresentation') or 0) == 1,
+        'slope': float(dataset.get('RescaleSlope') or 1.0),
+        'intercept': float(dataset.get('RescaleIntercept') or 0.0),
+    }
+
+
+class DicomSeries:
+    """The slices of one SeriesInstanceUID, sorted along the slice normal."""
+
+    def __init__(self, series_uid, entries):
+        self.series_uid = series_uid
+        self.paths = [path for path, _ in entries]
+        self.headers = [header for _, header in entries]
+        self.sort()
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def description(self):
+        return self.headers[0]['description']
+
+    @property
+    def shape(self):
+        return (len(self), self.headers[0]['rows'], self.headers[0]['columns'])
+
+    def sort(self):
+        """Order by position along the slice normal, falling back to InstanceNumber."""
+        first = self.headers[0]
+        if first['orientation'] and all(h['position'] for h in self.headers):
+            orientation = np.array(first['orientation'])
+            normal = np.cross(orientation[:3], orientation[3:])
+            keys = [float(np.dot(normal, h['position'])) for h in self.headers]
+        else:
+            keys = [h['instance'] for h in self.headers]
+        order = np.argsort(keys, kind='stable')
+        self.paths = [self.paths[i] for i in order]
+        self.headers = [self.headers[i] for i in order]
+
+    def output_dtype(self):
+        """Smallest dtype that holds the rescaled values of every slice."""
+        if any(h['slope'] != 1.0 or not float(h['intercept']).is_integer() for h in self.headers):
+            return np.dtype(np.float32)
+        low, high = np.inf, -np.inf
+        for h in self.headers:
+            bits = h['bits_stored']
+            stored_low, stored_high = (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if h['signed'] else (0, (1 << bits) - 1)
+            low = min(low, stored_low + h['intercept'])
+            high = max(high, stored_high + h['intercept'])
+        for dtype in (np.uint8, np.int16, np.uint16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+        return np.dtype(np.float32)
+
+
+class DicomFolder:
+    """
+    Header index of a folder of DICOM files.
+
+    Headers are read in a thread pool without pixel data. The index is cached
+    on disk keyed by folder path and validated per file by mtime and size, so
+    reopening a folder only re-reads files that changed.
+    """
+
+    def __init__(self, folder, max_workers=DEFAULT_WORKERS, cache_dir=INDEX_CACHE_DIR):
+        self.folder = os.path.abspath(folder)
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.headers = {}
+        self.files_scanned = 0
+        self.files_read = 0
+        self.scan_seconds = 0.0
+
+    def index_path(self):
+        digest = hashlib.sha1(self.folder.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.json')
+
+    def list_files(self):
+        """Relative path -> (mtime_ns, size) for every regular file under the folder."""
+        files = {}
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # A broken symlink, or removed while the folder was walked
+                files[os.path.relpath(path, self.folder)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def load_index(self):
+        try:
+            with open(self.index_path()) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION or index.get('folder') != self.folder:
+            return {}
+        return index.get('files', {})
+
+    def save_index(self, files):
+        entries = {rel: [mtime, size, self.headers.get(rel)] for rel, (mtime, size) in files.items()}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = self.index_path() + '.tmp'
+            with open(temp_path, 'w') as index_file:
+                json.dump({'version': INDEX_VERSION, 'folder': self.folder, 'files': entries}, index_file)
+            os.replace(temp_path, self.index_path())
+        except OSError:
+            pass  # The index is only an optimization
+
+    def scan(self):
+        """Read (or reuse cached) headers for every file; returns self."""
+        start = time.perf_counter()
+        files = self.list_files()
+        cached = self.load_index()
+
+        stale = []
+        for rel, (mtime, size) in files.items():
+            entry = cached.get(rel)
+            if entry is not None and entry[0] == mtime and entry[1] == size:
+                self.headers[rel] = entry[2]
+            else:
+                stale.append(rel)
+
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            for rel, header in zip(stale, pool.map(lambda r: read_header(os.path.join(self.folder, r)), stale)):
+                self.headers[rel] = header
+
+        self.files_scanned = len(files)
+        self.files_read = len(stale)
+        if stale or len(cached) != len(files):
+            self.save_index(files)
+        self.scan_seconds = time.perf_counter() - start
+        return self
+
+    def series(self):
+        """All image series in the folder, largest first."""
+        groups = {}
+        for rel, header in sorted(self.headers.items()):
+            if header is not None:
+                groups.setdefault(header['series_uid'], []).append((os.path.join(self.folder, rel), header))
+        return sorted((DicomSeries(uid, entries) for uid, entries in groups.items()), key=len, reverse=True)
+
+
+def read_series(series, out=None, max_workers=DEFAULT_WORKERS, on_slice=None, should_stop=None):
+    """
+    Decode a series into a preallocated (z, y, x) volume in parallel.
+
+    out defaults to np.empty(series.shape, series.output_dtype()). Rescale
+    slope/intercept are applied per slice. on_slice(index) is called in slice
+    order as slices land; should_stop() is polled to allow cancellation, in
+    which case None is returned.
+    """
+    volume = np.empty(series.shape, series.output_dtype()) if out is None else out
+
+    def decode(index):
+        if should_stop is not None and should_stop():
+            return index
+        header = series.headers[index]
+        pixels = pydicom.dcmread(series.paths[index]).pixel_array
+        if pixels.shape != volume.shape[1:]:
+            raise ValueError(f"{series.paths[index]} has size {pixels.shape}, expected {volume.shape[1:]}")
+        if header['slope'] != 1.0 or header['intercept'] != 0.0:
+            np.multiply(pixels, header['slope'], out=volume[index], casting='unsafe')
+            volume[index] += volume.dtype.type(header['intercept'])
+        else:
+            volume[index] = pixels
+        return index
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        for index in pool.map(decode, range(len(series))):
+            if on_slice is not None:
+                on_slice(index)
+    if should_stop is not None and should_stop():
+        return None
+    return volume
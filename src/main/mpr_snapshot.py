@@ -0,0 +1,159 @@
+"""
+Headless MPR snapshots and montages for batches of volumes.
+
+For every input (NIfTI file, DICOM folder, or anything SimpleITK reads) this
+writes the centre axial, coronal and sagittal slices and an axial montage as
+PNG files, using the viewer's slice orientation, window/level lookup tables
+and colormaps. Volumes are processed in parallel worker processes; no Qt or
+matplotlib figure is involved.
+
+    python src/main/mpr_snapshot.py out/ scans/*.nii.gz --workers 8 --colormap gray
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+from slice_store import SliceStore
+from volume_io import read_volume
+from window_level import VolumeStats, WindowLevelLUT, colormap_table, slider_adjustments
+
+VIEWS = ("axial", "coronal", "sagittal")
+STAGES = ("load", "stats", "extract", "map", "encode")
+
+
+def volume_name(path):
+    name = os.path.basename(os.path.normpath(path))
+    for extension in ('.nii.gz', '.nii'):
+        if name.lower().endswith(extension):
+            return name[:-len(extension)]
+    return os.path.splitext(name)[0]
+
+
+def output_names(paths):
+    """
+    Unique file name prefix per input: its path relative to the inputs' common
+    folder, with the separators turned into underscores, so p1/t1.nii and
+    p2/t1.nii become p1_t1 and p2_t1 (inputs of one folder keep their plain
+    name). Raises ValueError if two inputs would still share a prefix.
+    """
+    absolute = [os.path.abspath(path) for path in paths]
+    root = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    names = {}
+    for path, full in zip(paths, absolute):
+        folder, base = os.path.split(os.path.relpath(full, root))
+        name = volume_name(base)
+        if folder:
+            name = folder.replace(os.sep, '_') + '_' + name
+        names.setdefault(name, []).append(path)
+    clashes = [inputs for inputs in names.values() if len(inputs) > 1]
+    if clashes:
+        raise ValueError("inputs with the same output name: " + "; ".join(", ".join(c) for c in clashes))
+    return {inputs[0]: name for name, inputs in names.items()}
+
+
+def montage(slices, columns):
+    """Tile equally sized 2D slices row by row into one array (unused tiles stay 0)."""
+    rows = -(-len(slices) // columns)
+    height, width = slices[0].shape
+    tiled = np.zeros((rows * height, columns * width), slices[0].dtype)
+    for i, tile in enumerate(slices):
+        row, column = divmod(i, columns)
+        tiled[row * height:(row + 1) * height, column * width:(column + 1) * width] = tile
+    return tiled
+
+
+def write_png(path, rgba, compress_level):
+    Image.fromarray(np.ascontiguousarray(rgba[..., :3])).save(path, compress_level=compress_level)
+
+
+def snapshot_volume(path, out_dir, options, base=None):
+    """Write the snapshots of one volume as <base>_<view>.png; returns (base, per-stage seconds)."""
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    def stage(name, start):
+        now = time.perf_counter()
+        timings[name] += now - start
+        return now
+
+    start = time.perf_counter()
+    volume = read_volume(path)
+    start = stage("load", start)
+
+    lut = WindowLevelLUT(VolumeStats(volume, exact=not isinstance(volume, np.memmap)))
+    lut.rebuild(*slider_adjustments(options.brightness, options.contrast), colormap=colormap_table(options.colormap))
+    store = SliceStore(volume, memory_cap=0)
+    start = stage("stats", start)
+
+    images = {}
+    for view, name in enumerate(VIEWS):
+        if name in options.views:
+            images[name] = store.slice(view, volume.shape[view] // 2)
+    if options.montage > 0:
+        indices = np.linspace(0, volume.shape[0] - 1, options.montage + 2).astype(int)[1:-1]
+        images["montage"] = montage([store.axial(i) for i in indices], options.montage_columns)
+    start = stage("extract", start)
+
+    # One gather through the window/level table composed with the colormap
+    images = {name: lut.apply_rgba(data) for name, data in images.items()}
+    start = stage("map", start)
+
+    base = volume_name(path) if base is None else base
+    for name, rgba in images.items():
+        write_png(os.path.join(out_dir, f"{base}_{name}.png"), rgba, options.compress_level)
+    stage("encode", start)
+    return base, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir", help="directory for the PNG files")
+    parser.add_argument("volumes", nargs="+", help="NIfTI files or DICOM folders")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--views", nargs="+", choices=VIEWS, default=list(VIEWS))
+    parser.add_argument("--montage", type=int, default=16, help="axial slices in the montage (0 disables it)")
+    parser.add_argument("--montage-columns", type=int, default=4)
+    parser.add_argument("--colormap", default="gray")
+    parser.add_argument("--brightness", type=int, default=0, help="as the viewer slider, -150..150")
+    parser.add_argument("--contrast", type=int, default=100, help="as the viewer slider, in percent")
+    parser.add_argument("--compress-level", type=int, default=1, help="PNG zlib level, 0-9")
+    options = parser.parse_args(argv)
+
+    try:
+        names = output_names(options.volumes)
+    except ValueError as exc:
+        parser.error(str(exc))
+    os.makedirs(options.out_dir, exist_ok=True)
+    totals = dict.fromkeys(STAGES, 0.0)
+    failures = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(options.workers) as pool:
+        futures = {pool.submit(snapshot_volume, path, options.out_dir, options, names[path]): path
+                   for path in options.volumes}
+        for future in as_completed(futures):
+            try:
+                name, timings = future.result()
+            except Exception as exc:
+                failures += 1
+                print(f"FAILED {futures[future]}: {exc}", file=sys.stderr)
+                continue
+            for stage_name, seconds in timings.items():
+                totals[stage_name] += seconds
+            print(f"{name}: " + " ".join(f"{s} {timings[s] * 1000:.0f} ms" for s in STAGES))
+
+    elapsed = time.perf_counter() - start
+    done = len(options.volumes) - failures
+    print(f"{done} volumes in {elapsed:.2f} s ({done / elapsed:.2f} volumes/s, {options.workers} workers), "
+          f"{failures} failed")
+    if done:
+        print("mean per volume: " + " ".join(f"{s} {totals[s] / done * 1000:.0f} ms" for s in STAGES))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+import gzip
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+NIFTI_EXTENSIONS = ('.nii', '.nii.gz')
+# Threads decompressing BGZF blocks; zlib releases the GIL while inflating
+DEFAULT_INFLATE_WORKERS = os.cpu_count() or 4
+# Blocks queued ahead of the reader per worker
+INFLATE_AHEAD_PER_WORKER = 4
+
+
+def is_nifti(file_path):
+    return file_path.lower().endswith(NIFTI_EXTENSIONS)
+
+
+def read_into(file_obj, buffer):
+    """Fill a writable buffer from a (possibly compressed) stream; returns bytes read."""
+    view = memoryview(buffer).cast('B')
+    filled = 0
+    while filled < len(view):
+        count = file_obj.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def is_bgzf(file_path):
+    """
+    True for blocked gzip (bgzip output): a series of independent gzip
+    members whose headers record their compressed size, so members can be
+    located without inflating anything and decompressed in parallel.
+    """
+    try:
+        with open(file_path, 'rb') as raw:
+            head = raw.read(16)
+    except OSError:
+        return False
+    return (len(head) == 16 and head[:4] == b'\x1f\x8b\x08\x04'
+            and head[12:14] == b'BC' and head[14:16] == b'\x02\x00')
+
+
+def read_bgzf_block(raw):
+    """Next whole gzip member of a BGZF stream, or None at the end of the file."""
+    head = raw.read(12)
+    if len(head) < 12:
+        return None
+    extra_length, = struct.unpack('<H', head[10:12])
+    extra = raw.read(extra_length)
+    block_size = None
+    position = 0
+    while position + 4 <= len(extra):
+        sub_length, = struct.unpack('<H', extra[position + 2:position + 4])
+        if extra[position:position + 2] == b'BC':
+            block_size, = struct.unpack('<H', extra[position + 4:position + 6])
+        position += 4 + sub_length
+    if block_size is None:
+        raise IOError("not a BGZF block")
+    return head + extra + raw.read(block_size + 1 - 12 - extra_length)
+
+
+class ParallelGzipReader:
+    """
+    Sequential reads from a BGZF file, with blocks inflated ahead on a thread pool.
+
+    Supports the subset of the file API the loader uses: readinto(), a
+    forward seek() and use as a context manager.
+    """
+
+    def __init__(self, file_path, workers=DEFAULT_INFLATE_WORKERS):
+        self.raw = open(file_path, 'rb')
+        self.pool = ThreadPoolExecutor(workers)
+        self.ahead = workers * INFLATE_AHEAD_PER_WORKER
+        self.pending = deque()
+        self.buffer = memoryview(b'')
+        self.position = 0
+        self.exhausted = False
+
+    def queue_blocks(self):
+        while not self.exhausted and len(self.pending) < self.ahead:
+            block = read_bgzf_block(self.raw)
+            if block is None:
+                self.exhausted = True
+            else:
+                self.pending.append(self.pool.submit(zlib.decompress, block, 31))
+
+    def readinto(self, target):
+        view = memoryview(target).cast('B')
+        filled = 0
+        while filled < len(view):
+            if not len(self.buffer):
+                self.queue_blocks()
+                if not self.pending:
+                    break
+                self.buffer = memoryview(self.pending.popleft().result())
+                continue
+            count = min(len(self.buffer), len(view) - filled)
+            view[filled:filled + count] = self.buffer[:count]
+            self.buffer = self.buffer[count:]
+            filled += count
+        self.position += filled
+        return filled
+
+    def seek(self, offset):
+        if offset < self.position:
+            raise IOError("ParallelGzipReader only seeks forward")
+        skip = bytearray(min(offset - self.position, 1 << 20))
+        while self.position < offset:
+            if not self.readinto(memoryview(skip)[:offset - self.position]):
+                break
+        return self.position
+
+    def close(self):
+        for future in self.pending:
+            future.cancel()
+        self.pool.shutdown(wait=True)
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NiftiHeader:
+    """
+    The parts of a NIfTI-1/2 header the viewer needs.
+
+    NIfTI stores voxels with x varying fastest, so the raw voxel block is the
+    C-ordered (z, y, x) array the viewer uses (the same layout as
+    sitk.GetArrayFromImage). Shapes here are given in that array order. A
+    4D (or 5D) file is a series of such volumes stored one after another;
+    timepoints counts them.
+    """
+
+    def __init__(self, file_path):
+        import nibabel as nib  # Only when a NIfTI file is opened, not at startup
+        image = nib.load(file_path)
+        proxy = image.dataobj
+        dims = tuple(int(d) for d in proxy.shape)
+        dims = dims + (1,) * (3 - len(dims))
+
+        self.file_path = file_path
+        self.image_header = image.header
+        self.compressed = file_path.lower().endswith('.gz')
+        self.file_dtype = proxy.dtype
+        self.dtype = self.file_dtype.newbyteorder('=')
+        self.offset = int(proxy.offset)
+        self.spatial_shape = (dims[2], dims[1], dims[0])
+        self.shape = tuple(reversed(dims))
+        self.timepoints = int(np.prod(dims[3:], dtype=np.int64)) if len(dims) > 3 else 1
+
+        # The proxy already resolves unset/invalid scl_slope and scl_inter to 1 and 0
+        self.slope = float(proxy.slope)
+        self.inter = float(proxy.inter)
+
+    @property
+    def scaled(self):
+        """True when voxels must be rescaled (the viewer then holds float32 data)."""
+        return self.slope != 1.0 or self.inter != 0.0
+
+    @property
+    def swapped(self):
+        """True when the file's byte order differs from this machine's."""
+        return not self.file_dtype.isnative
+
+    @property
+    def supported(self):
+        """Plain scalar voxel types can be streamed; RGB and friends go through SimpleITK."""
+        return self.file_dtype.fields is None and self.file_dtype.kind in 'iuf'
+
+    @property
+    def plane_bytes(self):
+        return self.spatial_shape[1] * self.spatial_shape[2] * self.dtype.itemsize
+
+    @property
+    def volume_bytes(self):
+        """Bytes of one 3D volume in the file."""
+        return self.spatial_shape[0] * self.plane_bytes
+
+    def open_data(self):
+        """Open the file positioned at the first voxel; blocked gzip is inflated in parallel."""
+        if not self.compressed:
+            file_obj = open(self.file_path, 'rb')
+        elif is_bgzf(self.file_path):
+            file_obj = ParallelGzipReader(self.file_path)
+        else:
+            file_obj = gzip.open(self.file_path, 'rb')
+        file_obj.seek(self.offset)
+        return file_obj
+
+    @property
+    def mappable(self):
+        """Uncompressed, unscaled, native-order voxels can be used in place."""
+        return not self.compressed and not self.scaled and not self.swapped and self.supported
+
+    def memmap(self, timepoint=0):
+        """A 3D volume (the first by default) as a read-only (z, y, x) memmap; pages are read on access."""
+        return np.memmap(self.file_path, dtype=self.dtype, mode='r',
+                         offset=self.offset + timepoint * self.volume_bytes, shape=self.spatial_shape)
+
+    def read_volume(self, timepoint):
+        """Decode one 3D volume of an uncompressed file by seeking to it, rescaled like the loader does."""
+        volume = np.empty(self.spatial_shape, self.dtype)
+        with open(self.file_path, 'rb') as file_obj:
+            file_obj.seek(self.offset + timepoint * self.volume_bytes)
+            if read_into(file_obj, volume) < volume.nbytes:
+                raise IOError("file is truncated")
+        if self.swapped:
+            volume.byteswap(inplace=True)
+        if self.scaled:
+            scaled = np.empty(self.spatial_shape, np.float32)
+            np.multiply(volume, self.slope, out=scaled, casting='unsafe')
+            scaled += self.inter
+            return scaled
+        return volume
@@ -0,0 +1,27 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QLabel
+
+
+class PerformanceHud(QLabel):
+    """
+    Frame rate and latency overlay in the corner of a viewport canvas.
+
+    The label is a child widget painted by Qt on top of the canvas, so it does
+    not touch the matplotlib figure or its cached blit background.
+    """
+
+    def __init__(self, canvas, profiler, view, view_name):
+        super().__init__(canvas)
+        self.profiler = profiler
+        self.view = view
+        self.view_name = view_name
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #7fff7f;"
+                           "font-family: monospace; padding: 2px 4px;")
+        self.move(4, 4)
+        self.hide()
+
+    def refresh(self):
+        self.setText(f"{self.view_name}: {self.profiler.summary(self.view)}")
+        self.adjustSize()
+        self.raise_()
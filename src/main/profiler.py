@@ -0,0 +1,164 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+# Set to 1 to start the viewer with instrumentation enabled
+PROFILE_ENV_VAR = 'MPR_PROFILE'
+# Oldest trace events are dropped beyond this, so a long session stays bounded
+MAX_TRACE_EVENTS = 500000
+# Input-to-pixel samples kept per view for the percentiles
+LATENCY_SAMPLES = 512
+# Window over which presented frames are counted for the frame rate
+FPS_WINDOW = 1.0
+# Pseudo thread ids for the input-to-pixel rows of the trace
+LATENCY_TID_BASE = 1000
+
+
+class Profiler:
+    """
+    Call timings and input-to-pixel latency, exportable as a Chrome trace.
+
+    Everything is a no-op while enabled is False: traced() wrappers check one
+    attribute and call straight through. When enabled, every traced call
+    becomes a complete ("X") event on its thread. Input handlers stamp the
+    views they affect with input_event(); the next frame_presented() for a
+    view closes the oldest pending stamp into a latency sample.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)
+        self.thread_names = {}
+        self.pending_input = {}
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        self.frame_times = defaultdict(deque)
+        self.lock = threading.Lock()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.pending_input.clear()
+
+    def clear(self):
+        with self.lock:
+            self.events.clear()
+            self.pending_input.clear()
+            self.latencies.clear()
+            self.frame_times.clear()
+
+    def timestamp(self, seconds):
+        """perf_counter seconds -> trace microseconds."""
+        return (seconds - self.origin) * 1e6
+
+    def complete(self, name, start, end, category='call', tid=None, args=None):
+        """Record a finished span; start and end are perf_counter values."""
+        if tid is None:
+            thread = threading.current_thread()
+            tid = thread.ident
+            self.thread_names.setdefault(tid, thread.name)
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                 'ts': self.timestamp(start), 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def input_event(self, views):
+        """An input that should change these views happened now."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        for view in views:
+            # The oldest unserved input defines the latency the user sees
+            self.pending_input.setdefault(view, now)
+
+    def discard_input(self):
+        self.pending_input.clear()
+
+    def frame_presented(self, view, view_index=0):
+        """A frame for view reached the screen."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            frames = self.frame_times[view]
+            frames.append(now)
+            while frames and now - frames[0] > FPS_WINDOW:
+                frames.popleft()
+            start = self.pending_input.pop(view, None)
+            if start is not None:
+                self.latencies[view].append(now - start)
+        if start is not None:
+            tid = LATENCY_TID_BASE + view_index
+            self.thread_names.setdefault(tid, f"{view} input-to-pixel")
+            self.complete(f"{view} input-to-pixel", start, now, category='latency', tid=tid)
+
+    def fps(self, view):
+        frames = self.frame_times.get(view)
+        if not frames or time.perf_counter() - frames[-1] > FPS_WINDOW:
+            return 0.0
+        return len(frames) / FPS_WINDOW
+
+    def latency_percentiles(self, view):
+        """(p50, p95) input-to-pixel latency in ms, or None before the first sample."""
+        with self.lock:
+            samples = list(self.latencies.get(view, ()))
+        if not samples:
+            return None
+        p50, p95 = np.percentile(samples, [50, 95]) * 1000.0
+        return p50, p95
+
+    def summary(self, view):
+        """One-line fps and latency report for the on-screen overlay."""
+        text = f"{self.fps(view):.0f} fps"
+        percentiles = self.latency_percentiles(view)
+        if percentiles is not None:
+            text += f"  p50 {percentiles[0]:.1f} ms  p95 {percentiles[1]:.1f} ms"
+        return text
+
+    def export_chrome_trace(self, path):
+        """Write the session as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        with self.lock:
+            events = list(self.events)
+        pid = os.getpid()
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'MPR Viewer'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in self.thread_names.items()]
+        with open(path, 'w') as trace_file:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, trace_file)
+        return len(events)
+
+    def instrument(self, obj, attr, name):
+        """Trace a method of an object we do not own (e.g. a matplotlib canvas)."""
+        setattr(obj, attr, self.wrap(getattr(obj, attr), name))
+
+    def wrap(self, function, name):
+        profiler = self
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.complete(name, start, time.perf_counter())
+        return wrapper
+
+
+PROFILER = Profiler(enabled=os.environ.get(PROFILE_ENV_VAR) == '1')
+
+
+def traced(name):
+    """
+    Decorator recording each call as a span on the shared profiler when it is enabled.
+
+    The wrapper forwards every argument, so PyQt can no longer drop the ones
+    a signal adds (clicked's checked flag): connect traced slots through a lambda.
+    """
+    return lambda function: PROFILER.wrap(function, name)
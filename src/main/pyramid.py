@@ -0,0 +1,109 @@
+import threading
+
+import numpy as np
+
+# Stop halving once the smallest axis would drop below this many voxels
+MIN_LEVEL_SIZE = 32
+MAX_LEVELS = 4
+# Planes of the finer level averaged per step, so cancellation stays responsive
+BUILD_CHUNK_PLANES = 32
+# Weight of the newest sample in the per-level render cost estimate
+COST_SMOOTHING = 0.3
+
+
+def downsample(volume, should_stop=None):
+    """Halve every axis with a 2x2x2 block mean (odd axes repeat their last voxel)."""
+    nz, ny, nx = volume.shape
+    out = np.empty(((nz + 1) // 2, (ny + 1) // 2, (nx + 1) // 2), volume.dtype)
+    if volume.dtype.kind == 'f':
+        accumulate = np.float64
+    else:
+        accumulate = np.int32 if volume.dtype.itemsize <= 2 else np.int64
+
+    for z_start in range(0, nz, 2 * BUILD_CHUNK_PLANES):
+        if should_stop is not None and should_stop():
+            return None
+        block = np.asarray(volume[z_start:z_start + 2 * BUILD_CHUNK_PLANES])
+        pad = [(0, size % 2) for size in block.shape]
+        if any(after for _, after in pad):
+            block = np.pad(block, pad, mode='edge')
+        cz, cy, cx = (size // 2 for size in block.shape)
+        sums = block.reshape(cz, 2, cy, 2, cx, 2).sum(axis=(1, 3, 5), dtype=accumulate)
+        if volume.dtype.kind == 'f':
+            out[z_start // 2:z_start // 2 + cz] = sums / 8
+        else:
+            out[z_start // 2:z_start // 2 + cz] = (sums + 4) // 8
+    return out
+
+
+class VolumePyramid:
+    """
+    Downsampled copies of a volume for low-latency interaction.
+
+    levels[0] is the volume itself; levels[k] halves every axis k times. The
+    coarser levels are built on a background thread and become usable one by
+    one. Render cost is measured per level so pick_level() can choose the
+    finest level that fits a latency budget.
+    """
+
+    def __init__(self, volume, min_size=MIN_LEVEL_SIZE, max_levels=MAX_LEVELS):
+        self.levels = [volume]
+        self.target_levels = 0
+        shape = np.array(volume.shape)
+        while self.target_levels < max_levels and (shape // 2).min() >= min_size:
+            shape = (shape + 1) // 2
+            self.target_levels += 1
+        self.costs = {}
+        self._cancelled = False
+        self._thread = None
+
+    def start(self):
+        if self.target_levels and self._thread is None:
+            self._thread = threading.Thread(target=self._build, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._cancelled = True
+        if self._thread is not None:
+            self._thread.join()
+        del self.levels[1:]
+
+    def _build(self):
+        for _ in range(self.target_levels):
+            level = downsample(self.levels[-1], lambda: self._cancelled)
+            if level is None:
+                return
+            self.levels.append(level)
+
+    def slice(self, level, view, index):
+        """Display-oriented slice of view 0/1/2 at full-resolution index on a level."""
+        volume = self.levels[level]
+        index = min(index >> level, volume.shape[view] - 1)
+        if view == 0:
+            return volume[index, :, :]
+        elif view == 1:
+            return np.flipud(volume[:, index, :])
+        return np.flipud(volume[:, :, index])
+
+    def record(self, level, seconds):
+        """Feed back how long a frame at this level took to render."""
+        previous = self.costs.get(level)
+        self.costs[level] = seconds if previous is None else \
+            (1 - COST_SMOOTHING) * previous + COST_SMOOTHING * seconds
+
+    def estimate(self, level):
+        """Measured cost of a level, or extrapolated from the nearest finer measured one."""
+        if level in self.costs:
+            return self.costs[level]
+        finer = [known for known in self.costs if known < level]
+        if not finer:
+            return 0.0
+        nearest = max(finer)
+        return self.costs[nearest] / 4 ** (level - nearest)
+
+    def pick_level(self, budget_seconds):
+        """Finest available level whose render cost fits the budget (else the coarsest)."""
+        for level in range(len(self.levels)):
+            if self.estimate(level) <= budget_seconds:
+                return level
+        return len(self.levels) - 1
@@ -0,0 +1,324 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+from PyQt5.QtCore import QPointF, QRectF, QSize, Qt
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from profiler import traced
+
+CROSSHAIR_COLOR = QColor(255, 0, 0)
+MARKER_RADIUS = 3.5
+BACKGROUND_COLOR = QColor(0, 0, 0)
+# Extra area rendered around the visible part of a zoomed slice, as a fraction of the visible size,
+# so small pans repaint the cached frame instead of rendering a new one
+REGION_MARGIN = 0.25
+
+
+class RasterAxes:
+    """
+    The view limits of a RasterCanvas, with the matplotlib Axes calls the viewer uses.
+
+    Limits are in full-resolution voxel units like an imshow() extent: x runs
+    left to right, y top to bottom (ylim is (bottom, top), so it is inverted).
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.figure = SimpleNamespace(canvas=canvas)
+        self.xlim = (-0.5, 0.5)
+        self.ylim = (0.5, -0.5)
+
+    def get_xlim(self):
+        return self.xlim
+
+    def get_ylim(self):
+        return self.ylim
+
+    def set_xlim(self, left, right=None):
+        self.xlim = tuple(left) if right is None else (left, right)
+
+    def set_ylim(self, bottom, top=None):
+        self.ylim = tuple(bottom) if top is None else (bottom, top)
+
+    def reset(self, shape):
+        rows, cols = shape
+        self.xlim = (-0.5, cols - 0.5)
+        self.ylim = (rows - 0.5, -0.5)
+
+
+class RasterCanvas(QWidget):
+    """
+    A viewport painted directly with QPainter.
+
+    The current frame is wrapped in a QImage that shares the NumPy buffer and
+    is scaled by the raster paint engine (nearest neighbour) into a box
+    whose voxels have the aspect of the volume's spacing; crosshair and
+    marker are painted on top. Mouse input is
+    delivered through mpl_connect() with events carrying the same fields as
+    matplotlib's (inaxes, xdata, ydata, button), so the viewer's zoom, pan and
+    click handlers work with either backend.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.ax = RasterAxes(self)
+        self.qimage = None
+        self.frame = None
+        self.shape = None
+        self.extent = None
+        self.crosshair = None
+        self.aspect = 1.0  # Height of a displayed voxel relative to its width
+        self.callbacks = {}
+
+    def sizeHint(self):
+        # Same default size as a matplotlib canvas, so the layout does not change with the backend
+        return QSize(640, 480)
+
+    def mpl_connect(self, name, callback):
+        self.callbacks.setdefault(name, []).append(callback)
+
+    def draw(self):
+        self.repaint()
+
+    def draw_idle(self):
+        self.update()
+
+    def set_frame(self, frame, shape, extent=None):
+        """
+        Show a (rows, cols) uint8 or (rows, cols, 4) RGBA frame.
+
+        extent is the (left, right, top, bottom) area it covers in voxel units
+        of a full-resolution slice of the given shape; by default the whole slice.
+        """
+        if extent is None:
+            extent = (-0.5, shape[1] - 0.5, -0.5, shape[0] - 0.5)
+        frame = np.ascontiguousarray(frame)
+        rows, cols = frame.shape[:2]
+        image_format = QImage.Format_RGBA8888 if frame.ndim == 3 else QImage.Format_Grayscale8
+        # The QImage only points at the array, which self.frame keeps alive
+        self.qimage = QImage(frame.data, cols, rows, frame.strides[0], image_format)
+        self.frame = frame
+        self.shape = shape
+        self.extent = extent
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.emit('resize_event', SimpleNamespace(canvas=self))
+
+    def axes_rect(self):
+        """Widget rectangle showing the current limits with voxels of the canvas aspect."""
+        (x0, x1), (y0, y1) = self.ax.xlim, self.ax.ylim
+        width, height = abs(x1 - x0), abs(y0 - y1) * self.aspect
+        if width <= 0 or height <= 0:
+            return QRectF(self.rect())
+        scale = min(self.width() / width, self.height() / height)
+        w, h = width * scale, height * scale
+        return QRectF((self.width() - w) / 2, (self.height() - h) / 2, w, h)
+
+    def to_widget(self, x, y, rect):
+        (x0, x1), (bottom, top) = self.ax.xlim, self.ax.ylim
+        return (rect.left() + (x - x0) / (x1 - x0) * rect.width(),
+                rect.top() + (y - top) / (bottom - top) * rect.height())
+
+    def to_data(self, px, py, rect):
+        (x0, x1), (bottom, top) = self.ax.xlim, self.ax.ylim
+        return (x0 + (px - rect.left()) / rect.width() * (x1 - x0),
+                top + (py - rect.top()) / rect.height() * (bottom - top))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        rect = self.axes_rect()
+        painter.fillRect(rect, BACKGROUND_COLOR)
+        if self.qimage is not None:
+            painter.setClipRect(rect)
+            self.paint_frame(painter, rect)
+            if self.crosshair is not None:
+                self.paint_crosshair(painter, rect)
+        painter.end()
+
+    def paint_frame(self, painter, rect):
+        """Draw the part of the frame inside the limits."""
+        frame_left, frame_right, frame_top, frame_bottom = self.extent
+        scale_x = (frame_right - frame_left) / self.qimage.width()
+        scale_y = (frame_bottom - frame_top) / self.qimage.height()
+        (x0, x1), (bottom, top) = self.ax.xlim, self.ax.ylim
+        # Visible data range clipped to the frame, then in frame pixels and widget pixels
+        left, right = max(min(x0, x1), frame_left), min(max(x0, x1), frame_right)
+        upper, lower = max(min(bottom, top), frame_top), min(max(bottom, top), frame_bottom)
+        if left >= right or upper >= lower:
+            return
+        source = QRectF((left - frame_left) / scale_x, (upper - frame_top) / scale_y,
+                        (right - left) / scale_x, (lower - upper) / scale_y)
+        tx0, ty0 = self.to_widget(left, upper, rect)
+        tx1, ty1 = self.to_widget(right, lower, rect)
+        painter.drawImage(QRectF(QPointF(tx0, ty0), QPointF(tx1, ty1)).normalized(), self.qimage, source)
+
+    def paint_crosshair(self, painter, rect):
+        x, y = self.to_widget(*self.crosshair, rect)
+        pen = QPen(CROSSHAIR_COLOR)
+        pen.setStyle(Qt.DashLine)
+        painter.setPen(pen)
+        painter.drawLine(QPointF(x, rect.top()), QPointF(x, rect.bottom()))
+        painter.drawLine(QPointF(rect.left(), y), QPointF(rect.right(), y))
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(CROSSHAIR_COLOR)
+        painter.drawEllipse(QPointF(x, y), MARKER_RADIUS, MARKER_RADIUS)
+
+    def make_event(self, position, button):
+        """Event with matplotlib's fields; inaxes is None outside the image box."""
+        rect = self.axes_rect()
+        inside = self.shape is not None and rect.contains(position)
+        xdata, ydata = self.to_data(position.x(), position.y(), rect) if inside else (None, None)
+        return SimpleNamespace(inaxes=self.ax if inside else None, xdata=xdata, ydata=ydata, button=button,
+                               canvas=self)
+
+    def emit(self, name, event):
+        for callback in self.callbacks.get(name, ()):
+            callback(event)
+
+    def mouse_button(self, buttons):
+        if buttons & Qt.LeftButton:
+            return 1
+        elif buttons & Qt.MiddleButton:
+            return 2
+        elif buttons & Qt.RightButton:
+            return 3
+        return None
+
+    def mousePressEvent(self, event):
+        self.emit('button_press_event', self.make_event(event.localPos(), self.mouse_button(event.button())))
+
+    def mouseMoveEvent(self, event):
+        self.emit('motion_notify_event', self.make_event(event.localPos(), self.mouse_button(event.buttons())))
+
+    def wheelEvent(self, event):
+        delta = event.angleDelta().y()
+        if delta:
+            self.emit('scroll_event', self.make_event(event.position(), 'up' if delta > 0 else 'down'))
+
+
+class RasterViewport:
+    """
+    SliceViewport counterpart drawing through a RasterCanvas instead of matplotlib.
+
+    Pushing a frame is a synchronous repaint of the widget; no rasterization
+    of axes, ticks or titles is involved. display_region() tells the viewer
+    which part of a slice is worth rendering, and at what decimation, so the
+    per-frame work follows the number of screen pixels rather than the matrix
+    size.
+    """
+
+    def __init__(self, title):
+        self.canvas = RasterCanvas()
+        self.ax = self.canvas.ax
+        self.title = title
+        self.image = None
+        self.shape = None
+        self.buffer = None
+        self.slice_shape = None
+        self.steps = None
+
+    def reset(self):
+        """Drop the current frame so the next one resets the view limits."""
+        self.image = None
+        self.shape = None
+        self.canvas.qimage = None
+        self.canvas.frame = None
+        self.canvas.crosshair = None
+        self.slice_shape = None
+        self.steps = None
+
+    def display_region(self, shape, slice_shape):
+        """
+        The part of a slice to render: ((row_slice, col_slice), extent).
+
+        shape is the full-resolution (rows, cols) of the view and slice_shape
+        that of the slice at hand (smaller for a pyramid level). The region is
+        the visible area plus REGION_MARGIN on every side, taken every
+        step-th pixel so that it is not much finer than the screen. extent is
+        the area the rendered region covers, for set_image().
+        """
+        shape, slice_shape = tuple(shape), tuple(slice_shape)
+        rows, cols = shape
+        if self.shape == shape:
+            (x0, x1), (y0, y1) = self.ax.xlim, self.ax.ylim
+        else:
+            # The limits are reset for a new shape
+            (x0, x1), (y0, y1) = (-0.5, cols - 0.5), (rows - 0.5, -0.5)
+        width, height = abs(x1 - x0), abs(y1 - y0)
+        aspect = self.canvas.aspect
+        # Screen pixels per full-resolution voxel across and down
+        x_scale = min(self.canvas.width() / width, self.canvas.height() / (height * aspect))
+        y_scale = x_scale * aspect
+
+        region, extent, steps = [], [], []
+        for low, high, size, slice_size, screen_scale in (
+                (min(y0, y1), max(y0, y1), rows, slice_shape[0], y_scale),
+                (min(x0, x1), max(x0, x1), cols, slice_shape[1], x_scale)):
+            factor = slice_size / size  # Slice pixels per voxel
+            step = max(1, int(factor / screen_scale)) if screen_scale > 0 else 1
+            margin = (high - low) * REGION_MARGIN
+            start = max(0, math.floor((low - margin + 0.5) * factor))
+            stop = min(slice_size, math.ceil((high + margin + 0.5) * factor))
+            start -= start % step  # Same sampling grid at every pan position
+            stop = max(stop, start + 1)
+            count = -(-(stop - start) // step)
+            region.append(slice(start, stop, step))
+            extent.append((start / factor - 0.5, (start + count * step) / factor - 0.5))
+            steps.append(step)
+        (top, bottom), (left, right) = extent
+        return tuple(region), (left, right, top, bottom), tuple(steps)
+
+    def set_aspect(self, aspect):
+        """Show voxels aspect times as high as wide (row spacing over column spacing)."""
+        self.canvas.aspect = aspect
+
+    def covers_view(self):
+        """True while the current frame still covers the visible area at a suitable resolution."""
+        if self.image is None or self.canvas.extent is None:
+            return True
+        _, _, steps = self.display_region(self.shape, self.slice_shape)
+        left, right, top, bottom = self.canvas.extent
+        rows, cols = self.shape
+        (x0, x1), (y0, y1) = self.ax.xlim, self.ax.ylim
+        # Only the part of the view showing the slice has to be covered
+        visible = (max(min(x0, x1), -0.5), min(max(x0, x1), cols - 0.5),
+                   max(min(y0, y1), -0.5), min(max(y0, y1), rows - 0.5))
+        return (steps == self.steps and visible[0] >= left - 1e-6 and visible[1] <= right + 1e-6
+                and visible[2] >= top - 1e-6 and visible[3] <= bottom + 1e-6)
+
+    def pixel_buffer(self, rows, cols):
+        """Reusable (rows, cols, 4) uint8 buffer to build the next frame in."""
+        if self.buffer is None or self.buffer.shape[:2] != (rows, cols):
+            self.buffer = np.empty((rows, cols, 4), np.uint8)
+        return self.buffer
+
+    def set_image(self, rgba, shape=None, extent=None, slice_shape=None, steps=None):
+        """
+        Show a frame; extent, slice_shape and steps describe the region it was
+        rendered from (see display_region), by default the whole slice.
+        """
+        shape = rgba.shape[:2] if shape is None else tuple(shape)
+        if self.image is None or self.shape != shape:
+            self.ax.reset(shape)
+            self.shape = shape
+        self.canvas.set_frame(rgba, shape, extent)
+        self.image = self.canvas.qimage
+        self.slice_shape = tuple(slice_shape) if slice_shape is not None else shape
+        self.steps = tuple(steps) if steps is not None else (1, 1)
+
+    def set_crosshair(self, x, y):
+        if self.image is None:
+            return
+        self.canvas.crosshair = (x, y)
+
+    @traced('RasterViewport.blit')
+    def blit(self):
+        """Push the current frame."""
+        self.canvas.repaint()
@@ -0,0 +1,66 @@
+import time
+
+from PyQt5.QtCore import QTimer
+
+from profiler import traced
+
+
+class RenderScheduler:
+    """
+    Coalesce redraw requests so each viewport renders at most once per flush.
+
+    Callers mark viewports dirty with request(); the actual rendering happens
+    in flush(), which runs from a single-shot timer on the next event-loop
+    tick, or once frame_budget_ms has elapsed since the previous flush. The
+    render callback reads the viewer's state at flush time, so intermediate
+    states produced while dragging are simply never drawn.
+
+    render(idx, image) is called once per dirty viewport. image is False when
+    only the crosshair moved and the displayed slice can be reused.
+    """
+
+    def __init__(self, render, frame_budget_ms=16, on_flush=None):
+        self.render = render
+        self.frame_budget_ms = frame_budget_ms
+        self.on_flush = on_flush
+        self.dirty = {}
+        self.requested = 0
+        self.rendered = 0
+        self.last_flush = 0.0
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def request(self, idx, image=True):
+        """Mark a viewport dirty; image=False asks for a crosshair-only update."""
+        self.requested += 1
+        self.dirty[idx] = self.dirty.get(idx, False) or image
+        if not self.timer.isActive():
+            elapsed_ms = (time.perf_counter() - self.last_flush) * 1000.0
+            self.timer.start(int(max(0.0, self.frame_budget_ms - elapsed_ms)))
+
+    def request_all(self, image=True):
+        for idx in range(3):
+            self.request(idx, image)
+
+    @traced('RenderScheduler.flush')
+    def flush(self):
+        """Render every dirty viewport once."""
+        self.timer.stop()
+        dirty, self.dirty = self.dirty, {}
+        for idx in sorted(dirty):
+            self.render(idx, dirty[idx])
+            self.rendered += 1
+        self.last_flush = time.perf_counter()
+        if dirty and self.on_flush is not None:
+            self.on_flush()
+
+    def reset_counters(self):
+        self.requested = 0
+        self.rendered = 0
+
+    def summary(self):
+        """Short requested-vs-rendered report for the status bar."""
+        saved = self.requested - self.rendered
+        return f"Frames: {self.rendered} rendered / {self.requested} requested ({saved} coalesced)"
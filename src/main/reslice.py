@@ -0,0 +1,180 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Output rows sampled per block; keeps the per-block temporaries in cache
+BLOCK_ROWS = 32
+# Planes with at least this many samples are split across the thread pool
+PARALLEL_SAMPLES = 128 * 1024
+DEFAULT_WORKERS = os.cpu_count() or 4
+# Coordinate grids kept, one per plane orientation and size
+MAX_CACHED_GRIDS = 6
+
+
+def rotation_matrix(axis, degrees):
+    """Rotation of (z, y, x) vectors about axis 0, 1 or 2."""
+    angle = np.radians(degrees)
+    c, s = np.cos(angle), np.sin(angle)
+    a, b = [i for i in range(3) if i != axis]
+    matrix = np.eye(3)
+    matrix[a, a], matrix[a, b], matrix[b, a], matrix[b, b] = c, -s, s, c
+    return matrix
+
+
+def voxel_rotation(rotation, spacing):
+    """
+    A rotation of patient space expressed on voxel coordinates of the given
+    (z, y, x) spacing: scale to mm, rotate, scale back. With anisotropic
+    voxels this is not orthogonal; its inverse is voxel_rotation(rotation.T, spacing).
+    """
+    spacing = np.asarray(spacing, np.float64)
+    return rotation * spacing[None, :] / spacing[:, None]
+
+
+def view_plane(view, index, rotation, shape, spacing=(1.0, 1.0, 1.0)):
+    """
+    Origin, row step and column step, in (z, y, x) voxel coordinates, of the
+    display-oriented slice `index` of view 0/1/2 through a volume rotated
+    about its centre.
+
+    The rotation is applied in millimetres, so planes stay planar and
+    perpendicular in patient space whatever the voxel spacing; output pixels
+    keep the size of the orthogonal view's pixels. With the identity
+    rotation this is exactly the orthogonal slice: axial rows run along y and
+    columns along x; coronal and sagittal rows run down z (flipped, superior
+    on top) and columns along x and y respectively.
+    """
+    nz = shape[0]
+    center = (np.asarray(shape, np.float64) - 1) / 2
+    if view == 0:
+        corner, row, col = (index, 0, 0), (0, 1, 0), (0, 0, 1)
+    elif view == 1:
+        corner, row, col = (nz - 1, index, 0), (-1, 0, 0), (0, 0, 1)
+    else:
+        corner, row, col = (nz - 1, 0, index), (-1, 0, 0), (0, 1, 0)
+    transform = voxel_rotation(rotation, spacing)
+    origin = center + transform @ (np.asarray(corner, np.float64) - center)
+    return origin, transform @ np.asarray(row, np.float64), transform @ np.asarray(col, np.float64)
+
+
+class Reslicer:
+    """
+    Samples arbitrary planes of a (z, y, x) volume with trilinear interpolation.
+
+    A plane is an origin plus row and column steps in voxel coordinates. The
+    grid of per-pixel offsets (row * row_step + col * col_step) depends only
+    on the orientation and size, so it is cached and scrolling a plane along
+    its normal only changes the origin added to it. Samples are computed in
+    blocks of BLOCK_ROWS output rows, eight np.take gathers each on the
+    flattened volume; large planes spread the blocks over a thread pool
+    (NumPy releases the GIL in these loops). Points outside the volume get
+    fill.
+
+    Planes may be sampled from several threads (the GUI and the cine worker);
+    once closed, a reslicer still samples, on the calling thread only.
+    """
+
+    def __init__(self, volume, fill=0, workers=DEFAULT_WORKERS):
+        self.volume = volume
+        self.shape = volume.shape
+        self.fill = fill
+        # A view for contiguous arrays and memmaps; nothing is read until sampled
+        self.flat = volume.reshape(-1)
+        self.workers = workers
+        self.grids = OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = None
+        self.closed = False
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)  # Blocks already queued still complete
+
+    def grid(self, row_step, col_step, shape):
+        """Cached (3, rows, cols) float32 offsets of each output pixel from the origin."""
+        key = (tuple(np.round(row_step, 9)), tuple(np.round(col_step, 9)), tuple(shape))
+        with self.lock:
+            grid = self.grids.get(key)
+            if grid is not None:
+                self.grids.move_to_end(key)
+                return grid
+        rows = np.arange(shape[0], dtype=np.float32)[:, None]
+        cols = np.arange(shape[1], dtype=np.float32)[None, :]
+        grid = np.stack([rows * np.float32(r) + cols * np.float32(c) for r, c in zip(row_step, col_step)])
+        with self.lock:
+            self.grids[key] = grid
+            while len(self.grids) > MAX_CACHED_GRIDS:
+                self.grids.popitem(last=False)
+        return grid
+
+    def plane(self, origin, row_step, col_step, shape, out=None):
+        """Sample a (rows, cols) plane; returns an array of the volume dtype."""
+        grid = self.grid(row_step, col_step, shape)
+        if out is None:
+            out = np.empty(shape, self.volume.dtype)
+        blocks = [(start, min(shape[0], start + BLOCK_ROWS)) for start in range(0, shape[0], BLOCK_ROWS)]
+        origin = np.asarray(origin, np.float32)
+        futures = None
+        if shape[0] * shape[1] >= PARALLEL_SAMPLES and self.workers > 1 and len(blocks) > 1:
+            futures = self.submit(grid, origin, blocks, out)
+        if futures is None:
+            for block in blocks:
+                self.sample_block(grid, origin, block, out)
+        else:
+            for future in futures:
+                future.result()
+        return out
+
+    def submit(self, grid, origin, blocks, out):
+        """Queue blocks on the thread pool, created on first use; None once closed."""
+        with self.lock:
+            if self.closed:
+                return None
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reslice')
+            return [self.pool.submit(self.sample_block, grid, origin, block, out) for block in blocks]
+
+    def sample_block(self, grid, origin, block, out):
+        start, stop = block
+        nz, ny, nx = self.shape
+        coords = grid[:, start:stop] + origin[:, None, None]
+        inside = np.ones(coords.shape[1:], bool)
+        lower, weights = [], []
+        for axis, size in enumerate((nz, ny, nx)):
+            position = coords[axis]
+            inside &= (position >= 0) & (position <= size - 1)
+            # The lower corner stays one voxel inside so the upper one is valid; the weight reaches 1 at the edge
+            base = np.clip(np.floor(position), 0, max(size - 2, 0))
+            lower.append(base.astype(np.intp))
+            weights.append(np.clip(position - base, 0, 1) if size > 1 else np.zeros_like(position))
+
+        z0, y0, x0 = lower
+        index = (z0 * ny + y0) * nx + x0
+        dz = ny * nx if nz > 1 else 0
+        dy = nx if ny > 1 else 0
+        dx = 1 if nx > 1 else 0
+        wz, wy, wx = weights
+
+        def corner(offset):
+            return np.take(self.flat, index + offset).astype(np.float32)
+
+        # Interpolate along x, then y, then z
+        c00 = corner(0) * (1 - wx) + corner(dx) * wx
+        c01 = corner(dy) * (1 - wx) + corner(dy + dx) * wx
+        c10 = corner(dz) * (1 - wx) + corner(dz + dx) * wx
+        c11 = corner(dz + dy) * (1 - wx) + corner(dz + dy + dx) * wx
+        c0 = c00 * (1 - wy) + c01 * wy
+        c1 = c10 * (1 - wy) + c11 * wy
+        values = c0 * (1 - wz) + c1 * wz
+
+        if out.dtype.kind in 'iu':
+            info = np.iinfo(out.dtype)
+            values = np.clip(np.rint(values), info.min, info.max)
+        values[~inside] = self.fill
+        out[start:stop] = values
@@ -0,0 +1,269 @@
+import time
+
+import numpy as np
+
+# Snapshots of grown regions kept for re-growing at a nearby tolerance
+MAX_SNAPSHOTS = 8
+# Voxels added around the region's bounding box when growth hits the edge of the working box
+GROW_MARGIN = 32
+# Overlay color and opacity of the label in the MPR views
+OVERLAY_COLOR = (255, 64, 64)
+OVERLAY_ALPHA = 0.4
+
+WORD_BITS = 64
+ONE = np.uint64(1)
+
+
+class BitMask:
+    """
+    A 3D label mask packed 64 voxels per word along x.
+
+    words is a (z, y, ceil(x / 64)) uint64 array; bit b of word w in a row is
+    voxel x = 64 * w + b. A 256^3 mask takes 2 MB.
+    """
+
+    def __init__(self, shape, words=None):
+        self.shape = tuple(shape)
+        if words is None:
+            words = np.zeros(self.shape[:2] + (-(-self.shape[2] // WORD_BITS),), np.uint64)
+        self.words = words
+
+    @classmethod
+    def pack(cls, mask):
+        """Pack a boolean (z, y, x) array."""
+        nz, ny, nx = mask.shape
+        packed = np.packbits(mask, axis=2, bitorder='little')
+        width = -(-nx // WORD_BITS) * 8
+        if packed.shape[2] != width:
+            packed = np.pad(packed, ((0, 0), (0, 0), (0, width - packed.shape[2])))
+        return cls(mask.shape, np.ascontiguousarray(packed).view('<u8').astype(np.uint64, copy=False))
+
+    def unpack_rows(self, words):
+        """Boolean voxels of a (..., words) block, cut to the mask's x size."""
+        bits = np.unpackbits(np.ascontiguousarray(words).view(np.uint8), axis=-1, bitorder='little')
+        return bits[..., :self.shape[2]].view(bool)
+
+    def unpack(self):
+        return self.unpack_rows(self.words)
+
+    def count(self):
+        return int(np.bitwise_count(self.words).sum())
+
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def any(self):
+        return bool(self.words.any())
+
+    def view_slice(self, view, index, step=1):
+        """
+        Boolean slice for view 0/1/2 in display orientation, like SliceStore.slice.
+
+        step subsamples the slice like a pyramid level (every step-th voxel
+        from the first), so the result matches that level's slice shape.
+        """
+        if view == 0:
+            return self.unpack_rows(self.words[index])[::step, ::step]
+        elif view == 1:
+            return np.flipud(self.unpack_rows(self.words[::step, index])[:, ::step])
+        word, bit = divmod(index, WORD_BITS)
+        column = (self.words[::step, ::step, word] >> np.uint64(bit)) & ONE
+        return np.flipud(column.astype(bool))
+
+    def bounds(self):
+        """(start, stop) voxel range of the set voxels along z, y and x, or None if empty."""
+        rows = self.words.any(axis=2)
+        if not rows.any():
+            return None
+        z = np.flatnonzero(rows.any(axis=1))
+        y = np.flatnonzero(rows.any(axis=0))
+        columns = np.flatnonzero(self.unpack_rows(np.bitwise_or.reduce(self.words, axis=(0, 1))))
+        return (z[0], z[-1] + 1), (y[0], y[-1] + 1), (columns[0], columns[-1] + 1)
+
+
+def shift_x(words, distance):
+    """Packed rows moved by distance voxels along x: result[x] = words[x - distance]."""
+    count = words.shape[-1]
+    offset, bit = divmod(abs(distance), WORD_BITS)
+    out = np.zeros_like(words)
+    if offset >= count:
+        return out
+    if distance > 0:
+        out[..., offset:] = words[..., :count - offset]
+        if bit:
+            carry = out[..., :-1] >> np.uint64(WORD_BITS - bit)
+            out <<= np.uint64(bit)
+            out[..., 1:] |= carry
+    else:
+        out[..., :count - offset] = words[..., offset:]
+        if bit:
+            carry = out[..., 1:] << np.uint64(WORD_BITS - bit)
+            out >>= np.uint64(bit)
+            out[..., :-1] |= carry
+    return out
+
+
+def fill_runs(reached, allowed, axis, length):
+    """
+    Extend reached (packed, a subset of allowed) over the whole runs of allowed
+    voxels it touches along one axis, both ways, in place.
+
+    Runs are filled by doubling: after the step of distance d, every voxel
+    within 2d of a reached voxel along an allowed run is reached. So a run of
+    n voxels takes log2(n) whole-array steps instead of n.
+    """
+    for direction in (1, -1):
+        gate = allowed.copy()  # gate[i]: the last `distance` voxels up to i are all allowed
+        distance = 1
+        while distance < length:
+            if axis == 2:
+                reached |= shift_x(reached, direction * distance) & gate
+                gate &= shift_x(gate, direction * distance)
+            else:
+                index = [slice(None)] * 3
+                target, source = index.copy(), index.copy()
+                if direction > 0:
+                    target[axis], source[axis] = slice(distance, None), slice(None, -distance)
+                else:
+                    target[axis], source[axis] = slice(None, -distance), slice(distance, None)
+                target, source = tuple(target), tuple(source)
+                reached[target] |= reached[source] & gate[target]
+                gate[target] &= gate[source].copy()
+            distance *= 2
+
+
+def grow(reached, allowed, max_sweeps=None):
+    """
+    Flood reached (packed words) through allowed with 6-connectivity, in place.
+
+    Each sweep fills along x, y and z; sweeps repeat until nothing changes, so
+    their number follows the turns of the region's paths, not its size.
+    Returns the number of sweeps.
+    """
+    reached &= allowed
+    lengths = (allowed.shape[0], allowed.shape[1], allowed.shape[2] * WORD_BITS)
+    sweeps = 0
+    while max_sweeps is None or sweeps < max_sweeps:
+        before = reached.copy()
+        for axis in (2, 1, 0):
+            fill_runs(reached, allowed, axis, lengths[axis])
+        sweeps += 1
+        if np.array_equal(before, reached):
+            break
+    return sweeps
+
+
+class RegionGrower:
+    """
+    Seeded 3D region growing: the 6-connected voxels within tolerance of the
+    seed voxel's intensity.
+
+    The region only grows with the tolerance, so every grown region is kept
+    as a packed snapshot (up to MAX_SNAPSHOTS). A new tolerance starts from
+    the largest snapshot below it and is confined to the smallest snapshot
+    above it, so moving the tolerance slider only floods the difference.
+    Flooding works on packed bitsets in a box around the region that is
+    widened whenever the region reaches its edge.
+    """
+
+    def __init__(self, volume, seed):
+        self.volume = volume
+        self.shape = volume.shape
+        self.seed = tuple(int(min(max(round(c), 0), size - 1)) for c, size in zip(seed, volume.shape))
+        self.seed_value = volume[self.seed].item()
+        self.snapshots = {}  # tolerance -> BitMask
+        self.last_sweeps = 0
+        self.last_seconds = 0.0
+
+    def allowed(self, tolerance, box):
+        """Packed voxels within tolerance of the seed value, inside box."""
+        (z0, z1), (y0, y1) = box
+        block = np.asarray(self.volume[z0:z1, y0:y1])
+        low, high = self.seed_value - tolerance, self.seed_value + tolerance
+        return BitMask.pack((block >= low) & (block <= high)).words
+
+    def grow(self, tolerance):
+        """Region for a tolerance, as a BitMask over the whole volume."""
+        start = time.perf_counter()
+        tolerance = float(tolerance)
+        if tolerance in self.snapshots:
+            self.last_sweeps, self.last_seconds = 0, time.perf_counter() - start
+            return self.snapshots[tolerance]
+
+        below = max((t for t in self.snapshots if t < tolerance), default=None)
+        above = min((t for t in self.snapshots if t > tolerance), default=None)
+        result = BitMask(self.shape)
+        if below is not None:
+            result.words[:] = self.snapshots[below].words
+        else:
+            z, y, x = self.seed
+            result.words[z, y, x // WORD_BITS] = ONE << np.uint64(x % WORD_BITS)
+        limit = self.snapshots[above] if above is not None else None
+
+        self.last_sweeps = 0
+        box = self.initial_box(result, limit)
+        while True:
+            (z0, z1), (y0, y1) = box
+            allowed = self.allowed(tolerance, box)
+            if limit is not None:
+                allowed &= limit.words[z0:z1, y0:y1]
+            reached = result.words[z0:z1, y0:y1].copy()
+            self.last_sweeps += grow(reached, allowed)
+            result.words[z0:z1, y0:y1] = reached
+            # Confined to a snapshot, the region cannot leave its box
+            wider = box if limit is not None else self.widen(box, reached)
+            if wider == box:
+                break
+            box = wider
+
+        self.remember(tolerance, result)
+        self.last_seconds = time.perf_counter() - start
+        return result
+
+    def initial_box(self, region, limit):
+        """z/y range of the region plus a margin; within the limit snapshot if there is one."""
+        if limit is not None:
+            bounds = limit.bounds()
+            return bounds[0], bounds[1]
+        (z0, z1), (y0, y1), _ = region.bounds()
+        nz, ny = self.shape[:2]
+        return ((max(0, z0 - GROW_MARGIN), min(nz, z1 + GROW_MARGIN)),
+                (max(0, y0 - GROW_MARGIN), min(ny, y1 + GROW_MARGIN)))
+
+    def widen(self, box, reached):
+        """A larger box where the region touches an edge of box that is not the volume's."""
+        (z0, z1), (y0, y1) = box
+        nz, ny = self.shape[:2]
+        rows = reached.any(axis=2)
+        if z0 > 0 and rows[0].any():
+            z0 = max(0, z0 - 2 * GROW_MARGIN)
+        if z1 < nz and rows[-1].any():
+            z1 = min(nz, z1 + 2 * GROW_MARGIN)
+        if y0 > 0 and rows[:, 0].any():
+            y0 = max(0, y0 - 2 * GROW_MARGIN)
+        if y1 < ny and rows[:, -1].any():
+            y1 = min(ny, y1 + 2 * GROW_MARGIN)
+        return (z0, z1), (y0, y1)
+
+    def remember(self, tolerance, mask):
+        self.snapshots[tolerance] = mask
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            # Keep the extremes, which bound any new tolerance; drop the one nearest another
+            ordered = sorted(self.snapshots)
+            gaps = [(ordered[i + 1] - ordered[i - 1], ordered[i]) for i in range(1, len(ordered) - 1)]
+            self.snapshots.pop(min(gaps)[1])
+
+    @property
+    def nbytes(self):
+        return sum(mask.nbytes for mask in self.snapshots.values())
+
+
+def changed_bounds(old, new):
+    """Voxel bounds of the difference between two masks (None when equal or both missing)."""
+    if old is None and new is None:
+        return None
+    if old is None or new is None:
+        return (old or new).bounds()
+    return BitMask(new.shape, old.words ^ new.words).bounds()
+
@@ -0,0 +1,300 @@
+import atexit
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from volume_geometry import VolumeGeometry
+
+try:
+    import fcntl
+except ImportError:  # No cross-process lock; the store is disabled
+    fcntl = None
+
+# Set to 0 to keep every volume private to its process
+SHARED_ENV_VAR = 'MPR_SHARED_VOLUMES'
+SEGMENT_PREFIX = 'mpr_volume_'
+# JSON metadata ahead of the voxels; also keeps the voxels page-aligned
+HEADER_BYTES = 4096
+MAGIC = b'MPRSHM1\0'
+# How often a process waiting for another one's decode checks on it
+WAIT_INTERVAL = 0.05
+LOCK_PATH = os.path.join(tempfile.gettempdir(), 'mpr_shared_volumes.lock')
+SHM_DIR = '/dev/shm'
+
+
+def study_key(path):
+    """Key of a source file or folder; changes with its mtime and size."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]
+
+
+if sys.version_info >= (3, 13):
+    def open_segment(name, create=False, size=0):
+        """
+        A SharedMemory block that outlives this process unless unlinked.
+
+        Python's resource tracker unlinks the blocks a process created or
+        attached when it exits, which would pull a volume from under the other
+        viewers; blocks are reference counted here instead.
+        """
+        return shared_memory.SharedMemory(name, create=create, size=size, track=False)
+
+    def unlink_segment(segment):
+        segment.unlink()
+else:
+    # Before 3.13 every block is tracked: the tracker is told to forget it as soon as it is
+    # opened, and reminded of it just before unlink(), which unregisters it once more
+    def open_segment(name, create=False, size=0):
+        """A SharedMemory block that outlives this process unless unlinked (see above)."""
+        segment = shared_memory.SharedMemory(name, create=create, size=size)
+        resource_tracker.unregister(tracker_name(segment), 'shared_memory')
+        return segment
+
+    def unlink_segment(segment):
+        resource_tracker.register(tracker_name(segment), 'shared_memory')
+        segment.unlink()
+
+    def tracker_name(segment):
+        return '/' + segment.name  # The tracker knows POSIX blocks by their shm_open name
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class StoreLock:
+    """Exclusive lock around metadata updates, shared by every viewer process of the user."""
+
+    def __enter__(self):
+        self.file = open(LOCK_PATH, 'a')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def read_metadata(segment):
+    if bytes(segment.buf[:len(MAGIC)]) != MAGIC:
+        return None
+    return json.loads(bytes(segment.buf[len(MAGIC):HEADER_BYTES]).rstrip(b'\0').decode('utf-8'))
+
+
+def write_metadata(segment, metadata):
+    data = MAGIC + json.dumps(metadata).encode('utf-8')
+    if len(data) > HEADER_BYTES:
+        raise ValueError("shared volume metadata too large")
+    segment.buf[:HEADER_BYTES] = data + b'\0' * (HEADER_BYTES - len(data))
+
+
+def live_holders(metadata):
+    """Drop the holders of processes that died without releasing their volume."""
+    metadata['holders'] = [pid for pid in metadata['holders'] if process_alive(pid)]
+    return metadata['holders']
+
+
+class SegmentVoxels:
+    """
+    The voxels of a segment as an array interface that holds the SharedMemory
+    object. Every NumPy view of the volume keeps this alive, so the mapping is
+    only closed (by SharedMemory itself, once collected) after the last view
+    is gone, whoever released the handle.
+    """
+
+    def __init__(self, segment, shape, dtype):
+        self.segment = segment
+        voxels = np.frombuffer(segment.buf, dtype, int(np.prod(shape)), HEADER_BYTES)
+        self.__array_interface__ = dict(voxels.__array_interface__, shape=tuple(shape))
+
+
+class SharedVolume:
+    """
+    One process's handle on a volume in shared memory.
+
+    volume is a NumPy view of the segment (read-only once published). The
+    holders list in the segment's metadata counts the handles of every
+    process; release() drops this one and unlinks the segment when it was
+    the last.
+    """
+
+    def __init__(self, store, key, segment, metadata):
+        self.store = store
+        self.key = key
+        self.segment = segment
+        self.shape = tuple(metadata['shape'])
+        self.dtype = np.dtype(metadata['dtype'])
+        self.geometry = None
+        if metadata.get('spacing') is not None:
+            self.geometry = VolumeGeometry(metadata['spacing'], metadata['origin'], metadata['direction'])
+        self.volume = np.asarray(SegmentVoxels(segment, self.shape, self.dtype))
+        self.released = False
+
+    @property
+    def nbytes(self):
+        return self.volume.nbytes
+
+    def publish(self, geometry):
+        """Mark a filled segment ready for other processes to attach."""
+        with StoreLock():
+            metadata = read_metadata(self.segment)
+            metadata.update(ready=True, spacing=geometry.spacing, origin=geometry.origin,
+                            direction=geometry.direction.tolist())
+            write_metadata(self.segment, metadata)
+        self.geometry = geometry
+        self.volume.flags.writeable = False
+
+    def release(self):
+        """Drop this handle; the last one in any process frees the memory."""
+        if self.released:
+            return
+        self.released = True
+        with StoreLock():
+            metadata = read_metadata(self.segment)
+            if metadata is not None:
+                if os.getpid() in metadata['holders']:
+                    metadata['holders'].remove(os.getpid())
+                if live_holders(metadata):
+                    write_metadata(self.segment, metadata)
+                else:
+                    unlink_segment(self.segment)
+        self.detach()
+
+    def abandon(self):
+        """Throw away a segment that could not be filled."""
+        with StoreLock():
+            unlink_segment(self.segment)
+        self.released = True
+        self.detach()
+
+    def detach(self):
+        """
+        Drop this handle's references to the segment without closing it:
+        slices, shadows or a pyramid thread may still hold views of the
+        volume, and the memory goes when the last of them does.
+        """
+        self.store.handles.discard(self)
+        self.volume = None
+        self.segment = None
+
+
+class SharedVolumeStore:
+    """
+    Volumes decoded once into multiprocessing.shared_memory and attached by
+    every viewer process that opens the same study.
+
+    A segment holds JSON metadata (shape, dtype, geometry, whether it is
+    ready, the PIDs of the processes holding it) followed by the voxels.
+    The first process to open a study creates the segment and decodes into
+    it; the others attach to a zero-copy view once it is published, waiting
+    for a decode in progress. Holders that died are pruned whenever the
+    metadata is touched, so a crashed viewer does not pin a volume.
+    """
+
+    def __init__(self):
+        self.handles = set()
+        atexit.register(self.release_all)
+
+    @staticmethod
+    def segment_name(key):
+        return SEGMENT_PREFIX + key
+
+    def create(self, key, shape, dtype):
+        """A writable SharedVolume for a new segment, or None if it exists or cannot be made."""
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        metadata = {'shape': list(shape), 'dtype': np.dtype(dtype).str, 'ready': False,
+                    'creator': os.getpid(), 'holders': [os.getpid()]}
+        try:
+            with StoreLock():
+                segment = open_segment(self.segment_name(key), create=True, size=HEADER_BYTES + max(nbytes, 1))
+                write_metadata(segment, metadata)
+        except (FileExistsError, OSError):
+            return None
+        handle = SharedVolume(self, key, segment, metadata)
+        self.handles.add(handle)
+        return handle
+
+    def attach(self, key, should_stop=lambda: False):
+        """
+        Attach to a published segment; waits while another live process is
+        still decoding it. None if there is none (or the decode was stopped).
+        """
+        while True:
+            with StoreLock():
+                try:
+                    segment = open_segment(self.segment_name(key))
+                except (FileNotFoundError, OSError):
+                    return None
+                metadata = read_metadata(segment)
+                if metadata is None:
+                    segment.close()
+                    return None
+                live_holders(metadata)
+                if metadata['ready']:
+                    metadata['holders'].append(os.getpid())
+                    write_metadata(segment, metadata)
+                    handle = SharedVolume(self, key, segment, metadata)
+                    handle.volume.flags.writeable = False
+                    self.handles.add(handle)
+                    return handle
+                if not process_alive(metadata['creator']):
+                    # The decoding process died; start over
+                    unlink_segment(segment)
+                    segment.close()
+                    return None
+                segment.close()
+            if should_stop():
+                return None
+            time.sleep(WAIT_INTERVAL)
+
+    def release_all(self):
+        for handle in list(self.handles):
+            handle.release()
+
+    def cleanup_orphans(self):
+        """Unlink segments left by viewers that all died; returns how many were removed."""
+        if not os.path.isdir(SHM_DIR):
+            return 0
+        removed = 0
+        for name in os.listdir(SHM_DIR):
+            if not name.startswith(SEGMENT_PREFIX):
+                continue
+            with StoreLock():
+                try:
+                    segment = open_segment(name)
+                except OSError:
+                    continue
+                metadata = read_metadata(segment)
+                if metadata is not None and not live_holders(metadata):
+                    unlink_segment(segment)
+                    removed += 1
+                segment.close()
+        return removed
+
+
+_default_store = None
+
+
+def default_store():
+    """This process's store, or None when disabled through the environment or unsupported."""
+    global _default_store
+    if fcntl is None or os.environ.get(SHARED_ENV_VAR, '1') == '0':
+        return None
+    if _default_store is None:
+        _default_store = SharedVolumeStore()
+        _default_store.cleanup_orphans()
+    return _default_store
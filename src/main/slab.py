@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SLAB_MODES = ('MIP', 'MinIP', 'Average')
+# Blocks of partial extrema kept per view; the window spans at most two at a time
+MAX_CACHED_BLOCKS = 4
+
+
+class SlabProjector:
+    """
+    Thick-slab projection (MIP, MinIP or average) through one MPR view.
+
+    The slab for slice index i covers the thickness slices centred on i,
+    clipped to the volume. Slices come from slice_source(index), in display
+    orientation.
+
+    MIP/MinIP use the van Herk/Gil-Werman scheme: the slice axis is cut into
+    blocks of `thickness` slices and, per block, running extrema from the
+    block start (prefix) and towards the block end (suffix) are built on
+    first use. A slab spans at most two blocks, so its projection is one
+    np.maximum of a suffix and a prefix slice; stepping through the volume
+    builds a new block every `thickness` steps, about three slice operations
+    per step whatever the thickness.
+
+    Average keeps the running sum of the current slab and only adds and
+    subtracts the slices that enter and leave it.
+
+    Slabs are requested from the GUI and the cine worker, so access is locked.
+    """
+
+    def __init__(self, slice_source, slice_count, mode, thickness, dtype):
+        if mode not in SLAB_MODES:
+            raise ValueError(f"unknown slab mode {mode!r}")
+        self.slice_source = slice_source
+        self.slice_count = slice_count
+        self.mode = mode
+        self.thickness = max(1, int(thickness))
+        self.dtype = np.dtype(dtype)
+        self.reduce = np.minimum if mode == 'MinIP' else np.maximum
+        self.blocks = OrderedDict()  # (block, 'prefix' | 'suffix') -> (thickness, rows, cols)
+        self.window = None
+        self.total = None
+        self.slices_read = 0
+        self.lock = threading.Lock()
+
+    def bounds(self, index):
+        """[start, stop) slice range of the slab centred on index."""
+        start = index - self.thickness // 2
+        return max(0, start), min(self.slice_count, start + self.thickness)
+
+    def slab(self, index):
+        """Projected (rows, cols) slice for the slab centred on index, in the volume dtype."""
+        start, stop = self.bounds(index)
+        with self.lock:
+            if self.mode == 'Average':
+                return self.average(start, stop)
+            return self.extremum(start, stop)
+
+    def read(self, index):
+        self.slices_read += 1
+        return np.asarray(self.slice_source(index))
+
+    def extremum(self, start, stop):
+        first, last = start // self.thickness, (stop - 1) // self.thickness
+        if first != last:
+            return self.reduce(self.partial(first, 'suffix')[start - first * self.thickness],
+                               self.partial(last, 'prefix')[stop - 1 - last * self.thickness])
+        block_start = first * self.thickness
+        block_stop = min(self.slice_count, block_start + self.thickness)
+        if start == block_start:
+            return self.partial(first, 'prefix')[stop - 1 - block_start].copy()
+        if stop == block_stop:
+            return self.partial(first, 'suffix')[start - block_start].copy()
+        # Not reached for slabs of the block size; kept for completeness
+        result = self.read(start).copy()
+        for index in range(start + 1, stop):
+            self.reduce(result, self.read(index), out=result)
+        return result
+
+    def partial(self, block, kind):
+        """Running extrema of a block, from its first slice (prefix) or to its last (suffix)."""
+        key = (block, kind)
+        partial = self.blocks.get(key)
+        if partial is not None:
+            self.blocks.move_to_end(key)
+            return partial
+        block_start = block * self.thickness
+        count = min(self.thickness, self.slice_count - block_start)
+        order = range(count) if kind == 'prefix' else range(count - 1, -1, -1)
+        partial = None
+        previous = None
+        for offset in order:
+            current = self.read(block_start + offset)
+            if partial is None:
+                partial = np.empty((count,) + current.shape, self.dtype)
+                partial[offset] = current
+            else:
+                self.reduce(partial[previous], current, out=partial[offset])
+            previous = offset
+        self.blocks[key] = partial
+        while len(self.blocks) > MAX_CACHED_BLOCKS:
+            self.blocks.popitem(last=False)
+        return partial
+
+    def average(self, start, stop):
+        if self.window is not None:
+            old_start, old_stop = self.window
+            leaving = [i for i in range(old_start, old_stop) if not start <= i < stop]
+            entering = [i for i in range(start, stop) if not old_start <= i < old_stop]
+            if len(leaving) + len(entering) >= stop - start:
+                self.window = None
+        if self.window is None:
+            first = self.read(start)
+            accumulate = np.float64 if self.dtype.kind == 'f' else np.int64
+            self.total = first.astype(accumulate)
+            leaving, entering = [], range(start + 1, stop)
+        for index in leaving:
+            self.total -= self.read(index)
+        for index in entering:
+            self.total += self.read(index)
+        self.window = (start, stop)
+
+        count = stop - start
+        if self.dtype.kind == 'f':
+            return (self.total / count).astype(self.dtype)
+        return ((self.total + count // 2) // count).astype(self.dtype)
@@ -0,0 +1,103 @@
+import threading
+
+import numpy as np
+
+# Default memory allowed for transposed shadow copies
+DEFAULT_MEMORY_CAP = 2 * 1024 ** 3
+# Planes copied per step while building a shadow, so cancellation stays responsive
+BUILD_CHUNK_PLANES = 16
+
+
+class SliceStore:
+    """
+    Slice extraction in display orientation for the three MPR views.
+
+    The volume is C-ordered (z, y, x): axial planes are contiguous, but coronal
+    rows are strided by a plane and sagittal columns by a row. Within
+    memory_cap, contiguous shadow copies are built on a background thread:
+
+        coronal shadow   (y, z, x), z already flipped for display
+        sagittal shadow  (x, z, y), z already flipped for display
+
+    The strategy is picked from the cap: both shadows, only the sagittal one
+    (the worst gather), or none. Until a shadow is ready, slices are read
+    straight from the volume, so the store can be used immediately.
+    """
+
+    def __init__(self, volume, memory_cap=DEFAULT_MEMORY_CAP):
+        self.volume = volume
+        self.memory_cap = memory_cap
+        self.coronal_shadow = None
+        self.sagittal_shadow = None
+        self._cancelled = False
+        self._thread = None
+
+        if 2 * volume.nbytes <= memory_cap:
+            self.strategy = 'shadow'
+            self.pending = ['sagittal', 'coronal']
+        elif volume.nbytes <= memory_cap:
+            self.strategy = 'sagittal-shadow'
+            self.pending = ['sagittal']
+        else:
+            self.strategy = 'direct'
+            self.pending = []
+
+    def start(self):
+        """Build the shadow copies in the background."""
+        if self.pending and self._thread is None:
+            self._thread = threading.Thread(target=self._build, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop a build in progress and release the shadows."""
+        self._cancelled = True
+        if self._thread is not None:
+            self._thread.join()
+        self.coronal_shadow = None
+        self.sagittal_shadow = None
+
+    def _build(self):
+        for name in self.pending:
+            shadow = self._build_shadow(name)
+            if shadow is None:
+                return
+            setattr(self, f'{name}_shadow', shadow)
+
+    def _build_shadow(self, name):
+        nz, ny, nx = self.volume.shape
+        if name == 'coronal':
+            shadow = np.empty((ny, nz, nx), self.volume.dtype)
+            target = shadow.transpose(1, 0, 2)  # (z, y, x) view onto the shadow
+        else:
+            shadow = np.empty((nx, nz, ny), self.volume.dtype)
+            target = shadow.transpose(1, 2, 0)
+        # Read the source plane by plane (contiguous for a memmap too), writing flipped
+        for z_start in range(0, nz, BUILD_CHUNK_PLANES):
+            if self._cancelled:
+                return None
+            z_end = min(nz, z_start + BUILD_CHUNK_PLANES)
+            target[nz - z_end:nz - z_start] = self.volume[z_start:z_end][::-1]
+        return shadow
+
+    @property
+    def shadow_bytes(self):
+        return sum(s.nbytes for s in (self.coronal_shadow, self.sagittal_shadow) if s is not None)
+
+    def axial(self, index):
+        return self.volume[index, :, :]
+
+    def coronal(self, index):
+        shadow = self.coronal_shadow
+        if shadow is not None:
+            return shadow[index]
+        return np.flipud(self.volume[:, index, :])
+
+    def sagittal(self, index):
+        shadow = self.sagittal_shadow
+        if shadow is not None:
+            return shadow[index]
+        return np.flipud(self.volume[:, :, index])
+
+    def slice(self, view, index):
+        """Slice for view 0 (axial), 1 (coronal) or 2 (sagittal)."""
+        return (self.axial, self.coronal, self.sagittal)[view](index)
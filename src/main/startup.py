@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+# Print the startup report to stderr once the window is first painted
+REPORT_ENV_VAR = 'MPR_STARTUP_REPORT'
+# Heavy modules that should only be imported when a feature needs them
+DEFERRED_MODULES = ('vtk', 'SimpleITK', 'pydicom', 'matplotlib', 'nibabel')
+
+
+def process_age():
+    """Seconds since this process was created (Linux only; None elsewhere)."""
+    try:
+        with open('/proc/self/stat') as stat_file:
+            # Field 22 is the start time in clock ticks since boot; the command name may contain spaces
+            start_ticks = int(stat_file.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+    """
+    Wall-clock phases from interpreter start to the first painted window.
+
+    mark(name) closes the phase that started at the previous mark; the
+    viewer marks its import groups, the QApplication and the main window, and
+    watch_first_paint() adds the time until the window is on screen. Python's
+    own start-up (everything before this module was imported) is taken from
+    the process creation time where the OS reports it.
+    """
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        age = process_age()
+        self.origin = self.created - age if age is not None else None
+        self.phases = []
+        self.last = self.created
+        self.first_paint = None
+        self.deferred = None
+        self.paint_filter = None
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def watch_first_paint(self, widget, on_painted=None):
+        """Mark 'first paint' when widget is first painted, then call on_painted(self)."""
+        from PyQt5.QtCore import QEvent, QObject, QTimer
+
+        timer = self
+
+        class PaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint and timer.first_paint is None:
+                    obj.removeEventFilter(self)
+                    # Let the children finish painting the same frame
+                    QTimer.singleShot(0, painted)
+                return False
+
+        def painted():
+            timer.mark('first paint')
+            timer.first_paint = time.perf_counter()
+            timer.deferred = [name for name in DEFERRED_MODULES if name not in sys.modules]
+            if on_painted is not None:
+                on_painted(timer)
+
+        self.paint_filter = PaintFilter()
+        widget.installEventFilter(self.paint_filter)
+
+    def total(self):
+        """Seconds from process start (or from the first mark) to the last mark."""
+        start = self.origin if self.origin is not None else self.created
+        return self.last - start
+
+    def as_dict(self):
+        phases = {}
+        if self.origin is not None:
+            phases['python startup'] = self.created - self.origin
+        phases.update(self.phases)
+        return {'phases_ms': {name: round(seconds * 1000.0, 2) for name, seconds in phases.items()},
+                'total_ms': round(self.total() * 1000.0, 2),
+                'deferred_modules': self.deferred}
+
+    def report(self):
+        """Printable breakdown, one line per phase."""
+        data = self.as_dict()
+        label = 'first paint' if self.first_paint is not None else 'last mark'
+        lines = [f"Startup: {data['total_ms'] / 1000.0:.2f} s to {label}"]
+        for name, ms in data['phases_ms'].items():
+            lines.append(f"  {name:<24} {ms:9.1f} ms")
+        if self.deferred is not None:
+            loaded = [name for name in DEFERRED_MODULES if name not in self.deferred]
+            lines.append(f"  not yet imported: {', '.join(self.deferred) or '-'}")
+            if loaded:
+                lines.append(f"  imported before first paint: {', '.join(loaded)}")
+        return '\n'.join(lines)
+
+    def export_to(self, profiler):
+        """Add the phases to a profiler's trace as consecutive spans."""
+        start = self.created
+        for name, seconds in self.phases:
+            profiler.complete(f"startup: {name}", start, start + seconds, category='startup')
+            start += seconds
+
+
+STARTUP = StartupTimer()
+
+
+def report_requested():
+    return os.environ.get(REPORT_ENV_VAR, '') not in ('', '0')
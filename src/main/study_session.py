@@ -0,0 +1,159 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Default bound on the memory held by cached studies, overridable in MB through the environment
+DEFAULT_SESSION_BUDGET = 4 << 30
+BUDGET_ENV_VAR = 'MPR_SESSION_BUDGET_MB'
+
+
+def source_stamp(path):
+    """(mtime, size) of a file or folder, so a changed source is not served from the cache."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def session_budget():
+    value = os.environ.get(BUDGET_ENV_VAR)
+    return int(float(value) * (1 << 20)) if value else DEFAULT_SESSION_BUDGET
+
+
+class CachedStudy:
+    """A loaded volume with everything derived from it, ready to be shown again."""
+
+    def __init__(self, path, volume, stats, luts, slice_store, pyramid, geometry=None, derived_from=None,
+                 time_series=None, shared_volume=None):
+        self.path = path
+        self.stamp = source_stamp(path)
+        self.volume = volume
+        self.stats = stats
+        self.luts = luts
+        self.slice_store = slice_store
+        self.pyramid = pyramid
+        self.geometry = geometry
+        # Source path of a volume computed from another study (e.g. resampled); None for files
+        self.derived_from = derived_from
+        # volume is the first timepoint of a 4D series; time_index the one last shown
+        self.time_series = time_series
+        self.time_index = 0
+        # SharedVolume handle when volume lives in shared memory; released with the study
+        self.shared_volume = shared_volume
+        self.crosshair = tuple(size // 2 for size in volume.shape)
+        self.region_grower = None
+        self.segmentation = None
+
+    @property
+    def nbytes(self):
+        """Memory held by the study; a memory-mapped volume is page cache and not counted."""
+        total = 0 if isinstance(self.volume, np.memmap) else self.volume.nbytes
+        if self.slice_store is not None:
+            total += self.slice_store.shadow_bytes
+        if self.pyramid is not None:
+            total += sum(level.nbytes for level in self.pyramid.levels[1:])
+        for lut in self.luts:
+            total += lut.values.nbytes + (lut.table.nbytes if lut.table is not None else 0)
+        if self.region_grower is not None:
+            total += self.region_grower.nbytes
+        if self.time_series is not None:
+            total += self.time_series.nbytes
+        return total
+
+    def close(self):
+        if self.slice_store is not None:
+            self.slice_store.close()
+        if self.pyramid is not None:
+            self.pyramid.close()
+        if self.time_series is not None:
+            self.time_series.close()
+        self.volume = None
+        if self.shared_volume is not None:
+            self.shared_volume.release()
+        self.shared_volume = None
+        self.slice_store = None
+        self.pyramid = None
+        self.time_series = None
+        self.region_grower = None
+        self.segmentation = None
+
+
+class StudySession:
+    """
+    The studies opened in this session, most recently used last.
+
+    Loaded studies stay in memory until the memory budget is exceeded; then
+    the least recently used ones are evicted, never the one on screen. Evicted
+    studies keep their place in the session and are simply read again when
+    selected. Derived studies (e.g. resampled copies) have nothing to be read
+    from and leave the session when evicted.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_SESSION_BUDGET):
+        self.memory_budget = memory_budget
+        self.studies = OrderedDict()
+        self.paths = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Cached study for path, or None (counted as a miss) if it has to be read."""
+        study = self.studies.get(path)
+        if study is not None and study.stamp != source_stamp(path):
+            self.discard(path)
+            study = None
+        if study is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.studies.move_to_end(path)
+        return study
+
+    def add(self, study):
+        """Cache a freshly loaded study as the active one and enforce the budget."""
+        self.discard(study.path)
+        self.studies[study.path] = study
+        if study.path not in self.paths:
+            self.paths.append(study.path)
+        self.enforce_budget()
+        return study
+
+    def discard(self, path):
+        study = self.studies.pop(path, None)
+        if study is not None:
+            study.close()
+            if study.derived_from is not None and path in self.paths:
+                # There is no file to read a derived volume from again
+                self.paths.remove(path)
+
+    def enforce_budget(self):
+        """
+        Evict least recently used studies until within budget; the most recent
+        (the one on screen) always stays. Returns the number evicted.
+        """
+        evicted = 0
+        while len(self.studies) > 1 and self.memory_bytes() > self.memory_budget:
+            self.discard(next(iter(self.studies)))
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def holds(self, obj):
+        """True if a slice store, pyramid or time series belongs to a cached study."""
+        return any(obj is study.slice_store or obj is study.pyramid or obj is study.time_series
+                   for study in self.studies.values())
+
+    def is_cached(self, path):
+        return path in self.studies
+
+    def memory_bytes(self):
+        return sum(study.nbytes for study in self.studies.values())
+
+    def summary(self):
+        """Cache state for the status bar."""
+        return (f"Studies: {len(self.studies)}/{len(self.paths)} cached, "
+                f"{self.memory_bytes() / (1 << 20):.0f}/{self.memory_budget / (1 << 20):.0f} MB, "
+                f"{self.hits} hits / {self.misses} misses")
@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Memory for decoded timepoints kept around the current one
+DEFAULT_CACHE_BYTES = 512 << 20
+MIN_CACHED_TIMEPOINTS = 3
+# Timepoints read ahead of the current one (and behind it, once those are in)
+PREFETCH_RADIUS = 2
+# Bytes between the elements touched to fault a memory-mapped timepoint in
+PAGE_BYTES = 4096
+
+
+def touch_pages(volume):
+    """Read one element per page of a memmap so the pages are resident when a slice needs them."""
+    flat = volume.reshape(-1)
+    step = max(1, PAGE_BYTES // flat.itemsize)
+    np.asarray(flat[::step]).max()
+
+
+class TimeSeries:
+    """
+    The 3D timepoints of a 4D series, read lazily one at a time.
+
+    read(t) gives the (z, y, x) volume of timepoint t: a view of a memmap for
+    uncompressed files (nothing is decoded; prefetching faults its pages in)
+    or a freshly decoded array. Timepoints are kept in an LRU bounded by
+    cache_bytes (memmaps cost nothing and are kept the same way), and after
+    every request the neighbours within PREFETCH_RADIUS are read on a
+    background thread, in the direction of travel first, so scrubbing and
+    temporal cine find them ready.
+
+    A compressed file can only be decoded in order; its decoder (see
+    volume_io.SeriesDecoder) fills the series on its own thread, and
+    available counts the leading timepoints that can be read so far. If the
+    file turns out to be damaged, decoding stops there and error describes
+    why.
+    """
+
+    def __init__(self, read, count, available=None, decoder=None, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.read = read
+        self.count = count
+        self.available = count if available is None else available
+        self.decoder = decoder
+        self.cache_bytes = cache_bytes
+        self.max_cached = MIN_CACHED_TIMEPOINTS
+        self.cached = OrderedDict()  # t -> volume
+        self.current = 0
+        self.direction = 1
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.wanted = threading.Condition(self.lock)
+        self.queue = []
+        self._closed = False
+        self._prefetch_thread = None
+        self._decode_thread = None
+
+    def start(self):
+        """Start the prefetcher, and the decoder of a compressed series."""
+        if self._prefetch_thread is None:
+            self._prefetch_thread = threading.Thread(target=self._prefetch, daemon=True)
+            self._prefetch_thread.start()
+        if self.decoder is not None and self._decode_thread is None:
+            self._decode_thread = threading.Thread(target=self._decode, daemon=True)
+            self._decode_thread.start()
+
+    def close(self):
+        """Stop the background threads and drop the cached timepoints."""
+        with self.lock:
+            self._closed = True
+            self.wanted.notify_all()
+        for thread in (self._prefetch_thread, self._decode_thread):
+            if thread is not None:
+                thread.join()
+        if self.decoder is not None and self._decode_thread is None:
+            self.decoder.close()  # Never started
+        self.cached.clear()
+
+    @property
+    def decoding(self):
+        return self.available < self.count and not self._closed and self.error is None
+
+    def timepoint(self, t):
+        """The volume of timepoint t (clamped to the available ones); queues its neighbours."""
+        t = int(min(max(t, 0), self.available - 1))
+        with self.lock:
+            if t != self.current:
+                self.direction = 1 if t > self.current else -1
+            self.current = t
+            volume = self.cached.get(t)
+            if volume is not None:
+                self.cached.move_to_end(t)
+                self.hits += 1
+        if volume is None:
+            self.misses += 1
+            volume = self.load(t)
+        self.queue_neighbours(t)
+        return volume
+
+    def load(self, t):
+        volume = self.read(t)
+        with self.lock:
+            if self.max_cached == MIN_CACHED_TIMEPOINTS and volume.nbytes:
+                self.max_cached = max(MIN_CACHED_TIMEPOINTS, self.cache_bytes // volume.nbytes)
+            self.cached[t] = volume
+            self.cached.move_to_end(t)
+            self.evict()
+        return volume
+
+    def evict(self):
+        """Drop the cached timepoints farthest from the current one beyond max_cached."""
+        while len(self.cached) > self.max_cached:
+            farthest = max(self.cached, key=lambda t: abs(t - self.current))
+            del self.cached[farthest]
+
+    def queue_neighbours(self, t):
+        with self.lock:
+            ahead = [t + self.direction * d for d in range(1, PREFETCH_RADIUS + 1)]
+            behind = [t - self.direction * d for d in range(1, PREFETCH_RADIUS + 1)]
+            self.queue = [n for n in ahead + behind
+                          if 0 <= n < self.available and n not in self.cached]
+            if self.queue:
+                self.wanted.notify()
+
+    def _prefetch(self):
+        while True:
+            with self.lock:
+                while not self.queue and not self._closed:
+                    self.wanted.wait()
+                if self._closed:
+                    return
+                t = self.queue.pop(0)
+                if t in self.cached or abs(t - self.current) > PREFETCH_RADIUS:
+                    continue
+            volume = self.load(t)
+            if isinstance(volume, np.memmap):
+                touch_pages(volume)
+            self.prefetched += 1
+
+    def _decode(self):
+        def on_timepoint(available):
+            self.available = available
+            if abs(available - 1 - self.current) <= PREFETCH_RADIUS:
+                self.queue_neighbours(self.current)
+
+        def on_error(exc):
+            self.error = f"decoding stopped after {self.available} of {self.count} timepoints: {exc}"
+        self.decoder.run(on_timepoint, lambda: self._closed, on_error)
+
+    @property
+    def nbytes(self):
+        """Memory held by decoded timepoints; memmaps are page cache and not counted."""
+        with self.lock:
+            return sum(v.nbytes for v in self.cached.values() if not isinstance(v, np.memmap))
+
+    def summary(self):
+        decoded = f", {self.available}/{self.count} decoded" if self.available < self.count else ""
+        if self.error is not None:
+            decoded += " (file damaged)"
+        return (f"{len(self.cached)} cached, {self.prefetched} prefetched, "
+                f"{self.hits} hits / {self.misses} misses{decoded}")
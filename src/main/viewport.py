@@ -0,0 +1,121 @@
+import numpy as np
+
+from profiler import traced
+
+
+class SliceViewport:
+    """
+    One MPR viewport drawn with persistent matplotlib artists.
+
+    The AxesImage, the two crosshair lines and the intersection marker are
+    created once per volume; a frame only swaps their data. The artists are
+    animated, so a full canvas draw leaves them out of the cached background
+    and a frame can be pushed by blitting the axes region alone.
+
+    Frames are uint8 RGBA with the colormap already applied, so matplotlib
+    does no normalization or colormapping when drawing them. Anisotropic
+    voxels are shown by the axes aspect, so data coordinates stay voxel
+    indices.
+    """
+
+    def __init__(self, ax, canvas, title):
+        self.ax = ax
+        self.canvas = canvas
+        self.title = title
+        self.image = None
+        self.vline = None
+        self.hline = None
+        self.marker = None
+        self.background = None
+        self.shape = None
+        self.buffer = None
+        self.aspect = 1.0  # Height of a displayed pixel relative to its width
+        self.ax.set_title(title)
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def reset(self):
+        """Drop the artists so the next frame rebuilds them (e.g. for a new volume)."""
+        self.ax.clear()
+        self.ax.set_title(self.title)
+        self.image = None
+        self.vline = None
+        self.hline = None
+        self.marker = None
+        self.background = None
+        self.shape = None
+
+    def setup(self, rgba, shape):
+        """Create the image and crosshair artists for the current volume."""
+        self.reset()
+        self.shape = shape
+        # The extent is fixed in full-resolution voxel units, so coarser data fills the same area
+        extent = (-0.5, shape[1] - 0.5, shape[0] - 0.5, -0.5)
+        self.image = self.ax.imshow(rgba, extent=extent, aspect=self.aspect, animated=True)
+        self.vline = self.ax.axvline(0, color='r', linestyle='--', animated=True)
+        self.hline = self.ax.axhline(0, color='r', linestyle='--', animated=True)
+        self.marker, = self.ax.plot([0], [0], 'ro', markersize=5, animated=True)
+        self.ax.axis('on')
+
+    def set_aspect(self, aspect):
+        """Show pixels aspect times as high as wide (row spacing over column spacing)."""
+        self.aspect = aspect
+        if self.image is not None:
+            self.ax.set_aspect(aspect)
+
+    def pixel_buffer(self, rows, cols):
+        """Reusable (rows, cols, 4) uint8 buffer to build the next frame in."""
+        if self.buffer is None or self.buffer.shape[:2] != (rows, cols):
+            self.buffer = np.empty((rows, cols, 4), np.uint8)
+        return self.buffer
+
+    def display_region(self, shape, slice_shape):
+        """The whole slice; matplotlib resamples the full image on every draw anyway."""
+        return (slice(None), slice(None)), None, None
+
+    def covers_view(self):
+        return True
+
+    def set_image(self, rgba, shape=None, extent=None, slice_shape=None, steps=None):
+        """
+        Swap the displayed pixels, creating the artists on first use.
+
+        shape is the full-resolution (rows, cols) of the slice; rgba may be
+        smaller (a pyramid level) and is stretched over the same extent. The
+        region arguments are accepted for parity with RasterViewport; frames
+        here always cover the whole slice.
+        """
+        shape = rgba.shape[:2] if shape is None else tuple(shape)
+        if self.image is None or self.shape != shape:
+            self.setup(rgba, shape)
+            return
+        # The persistent AxesImage only gets new data; the artists and axes are not rebuilt
+        self.image.set_data(rgba)
+
+    def set_crosshair(self, x, y):
+        """Move the crosshair lines and the intersection marker."""
+        if self.image is None:
+            return
+        self.vline.set_xdata([x, x])
+        self.hline.set_ydata([y, y])
+        self.marker.set_data([x], [y])
+
+    def draw_artists(self):
+        for artist in (self.image, self.vline, self.hline, self.marker):
+            if artist is not None:
+                self.ax.draw_artist(artist)
+
+    def on_draw(self, event):
+        """Cache the static background after every full draw (resize, zoom, pan)."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_artists()
+
+    @traced('SliceViewport.blit')
+    def blit(self):
+        """Push the current frame, redrawing only the axes region."""
+        if self.background is None:
+            # No cached background yet; a full draw captures one via on_draw.
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.ax.bbox)
@@ -0,0 +1,156 @@
+import hashlib
+import os
+
+import numpy as np
+
+from nifti import NiftiHeader
+
+# Where decoded volumes are kept between sessions
+VOLUME_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mpr_viewer', 'volumes')
+DEFAULT_CACHE_BYTES = 20 << 30
+# Cache size in MB; 0 disables the cache
+CACHE_ENV_VAR = 'MPR_VOLUME_CACHE_MB'
+# A NIfTI-1 header plus the 4-byte extension flag
+DATA_OFFSET = 352
+
+
+def default_cache():
+    """The viewer's volume cache, or None when disabled through the environment."""
+    value = os.environ.get(CACHE_ENV_VAR)
+    max_bytes = int(float(value) * (1 << 20)) if value else DEFAULT_CACHE_BYTES
+    return VolumeCache(max_bytes=max_bytes) if max_bytes > 0 else None
+
+
+class CacheEntry:
+    """A cache file being filled; volume is a writable memmap of its voxel block."""
+
+    def __init__(self, cache, temp_path, final_path, volume):
+        self.cache = cache
+        self.temp_path = temp_path
+        self.final_path = final_path
+        self.volume = volume
+
+    def commit(self):
+        """Publish the filled file and return the volume (still backed by it)."""
+        volume = self.volume
+        try:
+            volume.flush()
+            os.replace(self.temp_path, self.final_path)
+        except OSError:
+            self.abandon()  # The mapping stays valid after the file is removed
+            return volume
+        self.cache.evict(keep=self.final_path)
+        return volume
+
+    def abandon(self):
+        self.volume = None
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class VolumeCache:
+    """
+    Decoded copies of compressed or rescaled NIfTI volumes.
+
+    An entry is an uncompressed, native-order NIfTI-1 file holding the
+    volume as the viewer shows it (already rescaled), with the source's
+    voxel sizes and orientation; for a time series, every timepoint. It is memory-mapped like any uncompressed
+    .nii, so a cache hit reads nothing up front. Entries are keyed by the
+    source's path, mtime and size. When the cache grows past max_bytes, the
+    least recently used entries are deleted.
+    """
+
+    def __init__(self, directory=VOLUME_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def entry_path(self, source_path):
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        key = f"{source_path}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.nii')
+
+    def lookup(self, source_path):
+        """Header of the cached copy of source_path, or None."""
+        try:
+            path = self.entry_path(source_path)
+            if not os.path.exists(path):
+                return None
+            os.utime(path)  # Recency for eviction
+            header = NiftiHeader(path)
+        except (OSError, ValueError):
+            return None
+        return header if header.mappable else None
+
+    def create(self, source_header, dtype, timepoints=1):
+        """
+        Start an entry for a source; None if the cache cannot be written. Its
+        volume is (z, y, x), or (t, z, y, x) for more than one timepoint.
+        """
+        try:
+            final_path = self.entry_path(source_header.file_path)
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{final_path}.{os.getpid()}.tmp"
+            shape = source_header.spatial_shape
+            if timepoints > 1:
+                shape = (timepoints,) + shape
+            with open(temp_path, 'wb') as cache_file:
+                cache_file.write(self.nifti_header(source_header, dtype, shape))
+                cache_file.truncate(DATA_OFFSET + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            volume = np.memmap(temp_path, dtype=dtype, mode='r+', offset=DATA_OFFSET, shape=shape)
+        except OSError:
+            return None
+        return CacheEntry(self, temp_path, final_path, volume)
+
+    @staticmethod
+    def nifti_header(source_header, dtype, shape):
+        """NIfTI-1 header bytes for the decoded (z, y, x) or (t, z, y, x) array, keeping voxel sizes and orientation."""
+        import nibabel as nib
+        source = source_header.image_header
+        header = nib.Nifti1Header()
+        header.set_data_shape(tuple(reversed(shape)))
+        header.set_data_dtype(dtype)
+        zooms = tuple(source.get_zooms()[:len(shape)])
+        header.set_zooms(zooms + (1.0,) * (len(shape) - len(zooms)))
+        header.set_xyzt_units(*source.get_xyzt_units())
+        header.set_qform(*source.get_qform(coded=True))
+        header.set_sform(*source.get_sform(coded=True))
+        header.set_data_offset(DATA_OFFSET)
+        return header.binaryblock + b'\0' * (DATA_OFFSET - len(header.binaryblock))
+
+    def entries(self):
+        """(mtime, size, path) of every committed entry."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if name.endswith('.nii'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
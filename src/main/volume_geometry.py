@@ -0,0 +1,154 @@
+import numpy as np
+
+# Output planes resampled between two progress notifications
+RESAMPLE_PLANES_PER_UPDATE = 8
+
+
+class VolumeGeometry:
+    """
+    Voxel spacing and patient-space placement of a (z, y, x) volume.
+
+    spacing is in mm per voxel along z, y and x (array order). origin is the
+    patient position of voxel (0, 0, 0) and direction the 3x3 matrix whose
+    columns are the patient directions of the x, y and z voxel axes, as in
+    ITK, in the frame of the source (RAS for NIfTI, LPS for DICOM and
+    SimpleITK). The voxels themselves are never resampled to honour the
+    spacing; views apply it when they are drawn.
+    """
+
+    def __init__(self, spacing=(1.0, 1.0, 1.0), origin=(0.0, 0.0, 0.0), direction=None):
+        # Missing or zero sizes are treated as 1 mm rather than collapsing a view
+        self.spacing = tuple(float(abs(s)) if s and np.isfinite(s) else 1.0 for s in spacing)
+        self.origin = tuple(float(o) for o in origin)
+        self.direction = np.eye(3) if direction is None else np.asarray(direction, np.float64).reshape(3, 3)
+
+    @classmethod
+    def from_nifti(cls, image_header):
+        """From a nibabel NIfTI header (zooms and the qform/sform affine)."""
+        zooms = [float(z) for z in image_header.get_zooms()[:3]]
+        zooms += [1.0] * (3 - len(zooms))
+        affine = image_header.get_best_affine()
+        lengths = np.linalg.norm(affine[:3, :3], axis=0)
+        direction = affine[:3, :3] / np.where(lengths > 0, lengths, 1)
+        return cls(tuple(reversed(zooms)), affine[:3, 3], direction)
+
+    @classmethod
+    def from_sitk(cls, image):
+        """From a SimpleITK image (its first three axes for a time series)."""
+        dimension = image.GetDimension()
+        direction = np.asarray(image.GetDirection()).reshape(dimension, dimension)[:3, :3]
+        return cls(tuple(reversed(image.GetSpacing()[:3])), image.GetOrigin()[:3], direction)
+
+    @classmethod
+    def from_dicom(cls, series):
+        """From a sorted DicomSeries: PixelSpacing in-plane, slice positions along the normal."""
+        first = series.headers[0]
+        row_spacing, column_spacing = first['pixel_spacing'] or (1.0, 1.0)
+        slice_spacing = first['slice_thickness'] or 1.0
+        if first['orientation']:
+            orientation = np.array(first['orientation'])
+            normal = np.cross(orientation[:3], orientation[3:])
+            direction = np.stack([orientation[:3], orientation[3:], normal], axis=1)
+            positions = [h['position'] for h in series.headers]
+            if len(series) > 1 and all(positions):
+                # Gaps between slice centres beat SliceThickness, which ignores overlap and spacing
+                distances = np.diff([float(np.dot(normal, p)) for p in positions])
+                if np.median(np.abs(distances)) > 0:
+                    slice_spacing = float(np.median(np.abs(distances)))
+        else:
+            direction = None
+        origin = first['position'] or (0.0, 0.0, 0.0)
+        return cls((slice_spacing, row_spacing, column_spacing), origin, direction)
+
+    @property
+    def isotropic(self):
+        return np.allclose(self.spacing, self.spacing[0], rtol=1e-3)
+
+    def view_spacing(self, view):
+        """(row, column) pixel size in mm of view 0/1/2 in display orientation."""
+        sz, sy, sx = self.spacing
+        return ((sy, sx), (sz, sx), (sz, sy))[view]
+
+    def aspect(self, view):
+        """Displayed height of a pixel relative to its width."""
+        rows, cols = self.view_spacing(view)
+        return rows / cols
+
+    def to_physical(self, index):
+        """Patient position in mm of a (z, y, x) voxel coordinate, as (x, y, z)."""
+        scaled = np.asarray(index, np.float64)[::-1] * np.asarray(self.spacing[::-1])
+        return np.asarray(self.origin) + self.direction @ scaled
+
+    def resampled(self, spacing):
+        """The geometry of the same volume on a grid of the given (z, y, x) spacing."""
+        return VolumeGeometry(spacing, self.origin, self.direction)
+
+    def isotropic_shape(self, shape, size=None):
+        """Shape covering the same extent with cubic voxels of size mm (by default the finest spacing)."""
+        size = min(self.spacing) if size is None else size
+        return tuple(int(np.floor((n - 1) * s / size + 1e-6)) + 1 for n, s in zip(shape, self.spacing))
+
+    def __repr__(self):
+        return "VolumeGeometry(spacing=({:.3g}, {:.3g}, {:.3g}) mm)".format(*self.spacing)
+
+
+def interpolation_weights(count, source_spacing, target_spacing, size):
+    """Lower source index and weight of the upper one for count target samples along an axis."""
+    positions = np.arange(count) * (target_spacing / source_spacing)
+    lower = np.clip(np.floor(positions), 0, max(size - 2, 0)).astype(np.intp)
+    weights = np.clip(positions - lower, 0, 1).astype(np.float32) if size > 1 else np.zeros(count, np.float32)
+    return lower, weights
+
+
+def resample_isotropic(volume, geometry, size=None, on_progress=None, should_stop=None):
+    """
+    Linearly resample a volume to cubic voxels; returns (volume, geometry), or None when stopped.
+
+    Separable: every axial plane is first resampled in-plane, then output
+    planes are blended from the two nearest resampled planes, so the work
+    reads the source plane by plane (a memory-mapped volume is streamed) and
+    holds one in-plane resampled copy on top of the result. This is an
+    explicit, memory-hungry operation; the viewer itself always shows the
+    native grid with the spacing applied at display time.
+    """
+    size = min(geometry.spacing) if size is None else float(size)
+    target = geometry.resampled((size, size, size))
+    nz, ny, nx = volume.shape
+    shape = geometry.isotropic_shape(volume.shape, size)
+    sz, sy, sx = geometry.spacing
+    y_lower, y_weights = interpolation_weights(shape[1], sy, size, ny)
+    x_lower, x_weights = interpolation_weights(shape[2], sx, size, nx)
+    z_lower, z_weights = interpolation_weights(shape[0], sz, size, nz)
+    y_upper = np.minimum(y_lower + 1, ny - 1)
+    x_upper = np.minimum(x_lower + 1, nx - 1)
+    z_upper = np.minimum(z_lower + 1, nz - 1)
+
+    def report(done, total):
+        if on_progress is not None:
+            on_progress(100 * done // total)
+
+    total = nz + shape[0]
+    planes = np.empty((nz,) + shape[1:], np.float32)
+    for z in range(nz):
+        if should_stop is not None and should_stop():
+            return None
+        plane = np.asarray(volume[z], np.float32)
+        rows = plane[y_lower] * (1 - y_weights)[:, None] + plane[y_upper] * y_weights[:, None]
+        planes[z] = rows[:, x_lower] * (1 - x_weights) + rows[:, x_upper] * x_weights
+        if z % RESAMPLE_PLANES_PER_UPDATE == 0:
+            report(z, total)
+
+    out = np.empty(shape, volume.dtype)
+    integer = out.dtype.kind in 'iu'
+    info = np.iinfo(out.dtype) if integer else None
+    for k in range(shape[0]):
+        if should_stop is not None and should_stop():
+            return None
+        values = planes[z_lower[k]] * (1 - z_weights[k]) + planes[z_upper[k]] * z_weights[k]
+        if integer:
+            values = np.clip(np.rint(values), info.min, info.max)
+        out[k] = values
+        if k % RESAMPLE_PLANES_PER_UPDATE == 0:
+            report(nz + k, total)
+    report(total, total)
+    return out, target
@@ -0,0 +1,330 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from nifti import NiftiHeader, is_nifti, read_into
+from shared_volumes import study_key
+from time_series import TimeSeries
+from volume_geometry import VolumeGeometry
+
+# Bytes decoded between two on_slab notifications
+SLAB_BYTES = 8 * 1024 * 1024
+
+
+def _ignore(*args):
+    pass
+
+
+class VolumeReader:
+    """
+    Read a volume from a NIfTI file, a DICOM folder or anything SimpleITK opens.
+
+    Uncompressed NIfTI files are memory-mapped read-only, so nothing is read
+    until a slice touches it. Other NIfTI files are streamed straight into a
+    preallocated (z, y, x) array, so axial planes become available in order
+    while the rest of the file is still being decompressed. With a
+    VolumeCache, that array is a new cache file, and later opens of the same
+    file map the decoded copy instead. A directory is
+    read as a DICOM series (the largest one it contains), decoded in parallel.
+    Other formats are read with SimpleITK in one go.
+
+    geometry holds the voxel spacing and orientation of the source (a
+    VolumeGeometry); it is set before on_allocated is called. For a 4D
+    series, read() returns the first timepoint and time_series (a
+    TimeSeries, not yet started) serves the others lazily.
+
+    With a SharedVolumeStore, volumes that would otherwise live in private
+    memory (DICOM series, SimpleITK reads, NIfTI decodes without a cache)
+    are decoded into shared memory, or attached from another viewer process
+    that already did; shared_volume is then the handle to release. Memory
+    maps need no such help: the page cache already shares them.
+
+    The callbacks are called from the thread running read():
+        on_allocated(volume)  the array being filled; planes arrive in z order
+        on_slab(z_end)        planes [0, z_end) are decoded
+        on_progress(percent)
+        on_info(message)      throughput and other details worth showing
+    should_stop() is polled between slabs; read() then returns None.
+    """
+
+    def __init__(self, file_path, on_allocated=_ignore, on_slab=_ignore, on_progress=_ignore,
+                 on_info=_ignore, should_stop=lambda: False, cache=None, shared=None):
+        self.file_path = file_path
+        self.cache = cache
+        self.shared = shared
+        self.on_allocated = on_allocated
+        self.on_slab = on_slab
+        self.on_progress = on_progress
+        self.on_info = on_info
+        self.should_stop = should_stop
+        self.geometry = VolumeGeometry()
+        self.time_series = None
+        self.shared_volume = None
+        self.shared_key = None
+
+    def read(self):
+        """The (z, y, x) volume (the first timepoint of a series), or None when stopped."""
+        if os.path.isdir(self.file_path):
+            return self.read_shared(self.read_dicom_folder)
+        header = NiftiHeader(self.file_path) if is_nifti(self.file_path) else None
+        if header is not None and header.mappable:
+            return self.map_nifti(header)
+        elif header is not None and header.supported:
+            cached = self.cache.lookup(self.file_path) if self.cache is not None else None
+            if cached is not None:
+                self.on_info(f"Opened decoded copy of {os.path.basename(self.file_path)} from the cache")
+                return self.map_nifti(cached)
+            if header.timepoints > 1 and not header.compressed:
+                return self.seek_nifti(header)
+            if self.cache is None and header.timepoints == 1:
+                return self.read_shared(lambda: self.stream_nifti(header))
+            return self.stream_nifti(header)
+        return self.read_shared(self.read_with_sitk)
+
+    def read_shared(self, read):
+        """Attach to the copy another viewer process published, or read() into a new shared one."""
+        if self.shared is None:
+            return read()
+        self.shared_key = study_key(self.file_path)
+        handle = self.shared.attach(self.shared_key, should_stop=self.should_stop)
+        if handle is not None:
+            self.shared_volume = handle
+            self.geometry = handle.geometry or self.geometry
+            self.on_info(f"Attached to {os.path.basename(os.path.normpath(self.file_path))} "
+                         f"shared by another viewer")
+            self.on_allocated(handle.volume)
+            self.on_slab(handle.shape[0])
+            self.on_progress(100)
+            return handle.volume
+        try:
+            volume = read()
+        except BaseException:
+            if self.shared_volume is not None:
+                self.shared_volume.abandon()
+                self.shared_volume = None
+            raise
+        if self.shared_volume is not None:
+            if volume is None or self.time_series is not None:
+                self.shared_volume.abandon()
+                self.shared_volume = None
+            else:
+                self.shared_volume.publish(self.geometry)
+        return volume
+
+    def allocate(self, shape, dtype):
+        """An array to decode into: in shared memory when sharing, else private."""
+        if self.shared_key is not None and self.shared_volume is None:
+            self.shared_volume = self.shared.create(self.shared_key, shape, dtype)
+            if self.shared_volume is not None:
+                return self.shared_volume.volume
+        return np.empty(shape, dtype)
+
+    def map_nifti(self, header):
+        """Expose the voxel block in place; the whole volume is available at once."""
+        self.geometry = VolumeGeometry.from_nifti(header.image_header)
+        if header.timepoints > 1:
+            self.time_series = TimeSeries(header.memmap, header.timepoints)
+        volume = header.memmap()
+        self.on_allocated(volume)
+        self.on_slab(volume.shape[0])
+        self.on_progress(100)
+        return volume
+
+    def seek_nifti(self, header):
+        """A rescaled or byte-swapped uncompressed series: each timepoint is decoded when needed."""
+        self.geometry = VolumeGeometry.from_nifti(header.image_header)
+        self.time_series = TimeSeries(header.read_volume, header.timepoints)
+        volume = self.time_series.timepoint(0)
+        self.on_allocated(volume)
+        self.on_slab(volume.shape[0])
+        self.on_progress(100)
+        return volume
+
+    def stream_nifti(self, header):
+        """
+        Decode the first 3D volume slab by slab. The other timepoints of a
+        series are decoded afterwards, in order, by a SeriesDecoder running
+        in the background of the returned time_series.
+        """
+        nz, ny, nx = header.spatial_shape
+        dtype = np.float32 if header.scaled else header.dtype
+        count = header.timepoints
+        entry = self.cache.create(header, dtype, count) if self.cache is not None else None
+        if entry is not None:
+            series = entry.volume
+        elif count > 1:
+            series = scratch_memmap((count, nz, ny, nx), dtype)
+        else:
+            series = self.allocate((nz, ny, nx), dtype)
+        volume = series[0] if count > 1 else series
+
+        file_obj = header.open_data()
+        try:
+            volume = self.decode_nifti(header, volume, file_obj)
+        except BaseException:
+            file_obj.close()
+            if entry is not None:
+                entry.abandon()
+            raise
+        if volume is None:
+            file_obj.close()
+            if entry is not None:
+                entry.abandon()
+            return None
+        if count > 1:
+            # The decoder owns the open stream and the cache entry from here on
+            decoder = SeriesDecoder(header, series, file_obj, entry)
+            self.time_series = TimeSeries(series.__getitem__, count, available=1, decoder=decoder)
+            return volume
+        file_obj.close()
+        if entry is not None:
+            volume = entry.commit()
+        return volume
+
+    def decode_nifti(self, header, volume, file_obj):
+        """Fill volume from the next voxels of file_obj; None when stopped."""
+        nz = header.spatial_shape[0]
+        self.geometry = VolumeGeometry.from_nifti(header.image_header)
+        self.on_allocated(volume)
+
+        def on_planes(z_end):
+            self.on_slab(z_end)
+            self.on_progress(100 * z_end // nz)
+
+        if not decode_planes(header, file_obj, volume, on_planes, self.should_stop):
+            return None
+        return volume
+
+    def read_dicom_folder(self):
+        """Index the folder's headers, then decode the largest series slice by slice."""
+        from dicom_series import DicomFolder, read_series
+        folder = DicomFolder(self.file_path).scan()
+        all_series = folder.series()
+        if not all_series:
+            raise IOError("no DICOM images found")
+        series = all_series[0]
+        self.on_info(f"Indexed {folder.files_scanned} files in {folder.scan_seconds:.2f} s "
+                     f"({folder.files_scanned / max(folder.scan_seconds, 1e-6):.0f} files/s, "
+                     f"{folder.files_read} headers read); {len(all_series)} series")
+        if self.should_stop():
+            return None
+
+        self.geometry = VolumeGeometry.from_dicom(series)
+        volume = self.allocate(series.shape, series.output_dtype())
+        self.on_allocated(volume)
+
+        def on_slice(index):
+            self.on_slab(index + 1)
+            self.on_progress(100 * (index + 1) // len(series))
+
+        start = time.perf_counter()
+        volume = read_series(series, out=volume, on_slice=on_slice, should_stop=self.should_stop)
+        if volume is not None:
+            elapsed = time.perf_counter() - start
+            self.on_info(f"Decoded {len(series)} slices of '{series.description}' "
+                         f"at {len(series) / elapsed:.0f} files/s")
+        return volume
+
+    def read_with_sitk(self):
+        import SimpleITK as sitk
+        image = sitk.ReadImage(self.file_path)
+        self.geometry = VolumeGeometry.from_sitk(image)
+        volume = sitk.GetArrayFromImage(image)
+        if volume.ndim > 3:
+            # SimpleITK reads a time series in one go; its timepoints are views of that array
+            series = volume.reshape((-1,) + volume.shape[-3:])
+            self.time_series = TimeSeries(series.__getitem__, len(series))
+            volume = series[0]
+        elif self.shared_key is not None:
+            # One transient copy; the private array SimpleITK returned is dropped
+            shared = self.allocate(volume.shape, volume.dtype)
+            shared[...] = volume
+            volume = shared
+        if self.should_stop():
+            return None
+        self.on_allocated(volume)
+        self.on_slab(volume.shape[0])
+        self.on_progress(100)
+        return volume
+
+
+def scratch_memmap(shape, dtype):
+    """A writable memmap of an unnamed temporary file, released with the mapping."""
+    with tempfile.TemporaryFile(prefix='mpr_series_') as file_obj:
+        file_obj.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return np.memmap(file_obj, dtype=dtype, mode='r+', shape=shape)
+
+
+def decode_planes(header, file_obj, volume, on_planes=_ignore, should_stop=lambda: False):
+    """
+    Decode the next (z, y, x) volume of a NIfTI stream into volume, slab by
+    slab; returns False when stopped.
+    """
+    nz, ny, nx = header.spatial_shape
+    planes_per_slab = max(1, SLAB_BYTES // header.plane_bytes)
+    scratch = np.empty((planes_per_slab, ny, nx), header.dtype) if header.scaled else None
+    for z_start in range(0, nz, planes_per_slab):
+        if should_stop():
+            return False
+        z_end = min(nz, z_start + planes_per_slab)
+        target = volume[z_start:z_end] if scratch is None else scratch[:z_end - z_start]
+        if read_into(file_obj, target) < target.nbytes:
+            raise IOError("file is truncated")
+        if header.swapped:
+            target.byteswap(inplace=True)
+        if scratch is not None:
+            np.multiply(target, header.slope, out=volume[z_start:z_end], casting='unsafe')
+            volume[z_start:z_end] += header.inter
+        on_planes(z_end)
+    return True
+
+
+class SeriesDecoder:
+    """
+    Decodes the remaining timepoints of a compressed series, in file order,
+    into a (t, z, y, x) memmap whose first timepoint is already filled.
+
+    The target is a cache entry when the cache is enabled, committed once
+    the last timepoint is in so later opens map it; otherwise an unnamed
+    scratch file. Either way the series stays on disk, not in memory.
+    """
+
+    def __init__(self, header, series, file_obj, entry=None):
+        self.header = header
+        self.series = series
+        self.file_obj = file_obj
+        self.entry = entry
+
+    def run(self, on_timepoint, should_stop, on_error=_ignore):
+        """
+        Decode timepoints 1, 2, ...; on_timepoint(n) once the first n are
+        readable. A truncated or corrupt stream ends the series at the
+        timepoints decoded so far and is reported through on_error(exception).
+        """
+        try:
+            for t in range(1, len(self.series)):
+                if not decode_planes(self.header, self.file_obj, self.series[t], should_stop=should_stop):
+                    break
+                on_timepoint(t + 1)
+            else:
+                if self.entry is not None:
+                    self.entry.commit()
+                    self.entry = None
+        except (OSError, EOFError, ValueError) as exc:
+            on_error(exc)
+        finally:
+            self.close()
+
+    def close(self):
+        """Release the stream, and the cache entry unless it was committed."""
+        self.file_obj.close()
+        if self.entry is not None:
+            self.entry.abandon()
+            self.entry = None
+
+
+def read_volume(file_path, cache=None):
+    """Read a whole volume synchronously."""
+    return VolumeReader(file_path, cache=cache).read()
@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from shared_volumes import default_store
+from volume_cache import default_cache
+from volume_geometry import resample_isotropic
+from volume_io import VolumeReader
+
+
+class VolumeLoader(QThread):
+    """
+    Read a volume on a worker thread with a VolumeReader.
+
+    Signals (delivered on the GUI thread):
+        volume_allocated(volume, geometry)
+                                  the array being filled, planes arriving in z order,
+                                  and its VolumeGeometry
+        slab_loaded(z_end)        planes [0, z_end) are decoded
+        progress(percent)
+        loaded(volume, series, shared)
+                                  the whole volume is available; series is the
+                                  TimeSeries of a 4D file (to be started) and shared
+                                  the SharedVolume handle to release, else None
+        failed(message)
+        cancelled()
+        info(message)             throughput and other details worth showing
+    """
+
+    volume_allocated = pyqtSignal(object, object)
+    slab_loaded = pyqtSignal(int)
+    progress = pyqtSignal(int)
+    loaded = pyqtSignal(object, object, object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    info = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._cancel_requested = False
+
+    def cancel(self):
+        """Ask the worker to stop at the next slab boundary."""
+        self._cancel_requested = True
+
+    def run(self):
+        reader = VolumeReader(self.file_path,
+                              on_allocated=lambda volume: self.volume_allocated.emit(volume, reader.geometry),
+                              on_slab=self.slab_loaded.emit,
+                              on_progress=self.progress.emit,
+                              on_info=self.info.emit,
+                              should_stop=lambda: self._cancel_requested,
+                              cache=default_cache(),
+                              shared=default_store())
+        try:
+            volume = reader.read()
+        except Exception as exc:
+            self.failed.emit(f"Could not load {self.file_path}: {exc}")
+            return
+
+        if volume is None:
+            self.cancelled.emit()
+        else:
+            self.loaded.emit(volume, reader.time_series, reader.shared_volume)
+
+
+class VolumeResampler(QThread):
+    """
+    Resample a volume to cubic voxels on a worker thread (see resample_isotropic).
+
+    Signals (delivered on the GUI thread):
+        progress(percent)
+        resampled(volume, geometry)
+        failed(message)
+        cancelled()
+    """
+
+    progress = pyqtSignal(int)
+    resampled = pyqtSignal(object, object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, volume, geometry, parent=None):
+        super().__init__(parent)
+        self.volume = volume
+        self.geometry = geometry
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def run(self):
+        try:
+            result = resample_isotropic(self.volume, self.geometry, on_progress=self.progress.emit,
+                                        should_stop=lambda: self._cancel_requested)
+        except Exception as exc:
+            self.failed.emit(f"Could not resample the volume: {exc}")
+            return
+        if result is None:
+            self.cancelled.emit()
+        else:
+            self.resampled.emit(*result)
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+import vtk
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
+from vtkmodules.util import numpy_support
+
+# Force a mapper instead of probing the GPU: "gpu" or "cpu"
+MAPPER_ENV_VAR = 'MPR_VOLUME_MAPPER'
+# Pyramid level rendered while the camera is being rotated
+INTERACTIVE_LEVEL = 1
+
+
+def to_vtk_image(volume, spacing=(1.0, 1.0, 1.0)):
+    """
+    Wrap a C-ordered (z, y, x) array as vtkImageData without copying.
+
+    The voxels keep their native dtype (int16 stays VTK_SHORT). The returned
+    image holds a reference to the array, which must stay unchanged while the
+    image is in use.
+    """
+    volume = np.ascontiguousarray(volume)
+    image = vtk.vtkImageData()
+    image.SetDimensions(volume.shape[2], volume.shape[1], volume.shape[0])
+    image.SetSpacing(*spacing)
+    scalars = numpy_support.numpy_to_vtk(volume.reshape(-1), deep=False)
+    image.GetPointData().SetScalars(scalars)
+    image._numpy_reference = volume
+    return image
+
+
+class VolumeRenderingWindow(QWidget):
+    """
+    Volume rendering in a Qt window that lives alongside the MPR views.
+
+    The VTK pipeline (mapper, property, renderer) is built once and reused: a
+    new volume only swaps the mapper input and the transfer functions. The
+    interactor runs inside the Qt event loop, so nothing blocks the viewer.
+    A GPU ray-cast mapper is used when the render window supports it,
+    otherwise the CPU fixed-point ray caster. While the camera is being
+    rotated, a downsampled pyramid level is rendered instead of the full
+    volume.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Volume Rendering")
+        self.resize(600, 600)
+
+        self.vtk_widget = QVTKRenderWindowInteractor(self)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.vtk_widget)
+        self.setLayout(layout)
+
+        self.render_window = self.vtk_widget.GetRenderWindow()
+        self.renderer = vtk.vtkRenderer()
+        self.renderer.SetBackground(0, 0, 0)
+        self.render_window.AddRenderer(self.renderer)
+        self.interactor = self.render_window.GetInteractor()
+        self.interactor.SetInteractorStyle(vtk.vtkInteractorStyleTrackballCamera())
+        self.interactor.AddObserver('StartInteractionEvent', self.on_start_interaction)
+        self.interactor.AddObserver('EndInteractionEvent', self.on_end_interaction)
+
+        self.color_function = vtk.vtkColorTransferFunction()
+        self.opacity_function = vtk.vtkPiecewiseFunction()
+        self.volume_property = vtk.vtkVolumeProperty()
+        self.volume_property.ShadeOn()
+        self.volume_property.SetInterpolationTypeToLinear()
+        self.volume_property.SetColor(self.color_function)
+        self.volume_property.SetScalarOpacity(self.opacity_function)
+
+        self.mapper = None
+        self.mapper_name = None
+        self.actor = vtk.vtkVolume()
+        self.actor.SetProperty(self.volume_property)
+        self.renderer.AddVolume(self.actor)
+
+        self.volume = None
+        self.spacing = (1.0, 1.0, 1.0)
+        self.full_image = None
+        self.pyramid = None
+        self.lod_image = None
+        self.interactor_ready = False
+
+    def create_mapper(self):
+        """GPU ray casting when supported, otherwise the CPU ray caster."""
+        choice = os.environ.get(MAPPER_ENV_VAR, '').lower()
+        if choice != 'cpu':
+            gpu_mapper = vtk.vtkGPUVolumeRayCastMapper()
+            if choice == 'gpu' or gpu_mapper.IsRenderSupported(self.render_window, self.volume_property):
+                return gpu_mapper, 'GPU ray cast'
+        cpu_mapper = vtk.vtkFixedPointVolumeRayCastMapper()
+        cpu_mapper.SetNumberOfThreads(os.cpu_count() or 1)
+        return cpu_mapper, 'CPU ray cast'
+
+    def set_volume(self, volume, low, high, pyramid=None, spacing=(1.0, 1.0, 1.0)):
+        """Show a volume with its (x, y, z) voxel spacing; the pipeline is only rebuilt the first time."""
+        if not self.interactor_ready:
+            self.vtk_widget.Initialize()
+            self.interactor_ready = True
+        if self.mapper is None:
+            self.mapper, self.mapper_name = self.create_mapper()
+            self.mapper.SetAutoAdjustSampleDistances(1)
+            self.actor.SetMapper(self.mapper)
+
+        if volume is not self.volume or tuple(spacing) != self.spacing:
+            self.volume = volume
+            self.spacing = tuple(spacing)
+            self.full_image = to_vtk_image(volume, self.spacing)
+            self.lod_image = None
+            self.mapper.SetInputData(self.full_image)
+            self.renderer.ResetCamera()
+        self.pyramid = pyramid
+
+        self.color_function.RemoveAllPoints()
+        self.color_function.AddRGBPoint(low, 0.0, 0.0, 0.0)
+        self.color_function.AddRGBPoint(high, 1.0, 1.0, 1.0)
+        self.opacity_function.RemoveAllPoints()
+        self.opacity_function.AddPoint(low, 0.0)
+        self.opacity_function.AddPoint(high, 1.0)
+
+        self.setWindowTitle(f"Volume Rendering ({self.mapper_name})")
+        self.show()
+        self.raise_()
+        self.render_window.Render()
+
+    def interactive_image(self):
+        """Downsampled image for camera interaction, once the pyramid level exists."""
+        if self.lod_image is None and self.pyramid is not None and len(self.pyramid.levels) > INTERACTIVE_LEVEL:
+            factor = 2 ** INTERACTIVE_LEVEL
+            self.lod_image = to_vtk_image(self.pyramid.levels[INTERACTIVE_LEVEL],
+                                          [factor * s for s in self.spacing])
+            # Block means are centred between the full-resolution voxels they cover
+            self.lod_image.SetOrigin(*[(factor - 1) / 2.0 * s for s in self.spacing])
+        return self.lod_image
+
+    def on_start_interaction(self, caller, event):
+        image = self.interactive_image()
+        if image is not None:
+            self.mapper.SetInputData(image)
+
+    def on_end_interaction(self, caller, event):
+        if self.full_image is not None and self.lod_image is not None:
+            self.mapper.SetInputData(self.full_image)
+            self.render_window.Render()
+
+    def release(self):
+        """Drop references to the volume (e.g. when it is unloaded)."""
+        self.volume = None
+        self.full_image = None
+        self.lod_image = None
+        self.pyramid = None
+        if self.mapper is not None:
+            self.mapper.RemoveAllInputs()
+        self.hide()
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Voxel sample used for the robust percentiles
+STATS_SAMPLE_SIZE = 2_000_000
+# Axial planes the sample is drawn from, so a memory-mapped volume is barely touched
+STATS_SAMPLE_PLANES = 32
+# Bins used to quantize float volumes before the lookup
+FLOAT_LUT_BINS = 4096
+# Largest integer range mapped one entry per value
+MAX_DIRECT_LUT_SIZE = 1 << 22
+
+
+class VolumeStats:
+    """
+    Intensity statistics of a whole volume, computed once at load time.
+
+    low/high are robust percentiles taken from a sample of evenly spaced axial
+    planes and are used as the default display window, so a few hot voxels do
+    not wash out the image and every slice shares the same mapping. min/max
+    are exact unless exact=False, in which case they come from the sample too;
+    use that for memory-mapped volumes, where a full pass would page in the
+    whole file.
+    """
+
+    def __init__(self, volume, low_percentile=0.5, high_percentile=99.5, exact=True):
+        self.dtype = volume.dtype
+
+        planes = np.linspace(0, volume.shape[0] - 1, min(volume.shape[0], STATS_SAMPLE_PLANES)).astype(int)
+        plane_budget = STATS_SAMPLE_SIZE // len(planes)
+        step = max(1, int(np.ceil(np.sqrt(volume.shape[1] * volume.shape[2] / plane_budget))))
+        sample = np.asarray(volume[planes, ::step, ::step])
+
+        self.min = volume.min() if exact else sample.min()
+        self.max = volume.max() if exact else sample.max()
+        self.low, self.high = np.percentile(sample, [low_percentile, high_percentile])
+        if self.high <= self.low:
+            self.low, self.high = float(self.min), float(self.max)
+
+
+def slider_adjustments(brightness_value, contrast_value):
+    """Brightness offset and contrast factor from the viewer's slider units."""
+    return brightness_value / 150.0, contrast_value / 100.0  # [-1, 1] and a multiplier
+
+
+def colormap_table(name):
+    """256-entry RGBA uint8 table for a matplotlib colormap."""
+    if name == 'gray':
+        # The identity ramp, without importing matplotlib at startup
+        ramp = np.arange(256, dtype=np.uint8)
+        return np.stack([ramp, ramp, ramp, np.full(256, 255, np.uint8)], axis=1)
+    from matplotlib import colormaps
+    return colormaps[name](np.arange(256), bytes=True)
+
+
+def window_to_uint8(values, low, high, brightness, contrast):
+    """Map intensities to 0-255 with the viewer's contrast-then-brightness formula."""
+    span = high - low
+    normalized = (values - low) / span if span > 0 else np.zeros_like(values, dtype=np.float64)
+    contrasted = np.clip((normalized - 0.5) * contrast + 0.5, 0, 1)
+    adjusted = np.clip(contrasted + brightness, 0, 1)
+    return (adjusted * 255).astype(np.uint8)
+
+
+class WindowLevelLUT:
+    """
+    Lookup table from native voxel values straight to uint8 display values.
+
+    Brightness/contrast changes only rebuild the table; displaying a slice is
+    a single np.take. 8/16-bit integers index the table by their bit pattern
+    (signed data is reinterpreted as unsigned, no copy), wider integers are
+    offset by the volume minimum, and float data is quantized into bins.
+
+    With a colormap set, rgba holds the same table composed with the
+    colormap's 256 RGBA entries, so apply_rgba() goes from voxels to display
+    pixels in one gather. apply_overlay() does the same through a tinted copy
+    of that table for the voxels of a label overlay.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        dtype = np.dtype(stats.dtype)
+
+        if dtype.kind in 'iu' and dtype.itemsize <= 2:
+            self.mode = 'bits'
+            self.index_dtype = np.dtype(f'u{dtype.itemsize}')
+            self.values = np.arange(1 << (8 * dtype.itemsize)).astype(self.index_dtype).view(dtype)
+        elif dtype.kind in 'iu' and int(stats.max) - int(stats.min) < MAX_DIRECT_LUT_SIZE:
+            self.mode = 'offset'
+            self.values = np.arange(int(stats.min), int(stats.max) + 1)
+        else:
+            self.mode = 'quantized'
+            self.scale = (FLOAT_LUT_BINS - 1) / max(float(stats.max) - float(stats.min), 1e-12)
+            self.values = float(stats.min) + np.arange(FLOAT_LUT_BINS) / self.scale
+
+        self.table = None
+        self.colormap = None
+        self.rgba = None
+        self.overlay_rgba = None
+        self.overlay_tint = None
+        self.rebuild(0.0, 1.0)
+
+    def rebuild(self, brightness, contrast, low=None, high=None, colormap=None):
+        """Recompute the table for new brightness/contrast (and optional window or colormap)."""
+        if colormap is not None:
+            self.colormap = colormap
+        low = self.stats.low if low is None else low
+        high = self.stats.high if high is None else high
+        self.table = window_to_uint8(self.values.astype(np.float64), low, high, brightness, contrast)
+        if self.colormap is not None:
+            self.rgba = self.colormap[self.table]
+        self.overlay_rgba = None
+
+    def set_colormap(self, colormap):
+        """Compose the table with a (256, 4) uint8 colormap table (see colormap_table)."""
+        self.colormap = colormap
+        self.rgba = colormap[self.table]
+        self.overlay_rgba = None
+
+    def indices(self, slice_data):
+        """Table indices of a slice (a reinterpreting view for 8/16-bit data)."""
+        if self.mode == 'bits':
+            return slice_data.view(self.index_dtype)
+        elif self.mode == 'offset':
+            # Clipped first: min/max may come from a sample, and a voxel outside them would
+            # wrap around (unsigned) or overflow in the subtraction instead of saturating
+            return np.clip(slice_data, self.stats.min, self.stats.max) - self.stats.min
+        if slice_data.dtype.kind in 'iu':
+            offsets = np.subtract(np.clip(slice_data, self.stats.min, self.stats.max), float(self.stats.min))
+            return (offsets * self.scale).astype(np.intp)
+        return ((slice_data - self.stats.min) * self.scale).astype(np.intp)
+
+    def apply(self, slice_data, out=None):
+        """Map a slice to uint8 display values."""
+        return np.take(self.table, self.indices(slice_data), mode='clip', out=out)
+
+    def apply_rgba(self, slice_data, out=None):
+        """Map a slice to (rows, cols, 4) uint8 pixels through the colormap."""
+        return np.take(self.rgba, self.indices(slice_data), axis=0, mode='clip', out=out)
+
+    def apply_overlay(self, slice_data, mask, pixels, color, alpha):
+        """
+        Tint the pixels of a slice where mask is set, in place.
+
+        pixels come from apply_rgba() on the same slice; the tinted colors are
+        gathered from the colormap blended with color, as whole RGBA words.
+        """
+        if self.overlay_rgba is None or self.overlay_tint != (color, alpha):
+            tinted = self.colormap.copy()
+            tinted[:, :3] = self.colormap[:, :3] * (1 - alpha) + np.asarray(color) * alpha
+            self.overlay_rgba = np.ascontiguousarray(tinted[self.table]).view(np.uint32)[:, 0]
+            self.overlay_tint = (color, alpha)
+        colors = np.take(self.overlay_rgba, self.indices(slice_data), mode='clip')
+        np.copyto(pixels.view(np.uint32)[..., 0], colors, where=mask)
+        return pixels
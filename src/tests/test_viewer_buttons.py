@@ -0,0 +1,70 @@
+"""
+Clicks every push button of the viewer offscreen, with the file dialogs
+answered, and fails on any exception raised by a slot. PyQt aborts the
+process on an unhandled exception in a slot, so the hook collects them.
+
+    python -m pytest src/tests
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "main"))
+
+import nibabel as nib
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QFileDialog, QPushButton
+
+# Buttons that open another window or start playback are clicked last, after the rest
+LAST_BUTTONS = ("Show Volume Rendering",)
+
+
+def wait(app, condition, timeout=30.0):
+    end = time.time() + timeout
+    while not condition() and time.time() < end:
+        app.processEvents()
+    app.processEvents()
+
+
+def test_every_button_click(monkeypatch):
+    from MPR_Viewer import MRIViewer
+
+    app = QApplication.instance() or QApplication([])
+    errors = []
+    monkeypatch.setattr(sys, "excepthook", lambda kind, value, trace: errors.append(value))
+
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "phantom.nii")
+    volume = np.random.default_rng(0).integers(0, 1000, (24, 32, 28), dtype=np.int16)
+    nib.save(nib.Nifti1Image(volume.T, np.eye(4)), path)
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", staticmethod(lambda *args, **kwargs: (path, "")))
+    monkeypatch.setattr(QFileDialog, "getExistingDirectory", staticmethod(lambda *args, **kwargs: ""))
+    monkeypatch.setattr(QFileDialog, "getSaveFileName",
+                        staticmethod(lambda *args, **kwargs: (os.path.join(tmp, "trace.json"), "")))
+
+    viewer = MRIViewer()
+    viewer.show()
+    buttons = {button.text(): button for button in viewer.findChildren(QPushButton)}
+    buttons["Load MRI Scan"].click()
+    wait(app, lambda: not viewer.is_loading())
+    assert viewer.scan_array is not None and viewer.scan_array.shape == volume.shape
+
+    clicked = []
+    for text in sorted(buttons, key=lambda text: text in LAST_BUTTONS):
+        buttons[text].click()
+        wait(app, lambda: not viewer.is_loading() and viewer.resampler is None)
+        clicked.append(text)
+        if viewer.is_playing:
+            viewer.stop_playback()
+        if viewer.time_playing:
+            viewer.stop_time_playback()
+        assert not errors, f"clicking {text!r} raised {errors[0]!r}"
+    assert "Grow Region from Crosshair" in clicked and "Show Volume Rendering" in clicked
+    viewer.close()
+
+
+if __name__ == "__main__":
+    import pytest
+    sys.exit(pytest.main([__file__, "-q"]))